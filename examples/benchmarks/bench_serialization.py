@@ -0,0 +1,118 @@
+"""
+JSONシリアライズのマイクロベンチマーク
+
+一覧レスポンスの組み立て方を、データベースを使わずに比較する。
+    flask_to_dict   : ORMオブジェクト → to_dict() → 標準 json（変更前の Flask）
+    flask_rows      : 列単位の Row → _asdict() → FastJSONProvider（変更後の Flask）
+    fastapi_pydantic: ORMオブジェクト → TypeAdapter(list[Item]) で検証 → dump_json（変更前の FastAPI）
+    fastapi_rows    : 列単位の Row → serialization.dump_rows（変更後の FastAPI）
+
+使い方:
+    python bench_serialization.py --rows 100 --repeat 2000
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from sqlalchemy.engine import result_tuple
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(EXAMPLES_DIR / "python-fastapi"))
+
+import serialization  # noqa: E402
+
+ITEM_FIELDS = ["id", "title", "description", "price", "owner_id", "created_at"]
+
+
+class ItemSchema(BaseModel):
+    """FastAPI の Item スキーマと同じ定義（main.py をインポートするとDB接続が作られるため複製）"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    description: str | None = None
+    price: float
+    owner_id: int
+    created_at: datetime
+
+
+def make_data(count: int) -> tuple[list, list]:
+    """同じ内容の ORM 風オブジェクトと Row を作成"""
+    Row = result_tuple(ITEM_FIELDS)
+    base = datetime(2025, 1, 1)
+    values = [
+        (i, f"item-{i}", "benchmark item", float(i % 1000) + 0.5, i % 50 + 1, base + timedelta(seconds=i))
+        for i in range(1, count + 1)
+    ]
+    objects = [SimpleNamespace(**dict(zip(ITEM_FIELDS, v))) for v in values]
+    return objects, [Row(v) for v in values]
+
+
+def to_dict(obj) -> dict:
+    """Flask の Item.to_dict と同じ変換"""
+    return {
+        "id": obj.id,
+        "title": obj.title,
+        "description": obj.description,
+        "price": obj.price,
+        "owner_id": obj.owner_id,
+        "created_at": obj.created_at.isoformat(),
+    }
+
+
+def build_cases(objects: list, rows: list) -> dict:
+    """計測対象の関数（いずれも一覧1ページ分のレスポンス本文を返す）"""
+    adapter = TypeAdapter(list[ItemSchema])
+    flask_dumps = flask_provider_dumps()
+    return {
+        "flask_to_dict": lambda: json.dumps({"items": [to_dict(o) for o in objects]}),
+        "flask_rows": lambda: flask_dumps({"items": [row._asdict() for row in rows]}),
+        "fastapi_pydantic": lambda: adapter.dump_json(adapter.validate_python(objects, from_attributes=True)),
+        "fastapi_rows": lambda: serialization.dump_rows(rows),
+    }
+
+
+def flask_provider_dumps():
+    """Flask アプリの FastJSONProvider.dumps と同じ処理（app.py はDB設定を読むためインポートしない）"""
+    if serialization.orjson is None:
+        return lambda obj: json.dumps(obj, default=serialization._default)
+    orjson = serialization.orjson
+    return lambda obj: orjson.dumps(obj, default=serialization._default).decode("utf-8")
+
+
+def measure(func, repeat: int) -> dict:
+    """repeat 回実行し、1回あたりの平均時間を返す"""
+    func()  # warmup
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = time.perf_counter() - started
+    return {"mean_us": round(elapsed / repeat * 1_000_000, 2), "ops_per_sec": round(repeat / elapsed, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare list response serialization paths")
+    parser.add_argument("--rows", type=int, default=100, help="rows per response (default: 100)")
+    parser.add_argument("--repeat", type=int, default=2000, help="iterations per case (default: 2000)")
+    args = parser.parse_args()
+
+    objects, rows = make_data(args.rows)
+    results = {name: measure(func, args.repeat) for name, func in build_cases(objects, rows).items()}
+    speedup = {
+        "flask": round(results["flask_to_dict"]["mean_us"] / results["flask_rows"]["mean_us"], 2),
+        "fastapi": round(results["fastapi_pydantic"]["mean_us"] / results["fastapi_rows"]["mean_us"], 2),
+    }
+    print(json.dumps({
+        "meta": {"rows": args.rows, "repeat": args.repeat, "orjson": serialization.orjson is not None},
+        "results": results,
+        "speedup": speedup,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+ベンチマークシナリオ
+
+各シナリオは prepare（データ準備、計測対象外）と step（1反復分の操作）を持つ。
+step 内のリクエストは Recorder.measure で操作名ごとにレイテンシを記録する。
+"""
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import httpx
+
+from targets import Target
+
+
+# ==========================================
+# 計測
+# ==========================================
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """ソート済みリストのパーセンタイル（nearest-rank 法）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies: list[float]) -> dict:
+    """レイテンシ（秒）のリストを ms 単位の統計に変換"""
+    values = sorted(latencies)
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    return {
+        "p50": round(percentile(values, 50) * 1000, 3),
+        "p95": round(percentile(values, 95) * 1000, 3),
+        "p99": round(percentile(values, 99) * 1000, 3),
+        "mean": round(sum(values) / len(values) * 1000, 3),
+        "max": round(values[-1] * 1000, 3),
+    }
+
+
+@dataclass
+class Recorder:
+    """操作ごとのレイテンシとエラー数を記録"""
+    recording: bool = True
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    errors: dict[str, int] = field(default_factory=dict)
+    statuses: dict[int, int] = field(default_factory=dict)
+
+    async def measure(self, op: str, call: Awaitable[httpx.Response]) -> httpx.Response | None:
+        """リクエストを実行して計測（通信エラーは None を返しエラーとして数える）"""
+        started = time.perf_counter()
+        try:
+            response = await call
+        except httpx.HTTPError:
+            if self.recording:
+                self.errors[op] = self.errors.get(op, 0) + 1
+            return None
+        elapsed = time.perf_counter() - started
+        if self.recording:
+            self.latencies.setdefault(op, []).append(elapsed)
+            self.statuses[response.status_code] = self.statuses.get(response.status_code, 0) + 1
+            if response.status_code >= 400:
+                self.errors[op] = self.errors.get(op, 0) + 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        """シナリオ全体と操作別の集計結果"""
+        all_latencies = [v for values in self.latencies.values() for v in values]
+        total = len(all_latencies) + sum(
+            count for op, count in self.errors.items() if op not in self.latencies
+        )
+        return {
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "duration_seconds": round(elapsed, 3),
+            "rps": round(len(all_latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency_ms": summarize(all_latencies),
+            "status_codes": {str(code): count for code, count in sorted(self.statuses.items())},
+            "operations": {
+                op: {
+                    "requests": len(values),
+                    "errors": self.errors.get(op, 0),
+                    "latency_ms": summarize(values),
+                }
+                for op, values in sorted(self.latencies.items())
+            },
+        }
+
+
+# ==========================================
+# シナリオ
+# ==========================================
+@dataclass
+class ScenarioState:
+    """シナリオ実行中に共有するデータ"""
+    run_id: str
+    seed_items: int
+    item_ids: list[int] = field(default_factory=list)
+    usernames: list[str] = field(default_factory=list)
+    counter: int = 0
+
+
+async def _seed_items(target: Target, state: ScenarioState) -> None:
+    """一覧・詳細用のアイテムを一括作成（計測対象外）"""
+    remaining = state.seed_items
+    while remaining > 0:
+        batch = min(remaining, 500)
+        response = await target.create_items_bulk([
+            {"title": f"bench-{state.run_id}-{i}", "description": "benchmark item", "price": float(i % 1000 + 1)}
+            for i in range(batch)
+        ])
+        response.raise_for_status()
+        state.item_ids.extend(target.created_ids(response))
+        remaining -= batch
+
+
+class Scenario:
+    """シナリオの基底クラス"""
+
+    name = ""
+    description = ""
+
+    async def prepare(self, target: Target, state: ScenarioState) -> None:
+        pass
+
+    async def step(self, target: Target, state: ScenarioState, rec: Recorder, rng: random.Random) -> None:
+        raise NotImplementedError
+
+
+class LoginStorm(Scenario):
+    """多数のユーザーが同時にログインする（bcrypt 検証とトークン発行の負荷）"""
+
+    name = "login_storm"
+    description = "POST token with pre-registered users"
+    user_count = 20
+
+    async def prepare(self, target, state):
+        for i in range(self.user_count):
+            username = f"storm_{state.run_id}_{i}"
+            await target.register(username)
+            state.usernames.append(username)
+
+    async def step(self, target, state, rec, rng):
+        await rec.measure("login", target.login(rng.choice(state.usernames)))
+
+
+class ItemListPaging(Scenario):
+    """カーソルで一覧を最後までたどり、終端に達したら先頭に戻る"""
+
+    name = "item_list_paging"
+    description = "GET items page by page with keyset cursors"
+    page_size = 20
+
+    async def prepare(self, target, state):
+        await _seed_items(target, state)
+
+    async def step(self, target, state, rec, rng):
+        cursor = ""
+        while True:
+            response = await rec.measure("list_page", target.list_items(cursor, self.page_size))
+            if response is None or response.status_code != 200:
+                return
+            cursor = target.next_cursor(response)
+            if not cursor:
+                return
+
+
+class ItemCreateBurst(Scenario):
+    """アイテム作成を連続で送る（書き込み・キャッシュ無効化の負荷）"""
+
+    name = "item_create_burst"
+    description = "POST items one by one"
+
+    async def step(self, target, state, rec, rng):
+        state.counter += 1
+        await rec.measure(
+            "create_item",
+            target.create_item(f"burst-{state.run_id}-{state.counter}", round(rng.uniform(1, 1000), 2)),
+        )
+
+
+class Mixed(Scenario):
+    """読み取り80% / 書き込み20% の混在負荷"""
+
+    name = "mixed"
+    description = "80% reads (list first page / item detail), 20% item creation"
+    read_ratio = 0.8
+
+    async def prepare(self, target, state):
+        await _seed_items(target, state)
+
+    async def step(self, target, state, rec, rng):
+        roll = rng.random()
+        if roll < self.read_ratio / 2:
+            await rec.measure("list_page", target.list_items("", 20))
+        elif roll < self.read_ratio:
+            await rec.measure("get_item", target.get_item(rng.choice(state.item_ids)))
+        else:
+            state.counter += 1
+            response = await rec.measure(
+                "create_item",
+                target.create_item(f"mixed-{state.run_id}-{state.counter}", round(rng.uniform(1, 1000), 2)),
+            )
+            if response is not None and response.status_code in (200, 201):
+                state.item_ids.append(target.created_id(response))
+
+
+SCENARIOS: dict[str, Callable[[], Scenario]] = {
+    cls.name: cls for cls in (LoginStorm, ItemListPaging, ItemCreateBurst, Mixed)
+}
@@ -0,0 +1,295 @@
+"""
+ベンチマーク対象（FastAPI / Flask）のアダプター
+
+どちらのアプリも同じ操作（登録・ログイン・一覧・作成・詳細）で扱えるよう、
+エンドポイントの違い（パス、フォーム/JSON、カーソルの返し方）をここで吸収する。
+
+- inprocess: アプリをこのプロセスにインポートして直接呼び出す（ネットワークなし）
+- http: 起動済みのサーバーに HTTP でリクエストする
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import httpx
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent
+
+BENCH_PASSWORD = "benchpassword123"
+
+
+class Target:
+    """ベンチマーク対象の共通インターフェース"""
+
+    name = ""
+    # プロセス内実行で PostgreSQL が必要（--target all で SQLite の場合は飛ばす）
+    postgresql_only = False
+
+    def __init__(self, mode: str, base_url: str | None = None):
+        self.mode = mode
+        self.base_url = base_url
+        self.token: str | None = None
+        self.user_id: int | None = None
+
+    async def setup(self, database_url: str, reset: bool) -> None:
+        """クライアントを準備（inprocess ではスキーマも作成）"""
+        raise NotImplementedError
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        raise NotImplementedError
+
+    def auth_headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    # ------------------------------------------
+    # アプリごとに異なる操作
+    # ------------------------------------------
+    async def register(self, username: str) -> httpx.Response:
+        raise NotImplementedError
+
+    async def login(self, username: str, password: str = BENCH_PASSWORD) -> httpx.Response:
+        raise NotImplementedError
+
+    async def list_items(self, cursor: str = "", limit: int = 20) -> httpx.Response:
+        """カーソルを指定して1ページ取得（空文字で1ページ目）"""
+        raise NotImplementedError
+
+    def next_cursor(self, response: httpx.Response) -> str | None:
+        """一覧レスポンスから次ページのカーソルを取り出す"""
+        raise NotImplementedError
+
+    async def create_item(self, title: str, price: float) -> httpx.Response:
+        raise NotImplementedError
+
+    def created_id(self, response: httpx.Response) -> int:
+        """作成レスポンスからアイテムのIDを取り出す"""
+        raise NotImplementedError
+
+    async def create_items_bulk(self, items: list[dict]) -> httpx.Response:
+        raise NotImplementedError
+
+    def created_ids(self, response: httpx.Response) -> list[int]:
+        """一括作成レスポンスから作成されたアイテムのIDを取り出す"""
+        raise NotImplementedError
+
+    async def get_item(self, item_id: int) -> httpx.Response:
+        raise NotImplementedError
+
+    async def ensure_user(self, username: str) -> None:
+        """ベンチマーク用ユーザーを用意してトークンを取得"""
+        await self.register(username)
+        response = await self.login(username)
+        response.raise_for_status()
+        self.token = response.json()["access_token"]
+        self.user_id = await self._current_user_id()
+
+    async def _current_user_id(self) -> int:
+        raise NotImplementedError
+
+
+def _prepare_import(example: str, database_url: str) -> None:
+    """サンプルのディレクトリを import パスに追加し、接続先を環境変数で指定"""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("DB_ECHO", "false")
+    # login_storm などは同じクライアントから大量にログインするため、レート制限を外して計測する
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    sys.path.insert(0, str(EXAMPLES_DIR / example))
+
+
+class FastAPITarget(Target):
+    """FastAPI サンプル（examples/python-fastapi）"""
+
+    name = "fastapi"
+
+    async def setup(self, database_url: str, reset: bool) -> None:
+        if self.mode == "http":
+            self.client = httpx.AsyncClient(base_url=self.base_url, timeout=60)
+            return
+
+        # 同じ --database-url を両アプリで使えるよう、非同期ドライバを補う
+        if database_url.startswith("sqlite:"):
+            database_url = database_url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+        elif database_url.startswith("postgresql:"):
+            database_url = database_url.replace("postgresql:", "postgresql+asyncpg:", 1)
+        _prepare_import("python-fastapi", database_url)
+        import database  # noqa: E402
+        import main  # noqa: E402
+
+        async with database.engine.begin() as conn:
+            if reset:
+                await conn.run_sync(database.Base.metadata.drop_all)
+            await conn.run_sync(database.Base.metadata.create_all)
+
+        self._engine = database.engine
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app), base_url="http://bench", timeout=60
+        )
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        return await self.client.request(method, path, **kwargs)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+        if self.mode == "inprocess":
+            await self._engine.dispose()
+
+    async def register(self, username: str) -> httpx.Response:
+        return await self.request("POST", "/users", json={
+            "username": username,
+            "email": f"{username}@bench.example.com",
+            "password": BENCH_PASSWORD,
+        })
+
+    async def login(self, username: str, password: str = BENCH_PASSWORD) -> httpx.Response:
+        return await self.request("POST", "/token", data={"username": username, "password": password})
+
+    async def list_items(self, cursor: str = "", limit: int = 20) -> httpx.Response:
+        return await self.request(
+            "GET", "/items", params={"cursor": cursor, "limit": limit}, headers=self.auth_headers()
+        )
+
+    def next_cursor(self, response: httpx.Response) -> str | None:
+        return response.headers.get("X-Next-Cursor")
+
+    async def create_item(self, title: str, price: float) -> httpx.Response:
+        return await self.request(
+            "POST", "/items", json={"title": title, "price": price}, headers=self.auth_headers()
+        )
+
+    def created_id(self, response: httpx.Response) -> int:
+        return response.json()["id"]
+
+    async def create_items_bulk(self, items: list[dict]) -> httpx.Response:
+        return await self.request(
+            "POST", "/items/bulk", json={"items": items}, headers=self.auth_headers()
+        )
+
+    def created_ids(self, response: httpx.Response) -> list[int]:
+        return [item["id"] for item in response.json()["created"]]
+
+    async def get_item(self, item_id: int) -> httpx.Response:
+        return await self.request("GET", f"/items/{item_id}", headers=self.auth_headers())
+
+    async def _current_user_id(self) -> int:
+        response = await self.request("GET", "/users/me", headers=self.auth_headers())
+        return response.json()["id"]
+
+
+class FlaskTarget(Target):
+    """Flask サンプル（examples/python-flask）"""
+
+    name = "flask"
+
+    async def setup(self, database_url: str, reset: bool) -> None:
+        if self.mode == "http":
+            self.client = httpx.AsyncClient(base_url=self.base_url, timeout=60)
+            return
+
+        _prepare_import("python-flask", database_url)
+        from app import app, db  # noqa: E402
+
+        with app.app_context():
+            if reset:
+                db.drop_all()
+            db.create_all()
+
+        # WSGI アプリは同期呼び出しのため、スレッドで並行実行する
+        self._sync_client = httpx.Client(
+            transport=httpx.WSGITransport(app=app), base_url="http://bench", timeout=60
+        )
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        if self.mode == "http":
+            return await self.client.request(method, path, **kwargs)
+        return await asyncio.to_thread(self._sync_client.request, method, path, **kwargs)
+
+    async def close(self) -> None:
+        if self.mode == "http":
+            await self.client.aclose()
+        else:
+            self._sync_client.close()
+
+    async def register(self, username: str) -> httpx.Response:
+        return await self.request("POST", "/auth/register", json={
+            "username": username,
+            "email": f"{username}@bench.example.com",
+            "password": BENCH_PASSWORD,
+        })
+
+    async def login(self, username: str, password: str = BENCH_PASSWORD) -> httpx.Response:
+        return await self.request("POST", "/auth/token", json={"username": username, "password": password})
+
+    async def list_items(self, cursor: str = "", limit: int = 20) -> httpx.Response:
+        return await self.request(
+            "GET", "/api/items", params={"cursor": cursor, "per_page": limit}, headers=self.auth_headers()
+        )
+
+    def next_cursor(self, response: httpx.Response) -> str | None:
+        return response.json().get("next_cursor")
+
+    async def create_item(self, title: str, price: float) -> httpx.Response:
+        return await self.request(
+            "POST", "/api/items",
+            json={"title": title, "price": price, "owner_id": self.user_id},
+            headers=self.auth_headers(),
+        )
+
+    def created_id(self, response: httpx.Response) -> int:
+        return response.json()["item"]["id"]
+
+    async def create_items_bulk(self, items: list[dict]) -> httpx.Response:
+        return await self.request(
+            "POST", "/api/items/bulk",
+            json={"items": [{**item, "owner_id": self.user_id} for item in items]},
+            headers=self.auth_headers(),
+        )
+
+    def created_ids(self, response: httpx.Response) -> list[int]:
+        return [item["id"] for item in response.json()["items"]]
+
+    async def get_item(self, item_id: int) -> httpx.Response:
+        return await self.request("GET", f"/api/items/{item_id}", headers=self.auth_headers())
+
+    async def _current_user_id(self) -> int:
+        response = await self.request("GET", "/auth/me", headers=self.auth_headers())
+        return response.json()["id"]
+
+
+class FlaskAsyncTarget(FlaskTarget):
+    """Flask サンプルの async ビュー（/async/api/*、asyncpg）。書き込みは同期版のエンドポイントを使う"""
+
+    name = "flask-async"
+    postgresql_only = True
+
+    async def setup(self, database_url: str, reset: bool) -> None:
+        await super().setup(database_url, reset)
+        if self.mode == "inprocess":
+            from app import async_db  # noqa: E402
+
+            if async_db is None:
+                raise RuntimeError("flask-async requires asyncpg, asgiref and a postgresql:// database")
+            self._async_db = async_db
+
+    async def close(self) -> None:
+        await super().close()
+        if self.mode == "inprocess":
+            self._async_db.close()
+
+    async def list_items(self, cursor: str = "", limit: int = 20) -> httpx.Response:
+        return await self.request(
+            "GET", "/async/api/items", params={"cursor": cursor, "per_page": limit}, headers=self.auth_headers()
+        )
+
+    async def get_item(self, item_id: int) -> httpx.Response:
+        return await self.request("GET", f"/async/api/items/{item_id}", headers=self.auth_headers())
+
+
+TARGETS = {
+    FastAPITarget.name: FastAPITarget,
+    FlaskTarget.name: FlaskTarget,
+    FlaskAsyncTarget.name: FlaskAsyncTarget,
+}
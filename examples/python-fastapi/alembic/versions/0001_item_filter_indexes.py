@@ -0,0 +1,31 @@
+"""一覧の絞り込み・並べ替え用の複合インデックスを追加
+
+- ix_items_owner_id_created_at: owner_id で絞り込み、作成日時順に並べる
+- ix_items_price_id: 価格範囲で絞り込み、価格順に並べる（キーセットの id まで含める）
+
+init_db.py（create_all）で作成したデータベースには既に存在するため if_not_exists を付ける
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_items_owner_id_created_at", "items", ["owner_id", "created_at", "id"], if_not_exists=True
+    )
+    op.create_index("ix_items_price_id", "items", ["price", "id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_items_price_id", table_name="items", if_exists=True)
+    op.drop_index("ix_items_owner_id_created_at", table_name="items", if_exists=True)
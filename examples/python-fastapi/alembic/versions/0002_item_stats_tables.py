@@ -0,0 +1,55 @@
+"""アイテム集計テーブル（item_owner_stats / item_daily_stats）を追加
+
+既存の items から GROUP BY で初期値を投入する。以降はアイテムの作成・更新・削除時に
+crud.apply_item_stats が差分で更新する
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "item_owner_stats",
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("item_count", sa.Integer(), nullable=False),
+        sa.Column("price_total", sa.Float(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "item_daily_stats",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("item_count", sa.Integer(), nullable=False),
+        sa.Column("price_total", sa.Float(), nullable=False),
+        if_not_exists=True,
+    )
+
+    if op.get_bind().dialect.name == "sqlite":
+        day = "date(created_at)"
+    else:
+        day = "date_trunc('day', created_at)::date"
+    op.execute("DELETE FROM item_owner_stats")
+    op.execute("DELETE FROM item_daily_stats")
+    op.execute(
+        "INSERT INTO item_owner_stats (owner_id, item_count, price_total) "
+        "SELECT owner_id, count(*), sum(price) FROM items GROUP BY owner_id"
+    )
+    op.execute(
+        "INSERT INTO item_daily_stats (day, item_count, price_total) "
+        f"SELECT {day}, count(*), sum(price) FROM items GROUP BY 1"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("item_daily_stats")
+    op.drop_table("item_owner_stats")
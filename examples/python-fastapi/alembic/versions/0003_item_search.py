@@ -0,0 +1,76 @@
+"""アイテム検索（/items/search）とキーセットページネーション用の列・インデックスを追加
+
+create_all 時に search.install_search_ddl / models.Item.__table_args__ で作るものを既存のデータベースにも追加する。
+
+- PostgreSQL: pg_trgm 拡張、生成列 search_vector（tsvector）とその GIN インデックス、
+  lower(title) の pg_trgm インデックス
+- SQLite: FTS5 の外部コンテンツテーブル items_fts と同期用トリガー（既存の行は rebuild で取り込む）
+- ix_items_created_at_id: (created_at, id) 順の一覧をカバーするインデックス
+
+init_db.py（create_all）で作成したデータベースには既に存在するため IF NOT EXISTS を付ける
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_POSTGRES_UPGRADE = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE items ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_items_search_vector ON items USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_items_title_trgm ON items USING gin (lower(title) gin_trgm_ops)",
+)
+
+_SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5("
+    "title, description, content='items', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN "
+    "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    # 外部コンテンツテーブルの索引を items から作り直す
+    "INSERT INTO items_fts(items_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in _SQLITE_UPGRADE:
+            op.execute(statement)
+    else:
+        for statement in _POSTGRES_UPGRADE:
+            op.execute(statement)
+
+    op.create_index(
+        "ix_items_created_at_id",
+        "items",
+        ["created_at", "id"],
+        postgresql_include=["title", "description", "price", "owner_id"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_items_created_at_id", table_name="items", if_exists=True)
+    if op.get_bind().dialect.name == "sqlite":
+        for trigger in ("items_fts_au", "items_fts_ad", "items_fts_ai"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS items_fts")
+    else:
+        op.execute("DROP INDEX IF EXISTS ix_items_title_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_items_search_vector")
+        op.execute("ALTER TABLE items DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,54 @@
+"""item_daily_stats を (day, shard) 単位の行に分ける
+
+当日の1行に全ユーザーの書き込みが集中して行ロックで直列化されるため、
+crud.apply_item_stats は書き込みごとにランダムな shard の行へ加算し、参照時に day ごとに合計する。
+集計テーブルは items から作り直せるので、作り直して既存の集計を shard 0 に入れる
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _day_expression() -> str:
+    if op.get_bind().dialect.name == "sqlite":
+        return "date(created_at)"
+    return "date_trunc('day', created_at)::date"
+
+
+def upgrade() -> None:
+    op.drop_table("item_daily_stats", if_exists=True)
+    op.create_table(
+        "item_daily_stats",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("shard", sa.SmallInteger(), primary_key=True),
+        sa.Column("item_count", sa.Integer(), nullable=False),
+        sa.Column("price_total", sa.Float(), nullable=False),
+    )
+    op.execute(
+        "INSERT INTO item_daily_stats (day, shard, item_count, price_total) "
+        f"SELECT {_day_expression()}, 0, count(*), sum(price) FROM items GROUP BY 1"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("item_daily_stats")
+    op.create_table(
+        "item_daily_stats",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("item_count", sa.Integer(), nullable=False),
+        sa.Column("price_total", sa.Float(), nullable=False),
+    )
+    op.execute(
+        "INSERT INTO item_daily_stats (day, item_count, price_total) "
+        f"SELECT {_day_expression()}, count(*), sum(price) FROM items GROUP BY 1"
+    )
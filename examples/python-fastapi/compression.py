@@ -0,0 +1,260 @@
+"""
+レスポンス圧縮（gzip / brotli）
+
+- Accept-Encoding に応じて br（brotli パッケージがある場合）、gzip の順で選ぶ
+- 本文が COMPRESSION_MIN_SIZE バイト未満のもの、許可リストにない Content-Type、
+  すでに Content-Encoding が付いたもの、ステータス 204/304 はそのまま返す
+- ストリーミングレスポンス（エクスポート等）はチャンクごとに圧縮してフラッシュするため、
+  全体をメモリに溜めずに逐次送信できる
+- 圧縮前後のバイト数と圧縮に使ったCPU時間を MetricsRegistry に記録する（/metrics で確認）
+"""
+import os
+import time
+import zlib
+from typing import Any
+
+from metrics import MetricsRegistry
+
+try:
+    import brotli
+except ImportError:  # brotli は任意の依存関係（無い場合は gzip のみ）
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))  # 11 は動的圧縮には重すぎる
+COMPRESSION_CONTENT_TYPES = tuple(
+    content_type.strip()
+    for content_type in os.getenv(
+        "COMPRESSION_CONTENT_TYPES",
+        "application/json,application/x-ndjson,text/csv,text/plain,text/html",
+    ).split(",")
+    if content_type.strip()
+)
+
+_UNCOMPRESSED_STATUSES = (204, 304)
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31 で gzip ヘッダー付きの deflate
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """data を圧縮し、ここまでの出力をフラッシュして返す（ストリーミング用）"""
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+def available_encodings() -> tuple[str, ...]:
+    """サーバー側で使える Content-Encoding（優先順）"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str, available: tuple[str, ...]) -> str | None:
+    """
+    Accept-Encoding から使う圧縮方式を選ぶ（q の大きいもの、同点は available の順）
+
+    q=0 の方式と、"*" で許可されていても明示的に q=0 とされた方式は選ばない
+    """
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    wildcard = weights.get("*", 0.0)
+    candidates = [
+        (weights.get(encoding, wildcard), -index, encoding)
+        for index, encoding in enumerate(available)
+    ]
+    q, _, encoding = max(candidates)
+    return encoding if q > 0 else None
+
+
+def _content_type_allowed(content_type: str, allowed: tuple[str, ...]) -> bool:
+    return content_type.split(";", 1)[0].strip().lower() in allowed
+
+
+class CompressionMiddleware:
+    """
+    レスポンス本文を gzip / brotli で圧縮する ASGI ミドルウェア
+
+    本文が1メッセージで完結する場合は COMPRESSION_MIN_SIZE 未満なら圧縮しない。
+    複数メッセージに分かれるストリーミングは、Content-Length が閾値未満と分かる場合を除き圧縮する
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        registry: MetricsRegistry | None = None,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+        content_types: tuple[str, ...] = COMPRESSION_CONTENT_TYPES,
+        encodings: tuple[str, ...] | None = None,
+    ):
+        self.app = app
+        self.registry = registry
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.content_types = tuple(content_type.lower() for content_type in content_types)
+        self.encodings = encodings or available_encodings()
+
+    def _compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding, self.encodings) if accept_encoding else None
+
+        start_message = None
+        compressor = None
+        original_size = 0
+        compressed_size = 0
+        cpu_seconds = 0.0
+
+        def run(step, data: bytes) -> bytes:
+            nonlocal original_size, compressed_size, cpu_seconds
+            started = time.thread_time()
+            output = step(data)
+            cpu_seconds += time.thread_time() - started
+            original_size += len(data)
+            compressed_size += len(output)
+            return output
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor
+
+            if message["type"] == "http.response.start":
+                # 本文の最初のメッセージを見るまで圧縮するか決められないため保留する
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            if start_message is not None:
+                start, start_message = start_message, None
+                body = message.get("body", b"")
+                more_body = message.get("more_body", False)
+                headers = _Headers(start.get("headers", []))
+                eligible = (
+                    start["status"] not in _UNCOMPRESSED_STATUSES
+                    and "content-encoding" not in headers
+                    and _content_type_allowed(headers.get("content-type", ""), self.content_types)
+                    and (len(body) if not more_body else headers.content_length(self.minimum_size))
+                    >= self.minimum_size
+                )
+                if not eligible:
+                    await send(start)
+                    await send(message)
+                    return
+
+                headers.add_vary("Accept-Encoding")
+                if encoding is None:
+                    await send({**start, "headers": headers.raw})
+                    await send(message)
+                    return
+
+                compressor = self._compressor(encoding)
+                headers.set("content-encoding", encoding)
+                if more_body:
+                    headers.remove("content-length")
+                    message = {**message, "body": run(compressor.compress, body)}
+                else:
+                    message = {**message, "body": run(compressor.finish, body)}
+                    headers.set("content-length", str(len(message["body"])))
+                await send({**start, "headers": headers.raw})
+                await send(message)
+                if not more_body:
+                    self._observe(encoding, original_size, compressed_size, cpu_seconds)
+                return
+
+            if compressor is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                await send({**message, "body": run(compressor.compress, body)})
+            else:
+                await send({**message, "body": run(compressor.finish, body)})
+                self._observe(encoding, original_size, compressed_size, cpu_seconds)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _observe(self, encoding: str, original: int, compressed: int, cpu_seconds: float) -> None:
+        if self.registry is not None:
+            self.registry.observe_compression(encoding, original, compressed, cpu_seconds)
+
+
+class _Headers:
+    """ASGI の生ヘッダー（[(name, value), ...]）を書き換えるための小さなラッパー"""
+
+    def __init__(self, raw):
+        self.raw = list(raw)
+
+    def __contains__(self, name: str) -> bool:
+        key = name.encode("latin-1")
+        return any(header == key for header, _ in self.raw)
+
+    def get(self, name: str, default: str = "") -> str:
+        key = name.encode("latin-1")
+        for header, value in self.raw:
+            if header == key:
+                return value.decode("latin-1")
+        return default
+
+    def content_length(self, default: int) -> int:
+        """Content-Length（無い・不正な場合は default）"""
+        try:
+            return int(self.get("content-length"))
+        except ValueError:
+            return default
+
+    def remove(self, name: str) -> None:
+        key = name.encode("latin-1")
+        self.raw = [(header, value) for header, value in self.raw if header != key]
+
+    def set(self, name: str, value: str) -> None:
+        self.remove(name)
+        self.raw.append((name.encode("latin-1"), value.encode("latin-1")))
+
+    def add_vary(self, token: str) -> None:
+        current = self.get("vary")
+        if token.lower() not in (part.strip().lower() for part in current.split(",")):
+            self.set("vary", f"{current}, {token}" if current else token)
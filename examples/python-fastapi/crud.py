@@ -1,10 +1,19 @@
 """
 データベースCRUD操作（Create, Read, Update, Delete）
 """
-from sqlalchemy import select
+import os
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, insert, literal, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import models
+from response_cache import invalidate_items
+from search import build_search_query
 
 
 # ==========================================
@@ -35,57 +44,236 @@ async def get_user_by_id(db: AsyncSession, user_id: int):
     return result.scalar_one_or_none()
 
 
+async def get_user_identities(db: AsyncSession, after_id: int = 0, ids: list[int] | None = None):
+    """
+    ID が after_id より大きいユーザーと、ids に含まれるユーザーの (id, username, email) を ID 順に取得
+
+    存在フィルター用。ids にはコミット順の前後で前回は見えなかった ID を渡す
+    """
+    condition = models.User.id > after_id
+    if ids:
+        condition = condition | models.User.id.in_(ids)
+    result = await db.execute(
+        select(models.User.id, models.User.username, models.User.email)
+        .where(condition)
+        .order_by(models.User.id)
+    )
+    return result.all()
+
+
 async def create_user(db: AsyncSession, username: str, email: str, hashed_password: str):
-    """新規ユーザーを作成"""
-    db_user = models.User(
-        username=username,
-        email=email,
-        hashed_password=hashed_password,
-        is_active=True,
+    """
+    新規ユーザーを作成
+
+    INSERT ... ON CONFLICT DO NOTHING RETURNING の1往復で作成する（事前の重複チェックは行わない）。
+    ユーザー名・メールアドレスが登録済みなら None を返す（どちらかは get_conflicting_user_field で調べる）
+    """
+    stmt = (
+        _upsert(db, models.User)
+        .values(username=username, email=email, hashed_password=hashed_password, is_active=True)
+        .on_conflict_do_nothing()
+        .returning(models.User)
     )
-    db.add(db_user)
+    db_user = (await db.scalars(stmt)).one_or_none()
     await db.commit()
-    await db.refresh(db_user)
     return db_user
 
 
+async def get_conflicting_user_field(db: AsyncSession, username: str, email: str) -> str | None:
+    """username / email のうち登録済みの列名（"username" または "email"）。どちらも未使用なら None"""
+    result = await db.execute(
+        select(models.User.username == username)
+        .where((models.User.username == username) | (models.User.email == email))
+        .order_by((models.User.username == username).desc())
+        .limit(1)
+    )
+    username_taken = result.scalar_one_or_none()
+    if username_taken is None:
+        return None
+    return "username" if username_taken else "email"
+
+
+# 一覧レスポンスに必要なユーザーの列（hashed_password は含めない）
+USER_LIST_COLUMNS = (
+    models.User.id,
+    models.User.username,
+    models.User.email,
+    models.User.is_active,
+    models.User.created_at,
+)
+
+
 async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100):
-    """ユーザー一覧を取得"""
+    """ユーザー一覧を取得（必要な列だけを Row で返す）"""
     result = await db.execute(
-        select(models.User).offset(skip).limit(limit)
+        select(*USER_LIST_COLUMNS).order_by(models.User.id).offset(skip).limit(limit)
     )
-    return result.scalars().all()
+    return result.all()
 
 
 # ==========================================
 # アイテム関連CRUD
 # ==========================================
 
-async def get_items(db: AsyncSession, skip: int = 0, limit: int = 100):
-    """アイテム一覧を取得"""
-    result = await db.execute(
-        select(models.Item).offset(skip).limit(limit)
+# 一覧レスポンスに必要な列（ix_items_created_at_id でカバーされる列）
+ITEM_LIST_COLUMNS = (
+    models.Item.id,
+    models.Item.title,
+    models.Item.description,
+    models.Item.price,
+    models.Item.owner_id,
+    models.Item.created_at,
+)
+
+
+# 一覧の並び順: キー -> (並べる列, 降順か)。同値は id で並べ、キーセットの比較に使う
+# created_at は ix_items_created_at_id / ix_items_owner_id_created_at、price は ix_items_price_id で
+# 並べ替えなしに辿れる（降順はインデックスの逆順スキャン）
+ITEM_SORT_KEYS = {
+    "created_at": (models.Item.created_at, False),
+    "-created_at": (models.Item.created_at, True),
+    "price": (models.Item.price, False),
+    "-price": (models.Item.price, True),
+}
+
+
+@dataclass(frozen=True)
+class ItemFilters:
+    """
+    アイテム一覧の絞り込み条件（None の項目は条件なし）
+
+    条件は列と定数の単純な比較だけにし、列を関数で包まない（インデックスの範囲検索で評価できる形）
+    """
+    owner_id: int | None = None
+    min_price: float | None = None
+    max_price: float | None = None
+    created_from: datetime | None = None  # この日時以降（含む）
+    created_to: datetime | None = None  # この日時より前（含まない）
+
+    def predicates(self) -> list:
+        """WHERE 句に渡す条件のリスト"""
+        item = models.Item
+        conditions = []
+        if self.owner_id is not None:
+            conditions.append(item.owner_id == self.owner_id)
+        if self.min_price is not None:
+            conditions.append(item.price >= self.min_price)
+        if self.max_price is not None:
+            conditions.append(item.price <= self.max_price)
+        if self.created_from is not None:
+            conditions.append(item.created_at >= self.created_from)
+        if self.created_to is not None:
+            conditions.append(item.created_at < self.created_to)
+        return conditions
+
+
+def build_items_query(
+    filters: ItemFilters = ItemFilters(),
+    sort: str = "created_at",
+    after: tuple | None = None,
+):
+    """
+    絞り込み・並び順・キーセット条件を適用したアイテム一覧の SELECT を組み立てる
+
+    after は直前のページ最後の行の (並べる列の値, id)
+    """
+    column, descending = ITEM_SORT_KEYS[sort]
+    query = select(*ITEM_LIST_COLUMNS).where(*filters.predicates())
+    if after is not None:
+        key = tuple_(column, models.Item.id)
+        query = query.where(key < after if descending else key > after)
+    if descending:
+        return query.order_by(column.desc(), models.Item.id.desc())
+    return query.order_by(column, models.Item.id)
+
+
+async def get_items(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    filters: ItemFilters = ItemFilters(),
+    sort: str = "created_at",
+):
+    """アイテム一覧を取得（OFFSET方式、深いページほど遅くなるため互換用）"""
+    result = await db.execute(build_items_query(filters, sort).offset(skip).limit(limit))
+    return result.all()
+
+
+async def get_items_keyset(
+    db: AsyncSession,
+    limit: int = 100,
+    after: tuple | None = None,
+    filters: ItemFilters = ItemFilters(),
+    sort: str = "created_at",
+):
+    """
+    アイテム一覧を (並べる列, id) のキーセットで取得
+
+    並び順に対応するインデックスを順に辿るだけなので、
+    何ページ目でも先頭ページと同じコストで取得できる。
+    戻り値は (アイテム行のリスト, 次ページの有無)
+    """
+    query = build_items_query(filters, sort, after).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    return rows[:limit], len(rows) > limit
+
+
+async def search_items(
+    db: AsyncSession,
+    q: str,
+    limit: int = 20,
+    after: tuple[float, int] | None = None,
+):
+    """
+    アイテムを title / description で全文検索（前方一致）
+
+    接続先に応じて PostgreSQL の tsvector + pg_trgm、または SQLite の FTS5 を使う。
+    戻り値は (ITEM_LIST_COLUMNS + rank の行のリスト, 次ページの有無)
+    """
+    query = build_search_query(
+        db.bind.dialect.name, models.Item.__table__, ITEM_LIST_COLUMNS, q, limit + 1, after
     )
-    return result.scalars().all()
+    rows = (await db.execute(query)).all()
+    return rows[:limit], len(rows) > limit
+
+
+async def get_item_by_id(db: AsyncSession, item_id: int, for_update: bool = False):
+    """
+    IDでアイテムを取得
+
+    for_update=True では行ロック（SELECT ... FOR UPDATE）を取り、
+    コミットまで他のトランザクションから更新されないようにする（If-Match の確認用）
+    """
+    query = select(models.Item).where(models.Item.id == item_id)
+    if for_update:
+        query = query.with_for_update()
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
 
+async def get_item_row(db: AsyncSession, item_id: int):
+    """
+    IDでアイテムの表示用の列と updated_at（ETag用）だけを取得
 
-async def get_item_by_id(db: AsyncSession, item_id: int):
-    """IDでアイテムを取得"""
+    ORMオブジェクトを作らないため、アイデンティティマップへの登録や属性の計装が発生しない。
+    読み取り専用のレスポンスにはこちらを使い、更新・削除には get_item_by_id を使う。
+    """
     result = await db.execute(
-        select(models.Item).where(models.Item.id == item_id)
+        select(*ITEM_LIST_COLUMNS, models.Item.updated_at).where(models.Item.id == item_id)
     )
-    return result.scalar_one_or_none()
+    return result.one_or_none()
 
 
 async def get_items_by_owner(db: AsyncSession, owner_id: int, skip: int = 0, limit: int = 100):
-    """特定ユーザーのアイテムを取得"""
+    """特定ユーザーのアイテムを取得（必要な列だけを Row で返す）"""
     result = await db.execute(
-        select(models.Item)
+        select(*ITEM_LIST_COLUMNS)
         .where(models.Item.owner_id == owner_id)
+        .order_by(models.Item.created_at, models.Item.id)
         .offset(skip)
         .limit(limit)
     )
-    return result.scalars().all()
+    return result.all()
 
 
 async def create_item(db: AsyncSession, title: str, description: str | None, price: float, owner_id: int):
@@ -95,13 +283,49 @@ async def create_item(db: AsyncSession, title: str, description: str | None, pri
         description=description,
         price=price,
         owner_id=owner_id,
+        created_at=datetime.utcnow(),
     )
     db.add(db_item)
+    await apply_item_stats(db, [(owner_id, db_item.created_at.date(), 1, price)])
     await db.commit()
     await db.refresh(db_item)
+    await invalidate_items()
     return db_item
 
 
+async def create_items_bulk(
+    db: AsyncSession,
+    items: list[dict],
+    owner_id: int,
+    batch_size: int = 500,
+):
+    """
+    アイテムを一括作成
+
+    batch_size 行ごとに1本の複数行 INSERT ... RETURNING を発行し、最後に1回だけコミットする。
+    （1件ずつの INSERT + COMMIT + REFRESH と比べてラウンドトリップが大幅に減る）
+    """
+    now = datetime.utcnow()
+    rows = [
+        {**item, "owner_id": owner_id, "created_at": now, "updated_at": now}
+        for item in items
+    ]
+
+    created = []
+    for start in range(0, len(rows), batch_size):
+        result = await db.execute(
+            insert(models.Item)
+            .values(rows[start:start + batch_size])
+            .returning(*ITEM_LIST_COLUMNS)
+        )
+        created.extend(result.all())
+
+    await apply_item_stats(db, [(owner_id, now.date(), len(created), sum(row.price for row in created))])
+    await db.commit()
+    await invalidate_items()
+    return created
+
+
 async def update_item(db: AsyncSession, item_id: int, title: str | None = None, description: str | None = None, price: float | None = None):
     """アイテムを更新"""
     db_item = await get_item_by_id(db, item_id)
@@ -112,11 +336,15 @@ async def update_item(db: AsyncSession, item_id: int, title: str | None = None,
         db_item.title = title
     if description is not None:
         db_item.description = description
-    if price is not None:
+    if price is not None and price != db_item.price:
+        await apply_item_stats(
+            db, [(db_item.owner_id, db_item.created_at.date(), 0, price - db_item.price)]
+        )
         db_item.price = price
 
     await db.commit()
     await db.refresh(db_item)
+    await invalidate_items()
     return db_item
 
 
@@ -126,6 +354,152 @@ async def delete_item(db: AsyncSession, item_id: int):
     if not db_item:
         return None
 
-    db.delete(db_item)
+    await db.delete(db_item)
+    await apply_item_stats(db, [(db_item.owner_id, db_item.created_at.date(), -1, -db_item.price)])
     await db.commit()
+    await invalidate_items()
     return db_item
+
+
+# ==========================================
+# アイテム集計（/items/stats）
+# ==========================================
+# 集計は item_owner_stats / item_daily_stats に差分で反映しておき、
+# 参照時は items を走査せず集計テーブルだけを読む
+
+# 日別集計を1日あたり何行に分けるか（当日の行への同時書き込みが行ロックで直列化されるのを避ける）
+ITEM_STATS_DAILY_SHARDS = int(os.getenv("ITEM_STATS_DAILY_SHARDS", "16"))
+
+
+def _daily_shard() -> int:
+    """日別集計で加算する行（shard）をランダムに選ぶ"""
+    return random.randrange(ITEM_STATS_DAILY_SHARDS)
+
+
+def _upsert(db: AsyncSession, table):
+    """接続先に応じた INSERT ... ON CONFLICT 構文"""
+    if db.bind.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
+async def apply_item_stats(db: AsyncSession, changes: list[tuple[int, date, int, float]]) -> None:
+    """
+    (owner_id, 作成日, 件数の増減, 価格合計の増減) を集計テーブルに加算
+
+    呼び出し元のトランザクション内で実行するため、アイテムの変更と同時にコミットされる。
+    加算は ON CONFLICT DO UPDATE で行うので、同時に更新されても値が失われない。
+    更新した行はコミットまでロックされるが、日別の行は _daily_shard で分散させるため
+    別々の所有者の書き込み同士は待ち合わせにならない（同じ所有者の書き込みは所有者の行で直列化される）
+    """
+    shard = _daily_shard()
+    by_owner: dict[tuple, list] = defaultdict(lambda: [0, 0.0])
+    by_day: dict[tuple, list] = defaultdict(lambda: [0, 0.0])
+    for owner_id, day, count, price_total in changes:
+        for bucket in (by_owner[(owner_id,)], by_day[(day, shard)]):
+            bucket[0] += count
+            bucket[1] += price_total
+
+    for table, keys, totals in (
+        (models.ItemOwnerStats.__table__, ("owner_id",), by_owner),
+        (models.ItemDailyStats.__table__, ("day", "shard"), by_day),
+    ):
+        for values, (count, price_total) in sorted(totals.items()):
+            stmt = _upsert(db, table).values(
+                {**dict(zip(keys, values)), "item_count": count, "price_total": price_total}
+            )
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=list(keys),
+                    set_={
+                        "item_count": table.c.item_count + stmt.excluded.item_count,
+                        "price_total": table.c.price_total + stmt.excluded.price_total,
+                    },
+                )
+            )
+
+
+async def rebuild_item_stats(db: AsyncSession) -> None:
+    """
+    集計テーブルを items から作り直す（ユーザー削除によるカスケード削除の後や、不整合の修復用）
+
+    PostgreSQL では date_trunc で日単位にまとめ、GROUP BY で一度に集計する
+    """
+    item = models.Item
+    if db.bind.dialect.name == "sqlite":
+        day = func.date(item.created_at)
+    else:
+        day = func.date_trunc("day", item.created_at).cast(models.ItemDailyStats.day.type)
+
+    await db.execute(delete(models.ItemOwnerStats))
+    await db.execute(delete(models.ItemDailyStats))
+    await db.execute(
+        insert(models.ItemOwnerStats).from_select(
+            ["owner_id", "item_count", "price_total"],
+            select(item.owner_id, func.count(), func.sum(item.price)).group_by(item.owner_id),
+        )
+    )
+    await db.execute(
+        insert(models.ItemDailyStats).from_select(
+            ["day", "shard", "item_count", "price_total"],
+            select(day, literal(0), func.count(), func.sum(item.price)).group_by(day),
+        )
+    )
+    await db.commit()
+
+
+async def get_item_stats(db: AsyncSession, days: int = 30, owners_limit: int = 100) -> dict:
+    """
+    集計テーブルからアイテムの統計を取得
+
+    - 全体の件数・価格合計・平均価格
+    - 件数の多い順に owners_limit 人分の所有者別の統計
+    - 今日（UTC）を含む直近 days 日分の日別作成件数（作成のない日は含まない）
+    """
+    owner_stats = models.ItemOwnerStats
+    daily_stats = models.ItemDailyStats
+
+    total_count, total_price = (
+        await db.execute(
+            select(
+                func.coalesce(func.sum(owner_stats.item_count), 0),
+                func.coalesce(func.sum(owner_stats.price_total), 0.0),
+            )
+        )
+    ).one()
+    owners = (
+        await db.execute(
+            select(owner_stats.owner_id, owner_stats.item_count, owner_stats.price_total)
+            .where(owner_stats.item_count > 0)
+            .order_by(owner_stats.item_count.desc(), owner_stats.owner_id)
+            .limit(owners_limit)
+        )
+    ).all()
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    item_count = func.sum(daily_stats.item_count)
+    daily = (
+        await db.execute(
+            select(
+                daily_stats.day,
+                item_count.label("item_count"),
+                func.sum(daily_stats.price_total).label("price_total"),
+            )
+            .where(daily_stats.day >= since)
+            .group_by(daily_stats.day)
+            .having(item_count > 0)
+            .order_by(daily_stats.day)
+        )
+    ).all()
+
+    def summary(count: int, price_total: float) -> dict:
+        return {
+            "item_count": count,
+            "price_total": round(price_total, 2),
+            "avg_price": round(price_total / count, 2) if count else None,
+        }
+
+    return {
+        **summary(total_count, total_price),
+        "owners": [{"owner_id": row.owner_id, **summary(row.item_count, row.price_total)} for row in owners],
+        "daily": [{"day": row.day, **summary(row.item_count, row.price_total)} for row in daily],
+    }
@@ -2,8 +2,12 @@
 データベース設定（SQLAlchemy 2.0 + asyncpg）
 """
 import os
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import threading
+import time
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 # 環境変数からDATABASE_URLを取得
 # postgresql:// → postgresql+asyncpg:// に変換
@@ -11,12 +15,100 @@ DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432
 if DATABASE_URL.startswith("postgresql://"):
     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
+
+def _env_bool(name: str, default: bool) -> bool:
+    """環境変数を真偽値として取得"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# ==========================================
+# 接続プール設定（環境変数で調整）
+# ==========================================
+DB_ECHO = _env_bool("DB_ECHO", False)  # SQLログ出力（本番では無効のままにする）
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # 接続取得の最大待ち秒数
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # 接続を作り直すまでの秒数
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0 で無制限
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """接続取得の待ち時間を計測するコネクションプール"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.wait_count += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+def build_engine_options(url: str) -> dict:
+    """接続先に応じたエンジン設定を環境変数から組み立てる"""
+    options: dict = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    if url.startswith("sqlite"):
+        # SQLiteはドライバ既定のプールを使う
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if DB_STATEMENT_TIMEOUT_MS > 0 and url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        }
+    return options
+
+
+def create_engine_from_settings(url: str = DATABASE_URL, **overrides) -> AsyncEngine:
+    """環境変数の設定に基づいて非同期エンジンを作成"""
+    return create_async_engine(url, **{**build_engine_options(url), **overrides})
+
+
+def pool_stats(target: AsyncEngine) -> dict:
+    """コネクションプールの現在の状態（貸出中・オーバーフロー・待ち時間）"""
+    pool = target.pool
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=DB_MAX_OVERFLOW,
+        )
+    if isinstance(pool, InstrumentedAsyncQueuePool):
+        with pool._wait_lock:
+            count = pool.wait_count
+            stats.update(
+                checkouts=count,
+                avg_wait_ms=round(pool.wait_seconds_total / count * 1000, 3) if count else 0.0,
+                max_wait_ms=round(pool.wait_seconds_max * 1000, 3),
+            )
+    return stats
+
+
 # 非同期エンジンの作成
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,  # SQLログを出力（開発環境）
-    future=True,
-)
+engine = create_engine_from_settings()
 
 # 非同期セッションメーカー
 AsyncSessionLocal = async_sessionmaker(
@@ -42,3 +134,12 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+def get_session_factory():
+    """
+    セッションファクトリを取得する依存関数
+    StreamingResponse のようにレスポンス送信中もDBを使う処理で、
+    セッションの寿命を自分で管理するために使用
+    """
+    return AsyncSessionLocal
@@ -0,0 +1,36 @@
+"""
+ETag / 条件付きリクエスト用ユーティリティ
+
+ETag は updated_at から作る弱いETag（W/"<id>-<更新時刻のマイクロ秒>"）。
+同じ表現を返す限り値は変わらず、更新されると必ず変わる。
+
+- If-None-Match（GET）: 一致すれば 304 を返し、本文のシリアライズを省く
+- If-Match（PUT）: 一致しなければ 412 を返す（楽観的排他制御）
+
+弱いETagを If-Match に使えるよう、比較は W/ を無視する弱い比較で行う。
+"""
+from datetime import datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def make_etag(resource_id: int, updated_at: datetime) -> str:
+    """(id, updated_at) から弱いETagを作成（updated_at はUTCのnaive datetime）"""
+    stamp = (updated_at - _EPOCH) // timedelta(microseconds=1)
+    return f'W/"{resource_id}-{stamp}"'
+
+
+def _opaque(tag: str) -> str:
+    """W/ を除いた ETag の値部分"""
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """If-None-Match / If-Match ヘッダー（カンマ区切り、* を含む）が etag に一致するか"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    current = _opaque(etag)
+    return any(_opaque(tag) == current for tag in header.split(","))
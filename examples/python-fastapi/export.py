@@ -0,0 +1,59 @@
+"""
+アイテムのエクスポート（NDJSON / CSV ストリーミング）
+
+サーバーサイドカーソルから chunk_size 行ずつ取り出してそのまま書き出すため、
+件数に関係なくメモリ使用量は一定に保たれる
+"""
+import csv
+import io
+from typing import AsyncIterator, Callable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+import models
+from serialization import dumps
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+EXPORT_FIELDS = [column.key for column in crud.ITEM_LIST_COLUMNS]
+
+
+def _ndjson_chunk(rows) -> bytes:
+    """行のまとまりを NDJSON に変換"""
+    return b"".join(dumps(row._asdict()) + b"\n" for row in rows)
+
+
+def _csv_chunk(rows) -> str:
+    """行のまとまりを CSV 文字列に変換"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        (row.id, row.title, row.description, row.price, row.owner_id, row.created_at.isoformat())
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def iter_items_export(
+    session_factory: Callable[[], AsyncSession],
+    export_format: str,
+    chunk_size: int = 1000,
+) -> AsyncIterator[str | bytes]:
+    """全アイテムを (created_at, id) 順に chunk_size 行ずつ書き出す"""
+    encode = _csv_chunk if export_format == "csv" else _ndjson_chunk
+    if export_format == "csv":
+        yield ",".join(EXPORT_FIELDS) + "\r\n"
+
+    async with session_factory() as session:
+        result = await session.stream(
+            select(*crud.ITEM_LIST_COLUMNS)
+            .order_by(models.Item.created_at, models.Item.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for rows in result.partitions():
+            yield encode(rows)
@@ -4,9 +4,31 @@
 
 使い方:
     python init_db.py
+
+    # 負荷試験用の大量データ（ユーザー100万人・アイテム500万件）を投入
+    python init_db.py --users 1000000 --items 5000000 --workers 8
+
+大量データの投入:
+- パスワードハッシュは1回だけ計算し、全ユーザーで使い回す（パスワードは全員 password123）
+- チャンクごとにワーカープロセスで生成し、PostgreSQL では各プロセスが自分の接続で
+  COPY（asyncpg の copy_records_to_table）する。SQLite では1プロセスで executemany する
+- PostgreSQL では主キー以外のインデックス（全文検索の GIN を含む）を投入前に削除し、投入後にまとめて作り直す
+- 分布: アイテム数は一部のユーザーに偏らせ（OWNER_SKEW）、価格は対数正規分布、
+  作成日時は直近 --days 日に（アイテムは新しいものほど多く）散らす
+- 同じ --seed なら同じデータになる（チャンクごとに乱数の種を決めるため、ワーカー数に依存しない）
 """
+import argparse
 import asyncio
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
 from passlib.context import CryptContext
+from sqlalchemy import insert, text
 
 from database import engine, Base, AsyncSessionLocal
 import models
@@ -14,8 +36,193 @@ import crud
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+USER_COLUMNS = ("id", "email", "username", "hashed_password", "is_active", "created_at", "updated_at")
+ITEM_COLUMNS = ("id", "title", "description", "price", "owner_id", "created_at", "updated_at")
+
+# アイテムの所有者の偏り（1 で一様、大きいほど ID の小さいユーザーに集中する）
+OWNER_SKEW = 3.0
+# 価格の分布（中央値 PRICE_MEDIAN、対数の標準偏差 PRICE_SIGMA の対数正規分布）
+PRICE_MEDIAN = 30.0
+PRICE_SIGMA = 1.0
+INACTIVE_RATIO = 0.01
+NO_DESCRIPTION_RATIO = 0.2
+
+ADJECTIVES = (
+    "Classic", "Compact", "Deluxe", "Eco", "Handmade", "Portable", "Premium", "Rustic",
+    "Smart", "Vintage", "Wireless", "Wooden",
+)
+NOUNS = (
+    "Backpack", "Camera", "Chair", "Desk", "Headphones", "Kettle", "Keyboard", "Lamp",
+    "Monitor", "Mug", "Notebook", "Speaker", "Table", "Watch",
+)
+FEATURES = (
+    "durable", "lightweight", "waterproof", "rechargeable", "adjustable", "foldable",
+    "energy efficient", "easy to clean",
+)
+
+
+def generate_users(start_id: int, count: int, seed: int, hashed_password: str,
+                   now: datetime, days: int) -> list[tuple]:
+    """ID が start_id から count 人分のユーザー行（USER_COLUMNS の順）を生成"""
+    rng = random.Random(f"users-{seed}-{start_id}")
+    span = days * 86400
+    rows = []
+    for user_id in range(start_id, start_id + count):
+        created_at = now - timedelta(seconds=span * rng.random())
+        rows.append((
+            user_id,
+            f"user{user_id}@example.com",
+            f"user{user_id}",
+            hashed_password,
+            rng.random() >= INACTIVE_RATIO,
+            created_at,
+            created_at,
+        ))
+    return rows
+
+
+def generate_items(start_id: int, count: int, seed: int, first_owner_id: int, owners: int,
+                   now: datetime, days: int) -> list[tuple]:
+    """ID が start_id から count 件分のアイテム行（ITEM_COLUMNS の順）を生成"""
+    rng = random.Random(f"items-{seed}-{start_id}")
+    span = days * 86400
+    price_mu = math.log(PRICE_MEDIAN)
+    rows = []
+    for item_id in range(start_id, start_id + count):
+        owner_id = first_owner_id + min(int(owners * rng.random() ** OWNER_SKEW), owners - 1)
+        price = max(round(rng.lognormvariate(price_mu, PRICE_SIGMA), 2), 0.01)
+        created_at = now - timedelta(seconds=span * rng.random() ** 2)
+        noun = rng.choice(NOUNS)
+        description = None
+        if rng.random() >= NO_DESCRIPTION_RATIO:
+            description = f"A {rng.choice(FEATURES)} {noun.lower()} that is {rng.choice(FEATURES)}."
+        rows.append((
+            item_id,
+            f"{rng.choice(ADJECTIVES)} {noun} {item_id}",
+            description,
+            price,
+            owner_id,
+            created_at,
+            created_at,
+        ))
+    return rows
+
+
+def chunks(first_id: int, total: int, chunk_size: int) -> list[tuple[int, int]]:
+    """[first_id, first_id + total) を (開始ID, 件数) のチャンクに分割"""
+    end = first_id + total
+    return [(start, min(chunk_size, end - start)) for start in range(first_id, end, chunk_size)]
+
+
+# 制約（主キー）に使われていない users / items のインデックス
+_SECONDARY_INDEXES = text(
+    "SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+    "WHERE i.indrelid IN ('users'::regclass, 'items'::regclass) "
+    "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)"
+)
+
+
+def _asyncpg_dsn() -> str:
+    return engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def _copy_records(table: str, columns: tuple[str, ...], records: list[tuple]) -> None:
+    import asyncpg
+
+    connection = await asyncpg.connect(_asyncpg_dsn())
+    try:
+        await connection.copy_records_to_table(table, records=records, columns=list(columns))
+    finally:
+        await connection.close()
+
 
-async def init_database():
+def _copy_chunk(table: str, columns: tuple[str, ...], generator, args: tuple) -> int:
+    """ワーカープロセスで1チャンクを生成し、COPY で投入する"""
+    records = generator(*args)
+    asyncio.run(_copy_records(table, columns, records))
+    return len(records)
+
+
+async def _load_postgresql(executor, table: str, columns: tuple[str, ...], generator,
+                           jobs: list[tuple]) -> None:
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(
+        loop.run_in_executor(executor, _copy_chunk, table, columns, generator, args)
+        for args in jobs
+    ))
+
+
+async def _load_sqlite(table, columns: tuple[str, ...], generator, jobs: list[tuple]) -> None:
+    async with engine.begin() as conn:
+        for args in jobs:
+            rows = generator(*args)
+            await conn.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+
+async def seed_database(users: int, items: int, hashed_password: str, first_owner_id: int,
+                        workers: int, chunk_size: int, seed: int, days: int) -> None:
+    """ユーザー users 人とアイテム items 件を一括投入する（ID は既存の行の後ろから振る）"""
+    now = datetime.utcnow()
+    postgresql = engine.dialect.name == "postgresql"
+    async with engine.connect() as conn:
+        first_user_id = (await conn.execute(text("SELECT coalesce(max(id), 0) + 1 FROM users"))).scalar()
+        first_item_id = (await conn.execute(text("SELECT coalesce(max(id), 0) + 1 FROM items"))).scalar()
+
+    # 所有者は投入したユーザーから選ぶ（ユーザーを投入しない場合は既存のユーザー）
+    if users:
+        first_owner_id, owners = first_user_id, users
+    else:
+        owners = first_user_id - first_owner_id
+
+    user_jobs = [
+        (start, count, seed, hashed_password, now, days)
+        for start, count in chunks(first_user_id, users, chunk_size)
+    ]
+    item_jobs = [
+        (start, count, seed, first_owner_id, owners, now, days)
+        for start, count in chunks(first_item_id, items, chunk_size)
+    ]
+
+    started = time.perf_counter()
+    if postgresql:
+        # 1行ずつインデックスを更新するより、投入後に一括で作る方が速い
+        async with engine.begin() as conn:
+            indexes = (await conn.execute(_SECONDARY_INDEXES)).all()
+            for name, _ in indexes:
+                await conn.execute(text(f"DROP INDEX {name}"))
+
+        # spawn: イベントループや接続プールを子プロセスに引き継がない
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            await _load_postgresql(executor, "users", USER_COLUMNS, generate_users, user_jobs)
+            print(f"✅ ユーザー {users:,} 人を投入 ({time.perf_counter() - started:.1f}s)")
+            await _load_postgresql(executor, "items", ITEM_COLUMNS, generate_items, item_jobs)
+            print(f"✅ アイテム {items:,} 件を投入 ({time.perf_counter() - started:.1f}s)")
+        async with engine.begin() as conn:
+            await conn.execute(text("SET LOCAL maintenance_work_mem = '256MB'"))
+            for _, definition in indexes:
+                await conn.execute(text(definition))
+            print(f"✅ インデックスを作成 ({time.perf_counter() - started:.1f}s)")
+            # COPY で ID を明示したため、シーケンスを最大IDまで進める
+            for table in ("users", "items"):
+                await conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT coalesce(max(id), 1) FROM {table}))"
+                ))
+            await conn.execute(text("ANALYZE users"))
+            await conn.execute(text("ANALYZE items"))
+    else:
+        await _load_sqlite(models.User.__table__, USER_COLUMNS, generate_users, user_jobs)
+        print(f"✅ ユーザー {users:,} 人を投入 ({time.perf_counter() - started:.1f}s)")
+        await _load_sqlite(models.Item.__table__, ITEM_COLUMNS, generate_items, item_jobs)
+        print(f"✅ アイテム {items:,} 件を投入 ({time.perf_counter() - started:.1f}s)")
+
+    # 一括投入は crud を通らないため、集計テーブルを作り直す
+    async with AsyncSessionLocal() as session:
+        await crud.rebuild_item_stats(session)
+    print(f"✅ 集計テーブルを再構築 ({time.perf_counter() - started:.1f}s)")
+
+
+async def init_database(options: argparse.Namespace | None = None):
     """データベースとテーブルを初期化"""
     print("=" * 60)
     print("データベース初期化を開始...")
@@ -29,33 +236,62 @@ async def init_database():
         print("✅ テーブル作成完了")
 
     # 初期データの投入
+    hashed_password = pwd_context.hash("password123")
     async with AsyncSessionLocal() as session:
         print("\n初期データを投入中...")
 
         # テストユーザーの作成
         existing_user = await crud.get_user_by_username(session, "testuser")
         if not existing_user:
-            hashed_password = pwd_context.hash("password123")
             test_user = await crud.create_user(
                 db=session,
                 username="testuser",
                 email="test@example.com",
                 hashed_password=hashed_password,
             )
+            test_user_id = test_user.id
             print(f"✅ テストユーザー作成: {test_user.username} (ID: {test_user.id})")
         else:
+            test_user_id = existing_user.id
             print(f"ℹ️  テストユーザー既存: {existing_user.username}")
 
+    if options is not None and (options.users or options.items):
+        print("\n大量データを投入中...")
+        await seed_database(
+            users=options.users,
+            items=options.items,
+            hashed_password=hashed_password,
+            first_owner_id=test_user_id,
+            workers=options.workers,
+            chunk_size=options.chunk_size,
+            seed=options.seed,
+            days=options.days,
+        )
+
     print("\n" + "=" * 60)
     print("データベース初期化完了！")
     print("=" * 60)
     print("\nデフォルトユーザー:")
     print("  username: testuser")
     print("  password: password123")
+    if options is not None and options.users:
+        print("  （投入したユーザー user<ID> のパスワードも password123）")
     print("\nSwagger UI でテスト:")
     print("  http://localhost:8000/docs")
     print("=" * 60)
 
 
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Initialize the database and optionally seed bulk data")
+    parser.add_argument("--users", type=int, default=0, help="投入するユーザー数（default: 0）")
+    parser.add_argument("--items", type=int, default=0, help="投入するアイテム数（default: 0）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="生成・COPY を行うプロセス数（PostgreSQL のみ、default: CPU数）")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="1回の COPY / executemany の行数")
+    parser.add_argument("--seed", type=int, default=42, help="乱数の種")
+    parser.add_argument("--days", type=int, default=365, help="作成日時を散らす期間（日）")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    asyncio.run(init_database())
+    asyncio.run(init_database(parse_args()))
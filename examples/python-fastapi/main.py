@@ -9,22 +9,42 @@ React（Vite）フロントエンド連携を想定したバックエンドAPI
 """
 
 from contextlib import asynccontextmanager
-from datetime import datetime, timedelta
-from typing import Annotated
+from datetime import date, datetime, timedelta
+from typing import Annotated, Any, Literal
 
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from pydantic import BaseModel, EmailStr, Field
-from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, EmailStr, Field, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 import os
+import secrets
 
 # データベース関連のインポート
-from database import get_db, DATABASE_URL
+from database import engine, get_db, get_session_factory, pool_stats, AsyncSessionLocal, DATABASE_URL
 import crud
-import models
+import rate_limit
+import response_cache
+from compression import CompressionMiddleware
+from etag import etag_matches, make_etag
+from export import EXPORT_FORMATS, iter_items_export
+from metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, instrument_engine
+from metrics import registry as metrics_registry
+from pagination import (
+    InvalidCursor,
+    decode_cursor,
+    decode_number_cursor,
+    encode_cursor,
+    encode_number_cursor,
+)
+from search import search_terms
+from serialization import DefaultJSONResponse, dump_rows, dumps
+from password_hasher import PasswordHasher, PasswordHasherBusy
+from token_cache import CachedUser, TokenCache
+from user_filter import UserFilter
 
 # ==========================================
 # 設定
@@ -40,11 +60,46 @@ CORS_ORIGINS_STR = os.getenv(
 )
 CORS_ORIGINS = [origin.strip() for origin in CORS_ORIGINS_STR.split(",")]
 
+# 検証済みトークンキャッシュ設定（TTL 0 で無効）
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "30"))
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "1024"))
+
+# 既存ユーザー名・メールアドレスのブルームフィルター（存在しない名前でのログインはDBに問い合わせない）
+USER_FILTER_ENABLED = os.getenv("USER_FILTER_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+USER_FILTER_CAPACITY = int(os.getenv("USER_FILTER_CAPACITY", "100000"))  # 想定ユーザー数
+USER_FILTER_FALSE_POSITIVE_RATE = float(os.getenv("USER_FILTER_FALSE_POSITIVE_RATE", "0.01"))
+USER_FILTER_REFRESH_SECONDS = float(os.getenv("USER_FILTER_REFRESH_SECONDS", "1"))
+
+# bcrypt のコスト（2^n 回）。テストでは最小値の 4 にして登録・ログインを高速化する
+BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+
+# パスワードハッシュ用スレッドプール設定（MAX_QUEUE 0 で待ち行列無制限）
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "0"))
+
+# エクスポート時にサーバーサイドカーソルから一度に取得する行数
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+# 一括作成（/items/bulk）の1リクエストあたり最大件数と、1回のINSERTに含める行数
+BULK_ITEMS_MAX = int(os.getenv("BULK_ITEMS_MAX", "1000"))
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "500"))
+
 # ==========================================
 # セキュリティ
 # ==========================================
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_LOG_ROUNDS)
+password_hasher = PasswordHasher(
+    pwd_context, max_workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_MAX_QUEUE
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+token_cache = TokenCache(max_size=TOKEN_CACHE_MAX_SIZE, ttl_seconds=TOKEN_CACHE_TTL_SECONDS)
+user_filter = UserFilter(
+    capacity=USER_FILTER_CAPACITY,
+    false_positive_rate=USER_FILTER_FALSE_POSITIVE_RATE,
+    refresh_interval=USER_FILTER_REFRESH_SECONDS,
+)
+# 存在しないユーザーでもパスワード検証1回分の時間をかけるためのダミーハッシュ
+DUMMY_PASSWORD_HASH = pwd_context.hash(secrets.token_urlsafe(16))
 
 # ==========================================
 # Pydanticモデル（スキーマ定義）
@@ -102,6 +157,65 @@ class Item(ItemBase):
         from_attributes = True
 
 
+class ItemUpdate(BaseModel):
+    """アイテム更新スキーマ（指定した項目だけを更新）"""
+    title: str | None = Field(None, min_length=1, max_length=100)
+    description: str | None = Field(None, max_length=500)
+    price: float | None = Field(None, gt=0)
+
+
+class ItemSearchResult(Item):
+    """アイテム検索結果スキーマ（rank が大きいほど一致度が高い）"""
+    rank: float
+
+
+class ItemBulkCreate(BaseModel):
+    """
+    アイテム一括作成スキーマ
+
+    各要素は ItemCreate として行ごとに検証する。
+    - atomic: 1件でも不正な行があれば何も作成しない
+    - partial: 正しい行のみ作成し、不正な行はエラーとして返す
+    """
+    items: list[Any] = Field(..., min_length=1, max_length=BULK_ITEMS_MAX)
+    mode: Literal["atomic", "partial"] = "atomic"
+
+
+class BulkItemError(BaseModel):
+    """一括作成の行単位エラー"""
+    index: int
+    errors: list[dict[str, Any]]
+
+
+class ItemBulkCreateResponse(BaseModel):
+    """アイテム一括作成レスポンススキーマ"""
+    created: list[Item]
+    errors: list[BulkItemError]
+
+
+class ItemStatsSummary(BaseModel):
+    """件数・価格合計・平均価格（件数 0 のとき avg_price は null）"""
+    item_count: int
+    price_total: float
+    avg_price: float | None
+
+
+class OwnerItemStats(ItemStatsSummary):
+    """所有者別のアイテム統計"""
+    owner_id: int
+
+
+class DailyItemStats(ItemStatsSummary):
+    """作成日（UTC）別のアイテム統計"""
+    day: date
+
+
+class ItemStatsResponse(ItemStatsSummary):
+    """アイテム統計レスポンススキーマ"""
+    owners: list[OwnerItemStats]
+    daily: list[DailyItemStats]
+
+
 class HealthResponse(BaseModel):
     """ヘルスチェックレスポンス"""
     status: str
@@ -119,22 +233,31 @@ class HealthResponse(BaseModel):
 # ==========================================
 # ユーティリティ関数
 # ==========================================
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """パスワード検証"""
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """パスワード検証（イベントループを塞がないよう専用スレッドプールで実行）"""
+    return await password_hasher.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-    """パスワードハッシュ化"""
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    """パスワードハッシュ化（イベントループを塞がないよう専用スレッドプールで実行）"""
+    return await password_hasher.hash(password)
 
 
 async def authenticate_user(db: AsyncSession, username: str, password: str):
-    """ユーザー認証"""
+    """
+    ユーザー認証
+
+    ユーザーが存在しない場合もダミーのハッシュで検証し、応答時間からユーザーの有無を推測させない
+    """
+    if not await user_filter.might_exist(db, username):
+        # 確実に存在しないユーザー名はDBに問い合わせない
+        await verify_password(password, DUMMY_PASSWORD_HASH)
+        return False
     user = await crud.get_user_by_username(db, username)
     if not user:
+        await verify_password(password, DUMMY_PASSWORD_HASH)
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password(password, user.hashed_password):
         return False
     return user
 
@@ -155,7 +278,15 @@ async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    """現在のユーザー取得（依存関数）"""
+    """
+    現在のユーザー取得（依存関数）
+
+    検証済みトークンはキャッシュし、有効期間内の再リクエストではDBを参照しない
+    """
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached.user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -173,11 +304,14 @@ async def get_current_user(
     user = await crud.get_user_by_username(db, username=token_data.username)
     if user is None:
         raise credentials_exception
-    return user
+
+    snapshot = CachedUser.from_model(user)
+    token_cache.set(token, payload, snapshot)
+    return snapshot
 
 
 async def get_current_active_user(
-    current_user: Annotated[models.User, Depends(get_current_user)]
+    current_user: Annotated[CachedUser, Depends(get_current_user)]
 ):
     """アクティブユーザー取得（依存関数）"""
     if not current_user.is_active:
@@ -210,9 +344,19 @@ async def lifespan(app: FastAPI):
     print(f"Database URL: {DATABASE_URL.replace('postgresql+asyncpg://', 'postgresql://')}")
     print("=" * 60)
 
+    if USER_FILTER_ENABLED:
+        try:
+            async with AsyncSessionLocal() as session:
+                await user_filter.load(session)
+        except Exception as exc:
+            # テーブル未作成など。フィルター無し（毎回DBで確認）で動作する
+            print(f"⚠️  ユーザー存在フィルターを読み込めませんでした（DBで確認します）: {exc!r}")
+
     yield
 
-    # シャットダウン処理（必要に応じて追加）
+    # シャットダウン処理
+    password_hasher.shutdown()
+    await engine.dispose()
 
 
 # ==========================================
@@ -225,6 +369,7 @@ app = FastAPI(
     docs_url="/docs",  # Swagger UI
     redoc_url="/redoc",  # ReDoc
     lifespan=lifespan,
+    default_response_class=DefaultJSONResponse,  # orjson があれば ORJSONResponse
 )
 
 # ==========================================
@@ -236,8 +381,30 @@ app.add_middleware(
     allow_credentials=True,  # Cookie、Authorizationヘッダーを許可
     allow_methods=["*"],  # すべてのHTTPメソッドを許可
     allow_headers=["*"],  # すべてのヘッダーを許可
+    expose_headers=["X-Next-Cursor"],  # キーセットページネーションの次ページカーソル
 )
 
+# ==========================================
+# 計測（レイテンシ・SQL回数/時間・レスポンスサイズ → /metrics, Server-Timing）とレスポンス圧縮
+# ==========================================
+instrument_engine(engine.sync_engine)
+# 圧縮はメトリクスの内側に置き、http_response_size_bytes には圧縮後（転送量）のサイズを記録する
+app.add_middleware(CompressionMiddleware, registry=metrics_registry)
+app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
+# ==========================================
+# 例外ハンドラー
+# ==========================================
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """ハッシュ処理の待ち行列が溢れた場合は 503 で再試行を促す"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry later"},
+        headers={"Retry-After": "1"},
+    )
+
+
 # ==========================================
 # エンドポイント
 # ==========================================
@@ -263,7 +430,36 @@ async def health_check():
     )
 
 
-@app.post("/token", response_model=Token, tags=["Authentication"])
+@app.get("/stats", tags=["Health"])
+async def stats(
+    current_user: Annotated[CachedUser, Depends(get_current_active_user)]
+):
+    """キャッシュ等の内部統計（DB問い合わせ削減効果の確認用。認証必須）"""
+    return {
+        "token_cache": token_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "db_pool": pool_stats(engine),
+        "response_cache": response_cache.cache.stats(),
+        "rate_limiter": rate_limit.limiter.stats(),
+        "user_filter": user_filter.stats(),
+    }
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus 形式のリクエストメトリクス"""
+    return Response(content=metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.post(
+    "/token",
+    response_model=Token,
+    tags=["Authentication"],
+    # bcrypt の検証より前に IP・ユーザー名ごとの試行回数を制限する
+    dependencies=[Depends(rate_limit.RateLimit(
+        "token", rate_limit.LOGIN_IP_RATE, username_rate=rate_limit.LOGIN_USERNAME_RATE,
+    ))],
+)
 async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Annotated[AsyncSession, Depends(get_db)]
@@ -300,7 +496,7 @@ async def login(
 
 @app.get("/users/me", response_model=User, tags=["Users"])
 async def read_users_me(
-    current_user: Annotated[models.User, Depends(get_current_active_user)]
+    current_user: Annotated[CachedUser, Depends(get_current_active_user)]
 ):
     """現在のユーザー情報取得（認証必須）"""
     return current_user
@@ -313,36 +509,46 @@ class UserRegistrationResponse(BaseModel):
     user: User
 
 
-@app.post("/users", response_model=UserRegistrationResponse, status_code=status.HTTP_201_CREATED, tags=["Users"])
+# 一意制約のある列 -> 登録済みの場合のエラーメッセージ
+USER_CONFLICT_DETAILS = {
+    "username": "Username already registered",
+    "email": "Email already registered",
+}
+
+
+@app.post(
+    "/users",
+    response_model=UserRegistrationResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Users"],
+    dependencies=[Depends(rate_limit.RateLimit("users", rate_limit.REGISTER_IP_RATE))],
+)
 async def create_user(
     user: UserCreate,
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    """ユーザー登録"""
-    # ユーザー名の重複チェック
-    existing_user = await crud.get_user_by_username(db, user.username)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered",
-        )
-
-    # メールアドレスの重複チェック
-    existing_email = await crud.get_user_by_email(db, user.email)
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered",
-        )
+    """
+    ユーザー登録
 
-    # ユーザー作成
-    hashed_password = get_password_hash(user.password)
+    重複チェックと作成を INSERT ... ON CONFLICT DO NOTHING の1文で行うため、
+    同時に同じユーザー名で登録されても片方だけが成功する
+    """
+    hashed_password = await get_password_hash(user.password)
     db_user = await crud.create_user(
         db=db,
         username=user.username,
         email=user.email,
         hashed_password=hashed_password,
     )
+    if db_user is None:
+        # 登録済み（どちらの列と重複したかは失敗時にだけ調べる）
+        field = await crud.get_conflicting_user_field(db, user.username, user.email)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            # 重複した行が直後に削除された場合はユーザー名の重複として扱う
+            detail=USER_CONFLICT_DETAILS[field or "username"],
+        )
+    user_filter.add(db_user.username, db_user.email)
 
     # トークン生成（ユーザー登録時にも発行）
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -357,22 +563,97 @@ async def create_user(
     )
 
 
+ItemSort = Literal["created_at", "-created_at", "price", "-price"]
+
+
 @app.get("/items", response_model=list[Item], tags=["Items"])
 async def read_items(
     skip: int = 0,
     limit: int = 10,
-    current_user: Annotated[models.User, Depends(get_current_active_user)] = None,
+    cursor: str | None = None,
+    owner_id: int | None = None,
+    min_price: Annotated[float | None, Query(ge=0)] = None,
+    max_price: Annotated[float | None, Query(ge=0)] = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    sort: ItemSort = "created_at",
+    current_user: Annotated[CachedUser, Depends(get_current_active_user)] = None,
     db: Annotated[AsyncSession, Depends(get_db)] = None,
 ):
-    """アイテム一覧取得（認証必須）"""
-    items = await crud.get_items(db, skip=skip, limit=limit)
-    return items
+    """
+    アイテム一覧取得（認証必須）
+
+    - 絞り込み: owner_id、価格範囲（min_price 以上 max_price 以下）、
+      作成日時範囲（created_from 以降 created_to より前）
+    - 並び順: sort=created_at / -created_at / price / -price（先頭の - で降順、同値は id 順）
+    - cursor 指定時: (並べる列, id) のキーセットページネーション。
+      1ページ目は cursor を空文字で指定し、次ページのカーソルは X-Next-Cursor
+      ヘッダーで返す（最終ページでは付与しない）
+    - cursor 未指定時: skip/limit による従来のOFFSETページネーション
+
+    シリアライズ済みのレスポンスをキャッシュし、アイテム作成・更新・削除で無効化する
+    """
+    if (min_price is not None and max_price is not None and min_price > max_price) or (
+        created_from is not None and created_to is not None and created_from >= created_to
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid range: lower bound must be below upper bound",
+        )
+    filters = crud.ItemFilters(
+        owner_id=owner_id,
+        min_price=min_price,
+        max_price=max_price,
+        created_from=created_from,
+        created_to=created_to,
+    )
+
+    cache_key = await response_cache.cache.key_for(
+        "items:list", (response_cache.ITEMS_TAG,), skip, limit, cursor, filters, sort
+    )
+    cached = await response_cache.cache.get(cache_key)
+    if cached is not None:
+        next_cursor, _, body = cached.partition(b"\n")
+        headers = {"X-Next-Cursor": next_cursor.decode()} if next_cursor else None
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    next_cursor = ""
+    by_price = sort.endswith("price")
+    if cursor is None:
+        items = await crud.get_items(db, skip=skip, limit=limit, filters=filters, sort=sort)
+    else:
+        try:
+            decode = decode_number_cursor if by_price else decode_cursor
+            after = decode(cursor) if cursor else None
+        except InvalidCursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+
+        items, has_more = await crud.get_items_keyset(
+            db, limit=limit, after=after, filters=filters, sort=sort
+        )
+        if has_more and items:
+            last = items[-1]
+            next_cursor = (
+                encode_number_cursor(last.price, last.id)
+                if by_price
+                else encode_cursor(last.created_at, last.id)
+            )
+
+    # 列単位で取得した Row を Pydantic の検証を通さずに直接シリアライズ
+    body = dump_rows(items)
+    await response_cache.cache.set(cache_key, next_cursor.encode() + b"\n" + body)
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.post("/items", response_model=Item, status_code=status.HTTP_201_CREATED, tags=["Items"])
 async def create_item(
     item: ItemCreate,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
+    current_user: Annotated[CachedUser, Depends(get_current_active_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """アイテム作成（認証必須）"""
@@ -386,20 +667,226 @@ async def create_item(
     return db_item
 
 
+@app.post(
+    "/items/bulk",
+    response_model=ItemBulkCreateResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Items"],
+)
+async def create_items_bulk(
+    payload: ItemBulkCreate,
+    current_user: Annotated[CachedUser, Depends(get_current_active_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """
+    アイテム一括作成（認証必須）
+
+    検証を通過した行を BULK_INSERT_BATCH_SIZE 行ごとの INSERT ... RETURNING でまとめて作成する。
+    作成できる行がない場合（atomic モードで不正な行がある場合を含む）は 422
+    """
+    valid_items: list[dict[str, Any]] = []
+    errors: list[BulkItemError] = []
+    for index, raw_item in enumerate(payload.items):
+        try:
+            valid_items.append(ItemCreate.model_validate(raw_item).model_dump())
+        except ValidationError as e:
+            errors.append(BulkItemError(
+                index=index,
+                errors=[
+                    {"loc": list(error["loc"]), "msg": error["msg"], "type": error["type"]}
+                    for error in e.errors()
+                ],
+            ))
+
+    if not valid_items or (errors and payload.mode == "atomic"):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[error.model_dump() for error in errors],
+        )
+
+    created = await crud.create_items_bulk(
+        db, valid_items, owner_id=current_user.id, batch_size=BULK_INSERT_BATCH_SIZE
+    )
+    return ItemBulkCreateResponse(
+        created=[Item.model_validate(row) for row in created],
+        errors=errors,
+    )
+
+
+@app.get("/items/export", tags=["Items"])
+async def export_items(
+    current_user: Annotated[CachedUser, Depends(get_current_active_user)],
+    session_factory: Annotated[async_sessionmaker, Depends(get_session_factory)],
+    format: str = "ndjson",
+):
+    """
+    アイテム全件エクスポート（認証必須）
+
+    format=ndjson または csv。サーバーサイドカーソルから逐次ストリーミングするため、
+    件数が増えてもメモリ使用量は一定
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}",
+        )
+
+    # get_db のセッションはレスポンス送信前に閉じられるため、専用セッションを使う
+    return StreamingResponse(
+        iter_items_export(session_factory, format, chunk_size=EXPORT_CHUNK_SIZE),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="items.{format}"'},
+    )
+
+
+@app.get("/items/stats", response_model=ItemStatsResponse, tags=["Items"])
+async def read_item_stats(
+    current_user: Annotated[CachedUser, Depends(get_current_active_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    days: Annotated[int, Query(ge=1, le=366)] = 30,
+    owners_limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+):
+    """
+    アイテム統計（認証必須）
+
+    全体・所有者別（件数の多い順に owners_limit 人）・日別（直近 days 日）の
+    件数、価格合計、平均価格を返す。items を走査せず、作成・更新・削除時に差分で
+    更新している集計テーブルから読む。レスポンスはキャッシュし、アイテムの変更で無効化する
+    """
+    cache_key = await response_cache.cache.key_for(
+        "items:stats", (response_cache.ITEMS_TAG,), days, owners_limit
+    )
+    cached = await response_cache.cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    body = dumps(await crud.get_item_stats(db, days=days, owners_limit=owners_limit))
+    await response_cache.cache.set(cache_key, body)
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/items/search", response_model=list[ItemSearchResult], tags=["Items"])
+async def search_items(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    current_user: Annotated[CachedUser, Depends(get_current_active_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
+):
+    """
+    アイテム検索（認証必須）
+
+    title / description をすべての語の前方一致で検索し、一致度（rank）の高い順に返す。
+    次ページのカーソルは X-Next-Cursor ヘッダーで返す（最終ページでは付与しない）
+    """
+    if not search_terms(q):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="q must contain at least one word",
+        )
+    try:
+        after = decode_number_cursor(cursor) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+    cache_key = await response_cache.cache.key_for(
+        "items:search", (response_cache.ITEMS_TAG,), q, limit, cursor
+    )
+    cached = await response_cache.cache.get(cache_key)
+    if cached is not None:
+        next_cursor, _, body = cached.partition(b"\n")
+        headers = {"X-Next-Cursor": next_cursor.decode()} if next_cursor else None
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    rows, has_more = await crud.search_items(db, q, limit=limit, after=after)
+    next_cursor = encode_number_cursor(rows[-1].rank, rows[-1].id) if has_more and rows else ""
+
+    body = dump_rows(rows)
+    await response_cache.cache.set(cache_key, next_cursor.encode() + b"\n" + body)
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _item_response(etag: str, body: bytes, if_none_match: str | None) -> Response:
+    """If-None-Match が ETag に一致すれば本文なしの 304、それ以外は 200"""
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
 @app.get("/items/{item_id}", response_model=Item, tags=["Items"])
 async def read_item(
     item_id: int,
-    current_user: Annotated[models.User, Depends(get_current_active_user)],
+    current_user: Annotated[CachedUser, Depends(get_current_active_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
-    """アイテム詳細取得（認証必須）"""
-    db_item = await crud.get_item_by_id(db, item_id)
+    """
+    アイテム詳細取得（認証必須、レスポンスはキャッシュし更新・削除で無効化）
+
+    ETag（updated_at から作る弱いETag）を返し、If-None-Match が一致すれば 304 を返す。
+    キャッシュには ETag と本文を一緒に保存しているため、キャッシュが有効な間は
+    DBに問い合わせずに 304 を判定できる
+    """
+    cache_key = await response_cache.item_detail_key(item_id)
+    cached = await response_cache.cache.get(cache_key)
+    if cached is not None and cached.startswith(b"W/"):
+        etag, _, body = cached.partition(b"\n")
+        return _item_response(etag.decode(), body, if_none_match)
+
+    row = await crud.get_item_row(db, item_id)
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Item not found",
+        )
+
+    etag = make_etag(row.id, row.updated_at)
+    body = dumps({column.key: getattr(row, column.key) for column in crud.ITEM_LIST_COLUMNS})
+    await response_cache.cache.set(cache_key, etag.encode() + b"\n" + body)
+    return _item_response(etag, body, if_none_match)
+
+
+@app.put("/items/{item_id}", response_model=Item, tags=["Items"])
+async def update_item(
+    item_id: int,
+    item: ItemUpdate,
+    current_user: Annotated[CachedUser, Depends(get_current_active_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    if_match: Annotated[str | None, Header()] = None,
+):
+    """
+    アイテム更新（認証必須、所有者のみ）
+
+    If-Match を指定すると、現在の ETag と一致する場合だけ更新する（一致しなければ 412）。
+    確認から更新まで行ロックを保持するため、同時に更新されても片方だけが成功する
+    """
+    db_item = await crud.get_item_by_id(db, item_id, for_update=if_match is not None)
     if not db_item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Item not found",
         )
-    return db_item
+    if db_item.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    if if_match is not None and not etag_matches(if_match, make_etag(db_item.id, db_item.updated_at)):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Item has been modified",
+        )
+
+    db_item = await crud.update_item(db, item_id, **item.model_dump(exclude_unset=True))
+    return JSONResponse(
+        content=Item.model_validate(db_item).model_dump(mode="json"),
+        headers={"ETag": make_etag(db_item.id, db_item.updated_at)},
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,285 @@
+"""
+リクエスト単位の計測（レイテンシ・SQL実行回数/時間・レスポンスサイズ）
+
+- MetricsMiddleware: ルートごとのヒストグラムを記録し、Server-Timing ヘッダーを付与
+- instrument_engine: SQLAlchemy の before/after_cursor_execute で実行中リクエストのSQLを計測
+- MetricsRegistry.observe_compression: レスポンス圧縮の圧縮率・CPU時間（compression.py から記録）
+- MetricsRegistry.render: Prometheus テキスト形式で出力（/metrics 用）
+
+リクエストごとの集計値は ContextVar で保持するため、同時実行中のリクエストが混ざらない。
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+RESPONSE_SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+COMPRESSION_RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9, 1.0)
+COMPRESSION_CPU_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass
+class RequestStats:
+    """1リクエスト分のDB計測値"""
+    sql_count: int = 0
+    sql_seconds: float = 0.0
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> RequestStats | None:
+    """実行中リクエストの計測値（リクエスト外では None）"""
+    return _current.get()
+
+
+# ==========================================
+# SQL計測
+# ==========================================
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_seconds += time.perf_counter() - started
+
+
+def instrument_engine(engine: Engine) -> None:
+    """エンジンにSQL計測用のイベントを登録（AsyncEngine は sync_engine を渡す）"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ==========================================
+# メトリクス
+# ==========================================
+class Histogram:
+    """ラベルごとの累積バケットを持つヒストグラム"""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # [バケットごとの件数..., 合計, 件数]
+            series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def clear(self) -> None:
+        self._series.clear()
+
+    def render(self, label_names: tuple[str, ...]) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            base = _format_labels(label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{_format_value(bound)}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{base}}} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{{{base}}} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """HTTPリクエストのメトリクスを集計"""
+
+    ROUTE_LABELS = ("method", "route")
+    COMPRESSION_LABELS = ("encoding",)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: dict[tuple, int] = {}
+        self.latency = Histogram(
+            "http_request_duration_seconds", "Request latency in seconds.", LATENCY_BUCKETS
+        )
+        self.db_statements = Histogram(
+            "http_request_db_statements", "SQL statements executed per request.", SQL_STATEMENT_BUCKETS
+        )
+        self.db_time = Histogram(
+            "http_request_db_duration_seconds", "Time spent executing SQL per request.", LATENCY_BUCKETS
+        )
+        self.response_size = Histogram(
+            "http_response_size_bytes", "Response body size in bytes.", RESPONSE_SIZE_BUCKETS
+        )
+        self.compression_bytes: dict[tuple, list[int]] = {}  # encoding → [圧縮前, 圧縮後]
+        self.compression_ratio = Histogram(
+            "http_response_compression_ratio",
+            "Compressed size divided by original size per response.",
+            COMPRESSION_RATIO_BUCKETS,
+        )
+        self.compression_cpu = Histogram(
+            "http_response_compression_cpu_seconds",
+            "CPU time spent compressing a response.",
+            COMPRESSION_CPU_BUCKETS,
+        )
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        stats: RequestStats,
+        size: int,
+    ) -> None:
+        """1リクエスト分の計測値を記録"""
+        labels = (method, route)
+        with self._lock:
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.observe(labels, seconds)
+            self.db_statements.observe(labels, stats.sql_count)
+            self.db_time.observe(labels, stats.sql_seconds)
+            self.response_size.observe(labels, size)
+
+    def observe_compression(
+        self, encoding: str, original_size: int, compressed_size: int, cpu_seconds: float
+    ) -> None:
+        """圧縮した1レスポンス分のバイト数とCPU時間を記録"""
+        labels = (encoding,)
+        with self._lock:
+            totals = self.compression_bytes.setdefault(labels, [0, 0])
+            totals[0] += original_size
+            totals[1] += compressed_size
+            if original_size:
+                self.compression_ratio.observe(labels, compressed_size / original_size)
+            self.compression_cpu.observe(labels, cpu_seconds)
+
+    def reset(self) -> None:
+        """全メトリクスを破棄（テスト用）"""
+        with self._lock:
+            self.requests.clear()
+            self.compression_bytes.clear()
+            for histogram in (
+                self.latency,
+                self.db_statements,
+                self.db_time,
+                self.response_size,
+                self.compression_ratio,
+                self.compression_cpu,
+            ):
+                histogram.clear()
+
+    def render(self) -> str:
+        """Prometheus テキスト形式で出力"""
+        with self._lock:
+            lines = ["# HELP http_requests_total Total HTTP requests.", "# TYPE http_requests_total counter"]
+            for labels, count in sorted(self.requests.items()):
+                lines.append(
+                    f"http_requests_total{{{_format_labels(('method', 'route', 'status'), labels)}}} {count}"
+                )
+            for histogram in (self.latency, self.db_statements, self.db_time, self.response_size):
+                lines.extend(histogram.render(self.ROUTE_LABELS))
+            for name, index, help_text in (
+                ("http_response_compression_input_bytes_total", 0, "Response bytes before compression."),
+                ("http_response_compression_output_bytes_total", 1, "Response bytes after compression."),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, totals in sorted(self.compression_bytes.items()):
+                    lines.append(f"{name}{{{_format_labels(self.COMPRESSION_LABELS, labels)}}} {totals[index]}")
+            for histogram in (self.compression_ratio, self.compression_cpu):
+                lines.extend(histogram.render(self.COMPRESSION_LABELS))
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _escape(value: Any) -> str:
+    """ラベル値のバックスラッシュ・ダブルクォート・改行をエスケープ"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ==========================================
+# ミドルウェア
+# ==========================================
+def server_timing(total_seconds: float, stats: RequestStats) -> str:
+    """Server-Timing ヘッダーの値（ブラウザの開発者ツールで確認できる）"""
+    return (
+        f"app;dur={total_seconds * 1000:.1f}, "
+        f'db;dur={stats.sql_seconds * 1000:.1f};desc="{stats.sql_count} queries"'
+    )
+
+
+class MetricsMiddleware:
+    """
+    リクエストごとにレイテンシ・SQL実行回数/時間・レスポンスサイズを記録する ASGI ミドルウェア
+
+    ルートはパステンプレート（/items/{item_id}）単位で集計し、
+    どのルートにも一致しないリクエストは "unmatched" にまとめる（ラベル数の増加防止）
+    """
+
+    def __init__(self, app: Any, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (b"server-timing", server_timing(time.perf_counter() - started, stats).encode())
+                )
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            self.registry.observe(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status_code,
+                time.perf_counter() - started,
+                stats,
+                size,
+            )
+
+
+registry = MetricsRegistry()
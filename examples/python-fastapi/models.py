@@ -2,10 +2,11 @@
 データベースモデル定義（SQLAlchemy ORM）
 """
 from datetime import datetime
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, ForeignKey, Index, Integer, SmallInteger, String
 from sqlalchemy.orm import relationship
 
 from database import Base
+from search import install_search_ddl
 
 
 class User(Base):
@@ -30,6 +31,19 @@ class User(Base):
 class Item(Base):
     """アイテムテーブル"""
     __tablename__ = "items"
+    __table_args__ = (
+        # キーセットページネーション用: (created_at, id) 順に一覧列をカバー
+        Index(
+            "ix_items_created_at_id",
+            "created_at",
+            "id",
+            postgresql_include=["title", "description", "price", "owner_id"],
+        ),
+        # 一覧の絞り込み・並べ替え用（owner_id 指定 + 作成日時順、価格範囲 + 価格順）
+        # 変更時は alembic/versions にマイグレーションを追加する
+        Index("ix_items_owner_id_created_at", "owner_id", "created_at", "id"),
+        Index("ix_items_price_id", "price", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(100), nullable=False, index=True)
@@ -44,3 +58,31 @@ class Item(Base):
 
     def __repr__(self):
         return f"<Item(id={self.id}, title='{self.title}', price={self.price}, owner_id={self.owner_id})>"
+
+
+class ItemOwnerStats(Base):
+    """所有者ごとのアイテム件数・価格合計（アイテムの作成・更新・削除時に差分で更新する集計テーブル）"""
+    __tablename__ = "item_owner_stats"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    item_count = Column(Integer, default=0, nullable=False)
+    price_total = Column(Float, default=0.0, nullable=False)
+
+
+class ItemDailyStats(Base):
+    """
+    作成日（UTC）ごとのアイテム件数・価格合計（ItemOwnerStats と同じく差分で更新する）
+
+    当日の行には全ユーザーの書き込みが集中するため、1日を shard 列で複数行に分け、
+    書き込みごとにランダムな行へ加算する（参照時に day ごとに合計する）
+    """
+    __tablename__ = "item_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    shard = Column(SmallInteger, primary_key=True, default=0)
+    item_count = Column(Integer, default=0, nullable=False)
+    price_total = Column(Float, default=0.0, nullable=False)
+
+
+# 全文検索用の生成列・GIN/トライグラムインデックス（SQLite では FTS5 テーブル）
+install_search_ddl(Item.__table__)
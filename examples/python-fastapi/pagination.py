@@ -0,0 +1,60 @@
+"""
+キーセット（カーソル）ページネーション用ユーティリティ
+
+カーソルは最後に返した行の (created_at, id)（価格順では (price, id)、検索結果では (rank, id)）を
+URLセーフなBase64で包んだ不透明な文字列。
+クライアントは中身を解釈せず、次ページ取得時にそのまま送り返す。
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+class InvalidCursor(ValueError):
+    """カーソルの形式が不正"""
+
+
+def _encode(values: list) -> str:
+    """値のリストをJSON → Base64 に変換"""
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    """Base64 → JSON を値のリストに戻す"""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """(created_at, id) をカーソル文字列に変換"""
+    return _encode([created_at.isoformat(), item_id])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """カーソル文字列を (created_at, id) に復元"""
+    try:
+        created_at, item_id = _decode(cursor)
+        created_at = datetime.fromisoformat(created_at)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(item_id, int):
+        raise InvalidCursor("Invalid cursor")
+    return created_at, item_id
+
+
+def encode_number_cursor(value: float, item_id: int) -> str:
+    """(数値, id) をカーソル文字列に変換（float は repr で往復しても値が変わらない）"""
+    return _encode([value, item_id])
+
+
+def decode_number_cursor(cursor: str) -> tuple[float, int]:
+    """カーソル文字列を (数値, id) に復元"""
+    try:
+        value, item_id = _decode(cursor)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or not isinstance(item_id, int):
+        raise InvalidCursor("Invalid cursor")
+    return float(value), item_id
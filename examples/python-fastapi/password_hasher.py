@@ -0,0 +1,100 @@
+"""
+パスワードハッシュ処理の専用エグゼキュータ
+
+bcryptは1回あたり数百msのCPUを消費するため、イベントループ上で直接実行すると
+その間すべてのリクエストが停止する。専用のスレッドプールで実行し、
+同時実行数と待ち行列の長さを制限・計測する。
+（bcryptはハッシュ計算中にGILを解放するため、スレッドでも並列に動作する）
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class PasswordHasherBusy(Exception):
+    """待ち行列が上限に達しているため受け付けられない"""
+
+
+class PasswordHasher:
+    """
+    CryptContext の hash/verify を専用スレッドプールで実行するラッパー
+
+    - max_workers: 同時に実行するハッシュ計算の上限
+    - max_queue: 実行待ちの上限（0 で無制限）。超過時は PasswordHasherBusy
+    """
+
+    def __init__(self, context: Any, max_workers: int = 4, max_queue: int = 0):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hasher"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._peak_queued = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds_total = 0.0
+
+    async def hash(self, password: str) -> str:
+        """パスワードをハッシュ化"""
+        return await self._submit(self.context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """パスワードを検証"""
+        return await self._submit(self.context.verify, plain_password, hashed_password)
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self.max_queue and self._queued >= self.max_queue:
+                self._rejected += 1
+                raise PasswordHasherBusy("Password hashing queue is full")
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+
+        submitted_at = time.perf_counter()
+
+        def task():
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_seconds_total += time.perf_counter() - submitted_at
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+        future = self._executor.submit(task)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future: Future) -> None:
+        # 実行前にキャンセルされたタスクは task() を通らないため待ち数を戻す
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def stats(self) -> dict[str, Any]:
+        """同時実行数・待ち行列の統計情報"""
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "peak_queue_depth": self._peak_queued,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_seconds_total / started * 1000, 3) if started else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """スレッドプールを停止"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
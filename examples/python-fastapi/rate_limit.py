@@ -0,0 +1,256 @@
+"""
+トークンバケットによるレート制限（ログイン・登録の総当たり / CPU枯渇対策）
+
+キーごとに (残りトークン数, 最終更新時刻) だけを持ち、経過時間に応じて補充する。
+容量（capacity）までのバーストを許し、平均では per_second 回/秒に抑える。
+
+REDIS_URL が設定されていれば Redis（Luaスクリプトで読み取り・補充・消費を原子的に実行）で
+全ワーカー・全ホストの制限を共有し、なければプロセス内のバケットを使う。
+バックエンドの障害時は制限せずに通す（ログインそのものを止めない）。
+
+/token・/users は bcrypt でCPUを使うため、ハッシュ計算より前（依存関数）で判定し、
+超過時は 429 と Retry-After を返す。
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Protocol
+
+import redis.asyncio as redis
+from fastapi import HTTPException, Request, status
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class Rate:
+    """capacity 回までのバーストを許し、per_second 回/秒で補充するレート"""
+    capacity: int
+    per_second: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        """文字列（例: "5/minute" = 1分あたり5回、5回まで連続可）から作成"""
+        count, _, period = value.strip().partition("/")
+        try:
+            seconds = _PERIODS[period.strip().lower() or "second"]
+            capacity = int(count)
+        except (KeyError, ValueError):
+            raise ValueError(f"invalid rate: {value!r} (expected e.g. '5/minute')") from None
+        if capacity <= 0:
+            raise ValueError(f"invalid rate: {value!r} (count must be positive)")
+        return cls(capacity=capacity, per_second=capacity / seconds)
+
+
+class RateLimitBackend(Protocol):
+    """レート制限バックエンドのインターフェース"""
+
+    async def take(self, key: str, rate: Rate) -> float:
+        """トークンを1つ消費する。消費できれば 0、できなければ次に消費できるまでの秒数"""
+        ...
+
+
+class InMemoryBackend:
+    """
+    プロセス内のトークンバケット（1ワーカー用・テスト用）
+
+    満杯まで補充済みのバケットは存在しないのと同じなので、アイドル状態のキーは追い出す。
+    キー数が max_keys を超えた場合は最も古く使われたキーから追い出す
+    """
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> (残りトークン数, 最終更新時刻, 満杯に戻る時刻)。最終更新の古い順
+        self._buckets: OrderedDict[str, tuple[float, float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(self, key: str, rate: Rate) -> float:
+        with self._lock:
+            now = self._clock()
+            self._evict_idle(now)
+
+            tokens, updated_at, _ = self._buckets.pop(key, (rate.capacity, now, now))
+            tokens = min(rate.capacity, tokens + (now - updated_at) * rate.per_second)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rate.per_second
+
+            self._buckets[key] = (tokens, now, now + (rate.capacity - tokens) / rate.per_second)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def _evict_idle(self, now: float) -> None:
+        """先頭（最終更新が古い順）から満杯に戻ったバケットを捨てる"""
+        while self._buckets:
+            full_at = next(iter(self._buckets.values()))[2]
+            if full_at > now:
+                break
+            self._buckets.popitem(last=False)
+
+
+# KEYS[1]: バケットのキー / ARGV: capacity, per_second
+# 時刻は Redis サーバーの TIME を使い、ワーカー間の時計のずれの影響を受けないようにする
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return tostring(retry_after)
+"""
+
+
+class RedisBackend:
+    """Redisのトークンバケット（複数ワーカー・複数ホストで制限を共有）"""
+
+    name = "redis"
+
+    def __init__(self, client: Any):
+        self.client = client
+        self._take = client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, rate: Rate) -> float:
+        result = await self._take(keys=[key], args=[rate.capacity, rate.per_second])
+        return float(result)
+
+
+class RateLimiter:
+    """複数のバケット（IP 単位・ユーザー名単位など）をまとめて判定する"""
+
+    def __init__(self, backend: RateLimitBackend, enabled: bool = True, prefix: str = "rl:"):
+        self.backend = backend
+        self.enabled = enabled
+        self.prefix = prefix
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    def use_backend(self, backend: RateLimitBackend) -> None:
+        """バックエンドを差し替え（テストでフェイクを使う場合など）"""
+        self.backend = backend
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    async def hit(self, *buckets: tuple[str, Rate]) -> float:
+        """
+        各バケットからトークンを1つずつ消費し、最も長い待ち秒数を返す（0 なら許可）
+
+        バックエンドの障害時は許可する
+        """
+        if not self.enabled:
+            return 0.0
+        retry_after = 0.0
+        try:
+            for key, rate in buckets:
+                retry_after = max(retry_after, await self.backend.take(self.prefix + key, rate))
+        except Exception:
+            self.errors += 1
+            logger.warning("rate limiter: backend failed, allowing request", exc_info=True)
+            return 0.0
+        if retry_after > 0:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    def stats(self) -> dict[str, Any]:
+        """許可・制限した回数などの統計情報"""
+        stats = {
+            "backend": getattr(self.backend, "name", type(self.backend).__name__),
+            "enabled": self.enabled,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "errors": self.errors,
+        }
+        if isinstance(self.backend, InMemoryBackend):
+            stats["keys"] = len(self.backend)
+        return stats
+
+
+def create_backend() -> RateLimitBackend:
+    """REDIS_URL があれば Redis、なければプロセス内のバックエンドを作成"""
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisBackend(redis.from_url(redis_url))
+    return InMemoryBackend(max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000")))
+
+
+limiter = RateLimiter(
+    create_backend(),
+    enabled=os.getenv("RATE_LIMIT_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on"),
+)
+
+# ==========================================
+# エンドポイントごとの制限（環境変数で調整）
+# ==========================================
+LOGIN_IP_RATE = Rate.parse(os.getenv("RATE_LIMIT_LOGIN_IP", "20/minute"))
+LOGIN_USERNAME_RATE = Rate.parse(os.getenv("RATE_LIMIT_LOGIN_USERNAME", "5/minute"))
+REGISTER_IP_RATE = Rate.parse(os.getenv("RATE_LIMIT_REGISTER_IP", "10/minute"))
+
+# キーに含めるユーザー名の最大長（長い入力でキーが肥大化しないように）
+_MAX_USERNAME_KEY_LENGTH = 64
+
+
+def client_ip(request: Request) -> str:
+    """接続元IP（プロキシ配下では uvicorn --proxy-headers で X-Forwarded-For を反映する）"""
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimit:
+    """
+    ルート単位のレート制限を行う FastAPI 依存関数
+
+    ip_rate は接続元IPごと、username_rate はフォームの username ごとに制限する
+    （ユーザー名ごとの制限は、IPを分散させた特定アカウントへの総当たり対策）
+    """
+
+    def __init__(self, route: str, ip_rate: Rate, username_rate: Rate | None = None,
+                 rate_limiter: RateLimiter | None = None):
+        self.route = route
+        self.ip_rate = ip_rate
+        self.username_rate = username_rate
+        self.rate_limiter = rate_limiter
+
+    async def __call__(self, request: Request) -> None:
+        buckets = [(f"{self.route}:ip:{client_ip(request)}", self.ip_rate)]
+        if self.username_rate is not None:
+            # ボディはエンドポイントの引数の解決時に読み込み済み（Request にキャッシュされる）
+            form = await request.form()
+            username = str(form.get("username") or "").strip().lower()[:_MAX_USERNAME_KEY_LENGTH]
+            if username:
+                buckets.append((f"{self.route}:user:{username}", self.username_rate))
+
+        retry_after = await (self.rate_limiter or limiter).hit(*buckets)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
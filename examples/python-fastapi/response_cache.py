@@ -0,0 +1,225 @@
+"""
+読み取り系エンドポイントのレスポンスキャッシュ
+
+REDIS_URL が設定されていれば Redis に、なければプロセス内のLRUに
+シリアライズ済みレスポンスをTTL付きで保存する。
+
+無効化はタグのバージョン番号で行う。キャッシュキーにタグの現在バージョンを含めておき、
+更新時にバージョンを上げることで、古いキーを列挙・削除せずにまとめて無効化できる。
+（古いエントリはTTLで自然に消える）
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+
+
+class CacheBackend(Protocol):
+    """キャッシュバックエンドのインターフェース"""
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]: ...
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+    async def incr(self, key: str) -> int: ...
+
+
+class InMemoryBackend:
+    """プロセス内LRUバックエンド（Redis未設定時やテストで使用）"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        # タグのバージョンはLRUで追い出すと古いキーが復活するため別管理
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> bytes | None:
+        if key in self._counters:
+            return str(self._counters[key]).encode()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def get(self, key: str) -> bytes | None:
+        with self._lock:
+            return self._get(key)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        with self._lock:
+            return [self._get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._counters.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class RedisBackend:
+    """Redisバックエンド（複数ワーカー・複数プロセスでキャッシュを共有）"""
+
+    name = "redis"
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(key)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return await self.client.mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self.client.set(key, value, ex=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        await self.client.delete(*keys)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+
+class ResponseCache:
+    """
+    タグ単位で無効化できるレスポンスキャッシュ
+
+    バックエンドの障害時はキャッシュミスとして扱い、リクエスト自体は失敗させない
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int = 60, prefix: str = "rc:"):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def use_backend(self, backend: CacheBackend) -> None:
+        """バックエンドを差し替え（テストでフェイクを使う場合など）"""
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def key_for(self, namespace: str, tags: tuple[str, ...], *params: Any) -> str:
+        """タグの現在バージョンを埋め込んだキャッシュキーを作成"""
+        versions: list[bytes | None] = [None] * len(tags)
+        if tags:
+            try:
+                versions = await self.backend.mget([f"{self.prefix}tag:{tag}" for tag in tags])
+            except Exception:
+                self.errors += 1
+                logger.warning("response cache: failed to read tag versions", exc_info=True)
+        version = ".".join((v.decode() if isinstance(v, bytes) else str(v or 0)) for v in versions)
+        return f"{self.prefix}{namespace}:v{version}:" + ":".join(str(p) for p in params)
+
+    async def get(self, key: str) -> bytes | None:
+        """キャッシュ済みの値を取得（なければ None）"""
+        try:
+            value = await self.backend.get(key)
+        except Exception:
+            self.errors += 1
+            logger.warning("response cache: get failed", exc_info=True)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int | None = None) -> None:
+        """値を保存"""
+        try:
+            await self.backend.set(key, value, ttl or self.ttl)
+        except Exception:
+            self.errors += 1
+            logger.warning("response cache: set failed", exc_info=True)
+
+    async def invalidate(self, tags: tuple[str, ...] = (), keys: tuple[str, ...] = ()) -> None:
+        """タグのバージョンを上げ、個別キーを削除して無効化"""
+        try:
+            for tag in tags:
+                await self.backend.incr(f"{self.prefix}tag:{tag}")
+            if keys:
+                await self.backend.delete(*keys)
+        except Exception:
+            self.errors += 1
+            logger.warning("response cache: invalidation failed", exc_info=True)
+
+    def stats(self) -> dict[str, Any]:
+        """ヒット/ミス数などの統計情報"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": getattr(self.backend, "name", type(self.backend).__name__),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_backend() -> CacheBackend:
+    """REDIS_URL があれば Redis、なければプロセス内LRUのバックエンドを作成"""
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisBackend(redis.from_url(redis_url))
+    return InMemoryBackend(max_entries=RESPONSE_CACHE_MAX_ENTRIES)
+
+
+cache = ResponseCache(create_backend(), ttl=RESPONSE_CACHE_TTL)
+
+
+# ==========================================
+# アイテム用キー・タグ
+# ==========================================
+ITEMS_TAG = "items"
+
+
+async def item_detail_key(item_id: int) -> str:
+    """
+    アイテム詳細のキャッシュキー（一覧と同じく items タグのバージョンを含む）
+
+    DBを読む前にキーを決めるため、読み取り中に更新・削除されても、
+    そのあと保存される古い内容は無効化前のキーに入り、以降の読み取りでは使われない
+    """
+    return await cache.key_for("items:detail", (ITEMS_TAG,), item_id)
+
+
+async def invalidate_items() -> None:
+    """アイテムの一覧・検索・集計・詳細（items タグ）をまとめて無効化"""
+    await cache.invalidate(tags=(ITEMS_TAG,))
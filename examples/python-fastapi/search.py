@@ -0,0 +1,96 @@
+"""
+アイテムの全文検索・前方一致検索
+
+- PostgreSQL: title/description から生成する tsvector 列（GINインデックス）で前方一致の全文検索、
+  lower(title) の pg_trgm インデックス（GIN）で表記ゆれ・タイプミスを含むあいまい検索を行う
+- SQLite（テスト・ベンチマーク用）: FTS5 の外部コンテンツテーブル items_fts をトリガーで同期する
+
+どちらもテーブル作成時（metadata.create_all）に DDL イベントで作成される。
+検索結果はスコア（rank）の降順、同点は id の昇順で並べ、(rank, id) のキーセットでページ分割する。
+"""
+import re
+
+from sqlalchemy import DDL, Table, and_, column, event, func, literal_column, or_, select, table
+from sqlalchemy.sql import Select
+
+# 1クエリで扱う検索語の最大数（長い入力で tsquery / FTS5 クエリが肥大化しないように）
+MAX_SEARCH_TERMS = 8
+
+_TERM_RE = re.compile(r"\w+")
+
+_POSTGRES_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE %(table)s ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED",
+    "CREATE INDEX ix_%(table)s_search_vector ON %(table)s USING gin (search_vector)",
+    "CREATE INDEX ix_%(table)s_title_trgm ON %(table)s USING gin (lower(title) gin_trgm_ops)",
+)
+
+_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE %(table)s_fts USING fts5("
+    "title, description, content='%(table)s', content_rowid='id')",
+    "CREATE TRIGGER %(table)s_fts_ai AFTER INSERT ON %(table)s BEGIN "
+    "INSERT INTO %(table)s_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER %(table)s_fts_ad AFTER DELETE ON %(table)s BEGIN "
+    "INSERT INTO %(table)s_fts(%(table)s_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER %(table)s_fts_au AFTER UPDATE ON %(table)s BEGIN "
+    "INSERT INTO %(table)s_fts(%(table)s_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO %(table)s_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+)
+
+
+def install_search_ddl(target: Table) -> None:
+    """テーブル作成・削除時に検索用の列・インデックス・FTS5テーブルを作成・削除する"""
+    for statement in _POSTGRES_DDL:
+        event.listen(target, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in _SQLITE_DDL:
+        event.listen(target, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(
+        target, "before_drop", DDL("DROP TABLE IF EXISTS %(table)s_fts").execute_if(dialect="sqlite")
+    )
+
+
+def search_terms(q: str) -> list[str]:
+    """検索文字列を語に分割（記号は区切りとして扱い、クエリ構文として解釈させない）"""
+    return [term.lower() for term in _TERM_RE.findall(q)][:MAX_SEARCH_TERMS]
+
+
+def build_search_query(
+    dialect_name: str,
+    target: Table,
+    columns,
+    q: str,
+    limit: int,
+    after: tuple[float, int] | None = None,
+) -> Select:
+    """
+    検索クエリを組み立てる（結果の各行は columns + rank）
+
+    すべての語に前方一致する行を返す。PostgreSQL では title のトライグラム類似度でも一致させ、
+    類似度をスコアに加える
+    """
+    terms = search_terms(q)
+    if dialect_name == "sqlite":
+        fts = table(f"{target.name}_fts", column("rowid"))
+        rank = (-func.bm25(literal_column(fts.name))).label("rank")
+        query = (
+            select(*columns, rank)
+            .select_from(target.join(fts, fts.c.rowid == target.c.id))
+            .where(literal_column(fts.name).op("MATCH")(" AND ".join(f'"{term}"*' for term in terms)))
+        )
+    else:
+        tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        vector = literal_column(f"{target.name}.search_vector")
+        title = func.lower(target.c.title)
+        phrase = " ".join(terms)
+        rank = (func.ts_rank(vector, tsquery) + func.similarity(title, phrase)).label("rank")
+        query = select(*columns, rank).where(or_(vector.op("@@")(tsquery), title.op("%")(phrase)))
+
+    if after is not None:
+        after_rank, after_id = after
+        query = query.where(
+            or_(rank < after_rank, and_(rank == after_rank, target.c.id > after_id))
+        )
+    return query.order_by(rank.desc(), target.c.id).limit(limit)
@@ -0,0 +1,43 @@
+"""
+JSONシリアライズの高速化
+
+orjson がインストールされていれば使用し、なければ標準の json にフォールバックする。
+一覧系のレスポンスは ORM オブジェクトや Pydantic モデルを経由せず、
+列単位で SELECT した Row をそのままシリアライズする（DBから読んだ値の再検証は不要）。
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson は任意の依存関係
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """標準で扱えない型の変換（orjson は datetime を自前で処理する）"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """値をJSONのバイト列に変換"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dump_rows(rows: Iterable[Any]) -> bytes:
+    """SELECT した Row のリストを [{列名: 値}, ...] のJSONに変換"""
+    return dumps([row._asdict() for row in rows])
+
+
+# FastAPI の既定レスポンスクラス（orjson があれば ORJSONResponse）
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
@@ -1,28 +1,71 @@
 """
 Pytest configuration and fixtures for FastAPI tests
 """
-import pytest
 import asyncio
+import os
 from typing import AsyncGenerator
+
+import pytest
 from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 
-from main import app
-from database import Base, get_db
+# Minimum bcrypt cost for tests; must be set before main creates its CryptContext
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+
+from main import app, token_cache, user_filter  # noqa: E402
+from metrics import instrument_engine, registry as metrics_registry  # noqa: E402
+from rate_limit import InMemoryBackend as RateLimitBackend, limiter as rate_limiter  # noqa: E402
+from response_cache import InMemoryBackend, cache as response_cache  # noqa: E402
+from database import Base, get_db, get_session_factory  # noqa: E402
 
 # Test database URL (use 'db' service name when running in container)
-TEST_DATABASE_URL = "postgresql+asyncpg://postgres:postgres@db:5432/fastapi_db"
+TEST_DATABASE_URL = os.getenv(
+    "TEST_DATABASE_URL", "postgresql+asyncpg://postgres:postgres@db:5432/fastapi_db"
+)
 
-# Create async engine for tests
-test_engine = create_async_engine(TEST_DATABASE_URL, echo=False)
 
-# Create async session factory
-TestingSessionLocal = sessionmaker(
-    test_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+def worker_database_url(base_url: str) -> str:
+    """Return the database URL for the current pytest-xdist worker (fastapi_db_gw0, ...)"""
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    url = make_url(base_url)
+    if worker:
+        url = url.set(database=f"{url.database}_{worker}")
+    return url.render_as_string(hide_password=False)
+
+
+DATABASE_URL = worker_database_url(TEST_DATABASE_URL)
+
+# Create async engine for tests
+test_engine = create_async_engine(DATABASE_URL, echo=False)
+instrument_engine(test_engine.sync_engine)
+
+
+async def create_schema(url: str) -> None:
+    """Create the worker database if needed and rebuild the schema"""
+    url = make_url(url)
+    admin = create_async_engine(
+        url.set(database="postgres"), isolation_level="AUTOCOMMIT", poolclass=NullPool
+    )
+    try:
+        async with admin.connect() as conn:
+            exists = await conn.scalar(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": url.database}
+            )
+            if not exists:
+                await conn.execute(text(f'CREATE DATABASE "{url.database}"'))
+    finally:
+        await admin.dispose()
+
+    engine = create_async_engine(url, poolclass=NullPool)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+    finally:
+        await engine.dispose()
 
 
 @pytest.fixture(scope="session")
@@ -33,27 +76,63 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(scope="session")
+def database_schema(event_loop):
+    """Create the schema once per test session (per xdist worker)"""
+    event_loop.run_until_complete(create_schema(DATABASE_URL))
+
+
 @pytest.fixture(scope="function")
-async def db_session() -> AsyncGenerator[AsyncSession, None]:
-    """Create a fresh database session for each test"""
-    async with test_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+async def db_connection(database_schema):
+    """Connection holding the per-test transaction, rolled back after the test"""
+    async with test_engine.connect() as conn:
+        transaction = await conn.begin()
+        yield conn
+        await transaction.rollback()
+
+
+@pytest.fixture(scope="function")
+def db_engine(database_schema):
+    """Engine for tests that need independent concurrent transactions (they must roll back themselves)"""
+    return test_engine
 
-    async with TestingSessionLocal() as session:
-        yield session
 
-    async with test_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+@pytest.fixture(scope="function")
+def session_factory(db_connection) -> async_sessionmaker:
+    """Sessions bound to the test connection; commit/rollback only touch a SAVEPOINT"""
+    return async_sessionmaker(
+        bind=db_connection,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+
+
+@pytest.fixture(scope="function")
+async def db_session(session_factory) -> AsyncGenerator[AsyncSession, None]:
+    """Create a database session for each test (changes are rolled back afterwards)"""
+    async with session_factory() as session:
+        yield session
 
 
 @pytest.fixture(scope="function")
-async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
+async def client(
+    db_session: AsyncSession, session_factory: async_sessionmaker
+) -> AsyncGenerator[AsyncClient, None]:
     """Create test client with database session"""
 
     async def override_get_db():
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    # テスト間でユーザーIDが再利用されるためキャッシュを毎回リセット
+    token_cache.clear()
+    user_filter.clear()
+    # Redis の有無に関係なくテストごとに空のプロセス内キャッシュを使う
+    response_cache.use_backend(InMemoryBackend())
+    rate_limiter.use_backend(RateLimitBackend())
+    metrics_registry.reset()
 
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
@@ -96,4 +175,4 @@ async def authenticated_client(
         "token": {"access_token": access_token, "token_type": "bearer"}
     }
 
-    # Cleanup is handled by db_session fixture
+    # Cleanup is handled by the db_connection rollback
@@ -50,6 +50,17 @@ class TestUserRegistration:
         assert response.status_code == 400
         assert "already registered" in response.json()["detail"].lower()
 
+    async def test_register_duplicate_email(
+        self, client: AsyncClient, test_user_data: dict
+    ):
+        """Should report which unique field conflicted"""
+        await client.post("/users", json=test_user_data)
+
+        response = await client.post("/users", json={**test_user_data, "username": "someone_else"})
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Email already registered"
+
     async def test_register_invalid_email(self, client: AsyncClient):
         """Should fail with invalid email format"""
         invalid_data = {
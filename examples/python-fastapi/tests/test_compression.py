@@ -0,0 +1,98 @@
+"""
+Response compression tests for FastAPI
+"""
+import gzip
+
+import pytest
+from httpx import AsyncClient
+
+from compression import choose_encoding
+
+
+class TestChooseEncoding:
+    """Unit tests for Accept-Encoding negotiation"""
+
+    @pytest.mark.parametrize(
+        ("accept_encoding", "expected"),
+        [
+            ("gzip", "gzip"),
+            ("gzip, br", "br"),
+            ("br;q=0.5, gzip", "gzip"),
+            ("br;q=0, gzip;q=0", None),
+            ("*", "br"),
+            ("*, br;q=0", "gzip"),
+            ("identity", None),
+        ],
+    )
+    def test_choose_encoding(self, accept_encoding, expected):
+        """Should honour q-values and prefer the server order on ties"""
+        assert choose_encoding(accept_encoding, ("br", "gzip")) == expected
+
+
+@pytest.mark.asyncio
+class TestCompressionMiddleware:
+    """Test gzip compression of API responses"""
+
+    async def create_items(self, client, count=40):
+        items = [
+            {"title": f"Compressible item {i}", "description": "x" * 50, "price": 1.0}
+            for i in range(count)
+        ]
+        # 作成レスポンス自体は圧縮させない（圧縮メトリクスの件数に含めないため）
+        response = await client.post(
+            "/items/bulk", json={"items": items}, headers={"Accept-Encoding": "identity"}
+        )
+        assert response.status_code == 201
+
+    async def test_large_json_is_gzipped(self, authenticated_client: tuple[AsyncClient, dict]):
+        """Should gzip list responses above the size threshold"""
+        client, _ = authenticated_client
+        await self.create_items(client)
+
+        response = await client.get("/items", params={"limit": 100}, headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(response.content)
+        assert len(response.json()) == 40
+
+    async def test_small_and_unaccepted_responses_are_not_compressed(
+        self, authenticated_client: tuple[AsyncClient, dict]
+    ):
+        """Should leave small bodies and clients without gzip support alone"""
+        client, _ = authenticated_client
+        await self.create_items(client)
+
+        small = await client.get("/health", headers={"Accept-Encoding": "gzip"})
+        identity = await client.get("/items", params={"limit": 100}, headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in small.headers
+        assert "content-encoding" not in identity.headers
+        assert len(identity.json()) == 40
+
+    async def test_streamed_export_is_compressed(self, authenticated_client: tuple[AsyncClient, dict]):
+        """Should compress streamed exports chunk by chunk without a Content-Length"""
+        client, _ = authenticated_client
+        await self.create_items(client)
+
+        async with client.stream(
+            "GET", "/items/export", params={"format": "ndjson"}, headers={"Accept-Encoding": "gzip"}
+        ) as response:
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert len(gzip.decompress(raw).splitlines()) == 40
+
+    async def test_compression_metrics(self, authenticated_client: tuple[AsyncClient, dict]):
+        """Should record bytes and CPU time per encoding"""
+        client, _ = authenticated_client
+        await self.create_items(client)
+        await client.get("/items", params={"limit": 100}, headers={"Accept-Encoding": "gzip"})
+
+        text = (await client.get("/metrics")).text
+
+        assert 'http_response_compression_input_bytes_total{encoding="gzip"}' in text
+        assert 'http_response_compression_ratio_count{encoding="gzip"} 1' in text
+        assert 'http_response_compression_cpu_seconds_count{encoding="gzip"} 1' in text
@@ -0,0 +1,47 @@
+"""
+Bulk seed data generation tests for FastAPI
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+import init_db
+
+NOW = datetime(2025, 6, 1)
+
+
+class TestSeedGeneration:
+    """Unit tests for the init_db.py row generators"""
+
+    def test_chunks_cover_range(self):
+        """Should split an id range into contiguous chunks"""
+        assert init_db.chunks(2, 5, 2) == [(2, 2), (4, 2), (6, 1)]
+        assert init_db.chunks(1, 0, 10) == []
+
+    def test_users_share_hash_and_are_unique(self):
+        """Should reuse the given hash and give every user a unique name and email"""
+        rows = init_db.generate_users(10, 100, 1, "hash", NOW, 30)
+        users = [dict(zip(init_db.USER_COLUMNS, row)) for row in rows]
+
+        assert [user["id"] for user in users] == list(range(10, 110))
+        assert {user["hashed_password"] for user in users} == {"hash"}
+        assert len({user["username"] for user in users}) == 100
+        assert all(NOW - timedelta(days=30) <= user["created_at"] <= NOW for user in users)
+
+    def test_items_are_deterministic_per_chunk(self):
+        """Should produce the same rows for the same seed and chunk"""
+        args = (1, 50, 7, 2, 10, NOW, 30)
+
+        assert init_db.generate_items(*args) == init_db.generate_items(*args)
+        assert init_db.generate_items(*args) != init_db.generate_items(1, 50, 8, 2, 10, NOW, 30)
+
+    def test_item_distributions(self):
+        """Should skew owners toward low ids and keep prices and titles within column limits"""
+        rows = init_db.generate_items(1, 5000, 42, 100, 50, NOW, 30)
+        items = [dict(zip(init_db.ITEM_COLUMNS, row)) for row in rows]
+        owners = Counter(item["owner_id"] for item in items)
+
+        assert set(owners) <= set(range(100, 150))
+        assert owners[100] > owners[149] * 5
+        assert all(item["price"] >= 0.01 for item in items)
+        assert all(len(item["title"]) <= 100 for item in items)
+        assert all(item["created_at"] == item["updated_at"] for item in items)
@@ -1,8 +1,18 @@
 """
 Items API endpoint tests for FastAPI
 """
+import csv
+import io
+import json
+from datetime import datetime
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
 
 
 @pytest.mark.asyncio
@@ -71,6 +81,58 @@ class TestCreateItem:
         assert data["description"] is None
 
 
+@pytest.mark.asyncio
+class TestCreateItemsBulk:
+    """Test POST /items/bulk endpoint"""
+
+    async def test_bulk_create_success(self, authenticated_client):
+        """Should create every item in one request"""
+        client, auth_data = authenticated_client
+        items = [{"title": f"Bulk {i}", "price": 1.0 + i} for i in range(5)]
+
+        response = await client.post("/items/bulk", json={"items": items})
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["errors"] == []
+        assert sorted(item["title"] for item in data["created"]) == [f"Bulk {i}" for i in range(5)]
+        assert all(item["owner_id"] == auth_data["user"]["id"] for item in data["created"])
+
+        listed = await client.get("/items", params={"limit": 10})
+        assert len(listed.json()) == 5
+
+    async def test_bulk_create_atomic_rejects_all(self, authenticated_client):
+        """Should create nothing when any row is invalid in atomic mode"""
+        client, _ = authenticated_client
+        items = [{"title": "Good", "price": 1.0}, {"title": "", "price": -1}]
+
+        response = await client.post("/items/bulk", json={"items": items})
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["index"] == 1
+
+        listed = await client.get("/items")
+        assert listed.json() == []
+
+    async def test_bulk_create_partial(self, authenticated_client):
+        """Should create valid rows and report invalid ones in partial mode"""
+        client, _ = authenticated_client
+        items = [{"title": "Good", "price": 1.0}, {"price": 2.0}, "not an object"]
+
+        response = await client.post("/items/bulk", json={"items": items, "mode": "partial"})
+
+        assert response.status_code == 201
+        data = response.json()
+        assert [item["title"] for item in data["created"]] == ["Good"]
+        assert [error["index"] for error in data["errors"]] == [1, 2]
+
+    async def test_bulk_create_without_auth(self, client: AsyncClient):
+        """Should fail without authentication"""
+        response = await client.post("/items/bulk", json={"items": [{"title": "x", "price": 1.0}]})
+
+        assert response.status_code == 401
+
+
 @pytest.mark.asyncio
 class TestGetItems:
     """Test GET /items endpoint"""
@@ -126,6 +188,219 @@ class TestGetItems:
         if len(data) > 0 and len(data2) > 0:
             assert data[0]["id"] != data2[0]["id"]
 
+    async def test_get_items_cursor_pagination(self, authenticated_client):
+        """Should walk all items with keyset cursors in (created_at, id) order"""
+        client, _ = authenticated_client
+
+        for i in range(5):
+            await client.post("/items", json={"title": f"Item {i}", "price": 10.0})
+
+        seen = []
+        response = await client.get("/items", params={"cursor": "", "limit": 2})
+        while True:
+            assert response.status_code == 200
+            seen.extend(item["id"] for item in response.json())
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if not next_cursor:
+                break
+            response = await client.get("/items", params={"cursor": next_cursor, "limit": 2})
+
+        assert len(seen) == 5
+        assert seen == sorted(seen)
+
+    async def test_get_items_invalid_cursor(self, authenticated_client):
+        """Should reject malformed cursors"""
+        client, _ = authenticated_client
+
+        response = await client.get("/items", params={"cursor": "not-a-cursor"})
+
+        assert response.status_code == 400
+        assert "cursor" in response.json()["detail"].lower()
+
+
+@pytest.mark.asyncio
+class TestSearchItems:
+    """Test GET /items/search endpoint"""
+
+    async def test_search_prefix_matches_title_and_description(self, authenticated_client):
+        """Should match every word as a prefix of title or description words"""
+        client, _ = authenticated_client
+        await client.post("/items", json={"title": "Blue widget", "price": 10.0})
+        await client.post("/items", json={"title": "Gadget", "description": "Widget accessory", "price": 5.0})
+        await client.post("/items", json={"title": "Unrelated", "price": 1.0})
+
+        response = await client.get("/items/search", params={"q": "widg"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert {item["title"] for item in data} == {"Blue widget", "Gadget"}
+        assert all("rank" in item for item in data)
+        assert [item["rank"] for item in data] == sorted((item["rank"] for item in data), reverse=True)
+
+    async def test_search_cursor_pagination(self, authenticated_client):
+        """Should walk all matches with (rank, id) cursors without duplicates"""
+        client, _ = authenticated_client
+        for i in range(5):
+            await client.post("/items", json={"title": f"Lamp {i}", "price": 10.0})
+
+        seen = []
+        response = await client.get("/items/search", params={"q": "lamp", "limit": 2})
+        while True:
+            assert response.status_code == 200
+            seen.extend(item["id"] for item in response.json())
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if not next_cursor:
+                break
+            response = await client.get(
+                "/items/search", params={"q": "lamp", "limit": 2, "cursor": next_cursor}
+            )
+
+        assert len(seen) == len(set(seen)) == 5
+
+    async def test_search_rejects_empty_query(self, authenticated_client):
+        """Should reject queries without any word characters"""
+        client, _ = authenticated_client
+
+        response = await client.get("/items/search", params={"q": "!!!"})
+
+        assert response.status_code == 400
+
+    async def test_search_invalid_cursor(self, authenticated_client):
+        """Should reject malformed cursors"""
+        client, _ = authenticated_client
+
+        response = await client.get("/items/search", params={"q": "lamp", "cursor": "not-a-cursor"})
+
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+class TestItemStats:
+    """Test GET /items/stats endpoint"""
+
+    async def test_stats_follow_item_changes(self, authenticated_client, db_session):
+        """Should keep totals, per-owner and daily buckets in step with writes"""
+        client, auth = authenticated_client
+        for price in (5.0, 15.0):
+            await client.post("/items", json={"title": "Item", "price": price})
+        await client.post("/items/bulk", json={"items": [{"title": "Bulk", "price": 4.0}]})
+
+        data = (await client.get("/items/stats")).json()
+        assert (data["item_count"], data["price_total"], data["avg_price"]) == (3, 24.0, 8.0)
+        assert data["owners"] == [
+            {"owner_id": auth["user"]["id"], "item_count": 3, "price_total": 24.0, "avg_price": 8.0}
+        ]
+        assert [day["item_count"] for day in data["daily"]] == [3]
+
+        first_id = (await client.get("/items")).json()[0]["id"]
+        await crud.delete_item(db_session, first_id)
+
+        data = (await client.get("/items/stats")).json()
+        assert (data["item_count"], data["price_total"]) == (2, 19.0)
+
+    async def test_stats_rebuild_matches_incremental(self, authenticated_client, db_session):
+        """Should produce the same numbers when rebuilt from the items table"""
+        client, _ = authenticated_client
+        for price in (1.5, 2.5):
+            await client.post("/items", json={"title": "Item", "price": price})
+        incremental = await crud.get_item_stats(db_session)
+
+        await crud.rebuild_item_stats(db_session)
+
+        assert await crud.get_item_stats(db_session) == incremental
+
+    async def test_daily_shards_do_not_block_concurrent_writers(self, db_engine, monkeypatch):
+        """Should let open transactions add to the same day without waiting on each other's row lock"""
+        today = datetime.utcnow().date()
+        async with db_engine.connect() as first, db_engine.connect() as second:
+            sessions = []
+            for name, conn in (("first", first), ("second", second)):
+                session = AsyncSession(bind=conn)
+                await conn.begin()
+                await conn.execute(text("SET LOCAL lock_timeout = '200ms'"))
+                owner_id = await conn.scalar(text(
+                    "INSERT INTO users (email, username, hashed_password, is_active, created_at, updated_at) "
+                    "VALUES (:name || '@example.com', :name, 'x', true, now(), now()) RETURNING id"
+                ), {"name": f"stats_{name}"})
+                sessions.append((session, owner_id))
+
+            try:
+                for shard, (session, owner_id) in enumerate(sessions):
+                    monkeypatch.setattr(crud, "_daily_shard", lambda shard=shard: shard)
+                    await crud.apply_item_stats(session, [(owner_id, today, 1, 1.0)])
+
+                # Without sharding the second writer waits for the first one's uncommitted row
+                monkeypatch.setattr(crud, "_daily_shard", lambda: 0)
+                session, owner_id = sessions[1]
+                with pytest.raises(DBAPIError, match="lock timeout"):
+                    await crud.apply_item_stats(session, [(owner_id, today, 1, 1.0)])
+            finally:
+                await first.rollback()
+                await second.rollback()
+
+    async def test_stats_sum_daily_shards(self, authenticated_client, db_session, monkeypatch):
+        """Should report one daily bucket summed across shards"""
+        client, _ = authenticated_client
+        for shard, price in enumerate((1.0, 2.0, 3.0)):
+            monkeypatch.setattr(crud, "_daily_shard", lambda shard=shard: shard)
+            await client.post("/items", json={"title": "Item", "price": price})
+
+        data = (await client.get("/items/stats")).json()
+
+        assert [(day["item_count"], day["price_total"]) for day in data["daily"]] == [(3, 6.0)]
+
+    async def test_stats_empty(self, authenticated_client):
+        """Should return zero totals without items"""
+        client, _ = authenticated_client
+
+        data = (await client.get("/items/stats")).json()
+
+        assert (data["item_count"], data["avg_price"], data["owners"], data["daily"]) == (0, None, [], [])
+
+
+@pytest.mark.asyncio
+class TestExportItems:
+    """Test GET /items/export endpoint"""
+
+    async def test_export_ndjson(self, authenticated_client):
+        """Should stream every item as one JSON object per line"""
+        client, _ = authenticated_client
+        for i in range(3):
+            await client.post("/items", json={"title": f"Item {i}", "price": 10.0})
+
+        response = await client.get("/items/export")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["title"] for line in lines] == ["Item 0", "Item 1", "Item 2"]
+
+    async def test_export_csv(self, authenticated_client):
+        """Should stream every item as CSV with a header row"""
+        client, _ = authenticated_client
+        for i in range(2):
+            await client.post("/items", json={"title": f"Item {i}", "price": 10.0})
+
+        response = await client.get("/items/export", params={"format": "csv"})
+
+        assert response.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["title"] for row in rows] == ["Item 0", "Item 1"]
+
+    async def test_export_invalid_format(self, authenticated_client):
+        """Should reject unknown formats"""
+        client, _ = authenticated_client
+
+        response = await client.get("/items/export", params={"format": "xml"})
+
+        assert response.status_code == 400
+
+    async def test_export_without_auth(self, client: AsyncClient):
+        """Should fail without authentication"""
+        response = await client.get("/items/export")
+
+        assert response.status_code == 401
+
 
 @pytest.mark.asyncio
 class TestGetItemById:
@@ -152,6 +427,15 @@ class TestGetItemById:
         assert data["title"] == "Specific Item"
         assert float(data["price"]) == 123.45
 
+    async def test_get_item_matches_create_response(self, authenticated_client):
+        """Should return the column-projected item in the same shape as the Item schema"""
+        client, _ = authenticated_client
+
+        created = (await client.post("/items", json={"title": "Projected", "price": 5.0})).json()
+        response = await client.get(f"/items/{created['id']}")
+
+        assert response.json() == created
+
     async def test_get_item_nonexistent(self, authenticated_client):
         """Should return 404 for non-existent item"""
         client, _ = authenticated_client
@@ -168,6 +452,74 @@ class TestGetItemById:
         assert response.status_code == 401
 
 
+@pytest.mark.asyncio
+class TestItemConditionalRequests:
+    """Test ETag / If-None-Match / If-Match handling on /items/{item_id}"""
+
+    async def create_item(self, client) -> int:
+        response = await client.post("/items", json={"title": "Tagged", "price": 10.0})
+        return response.json()["id"]
+
+    async def test_if_none_match_returns_304(self, authenticated_client):
+        """Should answer 304 with an empty body when the ETag still matches"""
+        client, _ = authenticated_client
+        item_id = await self.create_item(client)
+
+        first = await client.get(f"/items/{item_id}")
+        etag = first.headers["ETag"]
+        second = await client.get(f"/items/{item_id}", headers={"If-None-Match": etag})
+
+        assert etag.startswith('W/"')
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["ETag"] == etag
+
+    async def test_update_changes_etag(self, authenticated_client):
+        """Should return 200 with a new ETag after the item is updated"""
+        client, _ = authenticated_client
+        item_id = await self.create_item(client)
+        etag = (await client.get(f"/items/{item_id}")).headers["ETag"]
+
+        updated = await client.put(
+            f"/items/{item_id}", json={"price": 12.5}, headers={"If-Match": etag}
+        )
+        response = await client.get(f"/items/{item_id}", headers={"If-None-Match": etag})
+
+        assert updated.status_code == 200
+        assert updated.headers["ETag"] != etag
+        assert response.status_code == 200
+        assert response.headers["ETag"] == updated.headers["ETag"]
+        assert float(response.json()["price"]) == 12.5
+
+    async def test_stale_if_match_returns_412(self, authenticated_client):
+        """Should reject an update made against an outdated ETag"""
+        client, _ = authenticated_client
+        item_id = await self.create_item(client)
+        etag = (await client.get(f"/items/{item_id}")).headers["ETag"]
+        await client.put(f"/items/{item_id}", json={"title": "First"}, headers={"If-Match": etag})
+
+        response = await client.put(
+            f"/items/{item_id}", json={"title": "Second"}, headers={"If-Match": etag}
+        )
+
+        assert response.status_code == 412
+        assert (await client.get(f"/items/{item_id}")).json()["title"] == "First"
+
+    async def test_update_requires_owner(self, authenticated_client):
+        """Should forbid updates by users other than the owner"""
+        client, _ = authenticated_client
+        item_id = await self.create_item(client)
+        other = await client.post(
+            "/users",
+            json={"username": "otheruser", "email": "other@example.com", "password": "password123"},
+        )
+        headers = {"Authorization": f"Bearer {other.json()['access_token']}"}
+
+        response = await client.put(f"/items/{item_id}", json={"title": "Hijack"}, headers=headers)
+
+        assert response.status_code == 403
+
+
 @pytest.mark.asyncio
 class TestDatabaseConstraints:
     """Test database constraints and relationships"""
@@ -0,0 +1,78 @@
+"""
+Request instrumentation tests for FastAPI
+"""
+import pytest
+from httpx import AsyncClient
+
+from metrics import MetricsRegistry, RequestStats
+
+
+class TestMetricsRegistry:
+    """Unit tests for MetricsRegistry"""
+
+    def test_render_prometheus_histogram(self):
+        """Should render cumulative buckets, sum and count per route"""
+        registry = MetricsRegistry()
+        registry.observe("GET", "/items", 200, 0.02, RequestStats(sql_count=2, sql_seconds=0.004), 512)
+        registry.observe("GET", "/items", 200, 0.2, RequestStats(sql_count=12, sql_seconds=0.1), 2048)
+
+        text = registry.render()
+
+        assert 'http_requests_total{method="GET",route="/items",status="200"} 2' in text
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/items",le="0.025"} 1' in text
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/items",le="+Inf"} 2' in text
+        assert 'http_request_db_statements_bucket{method="GET",route="/items",le="10"} 1' in text
+        assert 'http_request_db_statements_bucket{method="GET",route="/items",le="20"} 2' in text
+        assert 'http_response_size_bytes_sum{method="GET",route="/items"} 2560' in text
+
+    def test_label_values_are_escaped(self):
+        """Should escape quotes in label values"""
+        registry = MetricsRegistry()
+        registry.observe("GET", 'a"b', 404, 0.001, RequestStats(), 0)
+
+        assert 'route="a\\"b"' in registry.render()
+
+
+@pytest.mark.asyncio
+class TestMetricsEndpoint:
+    """Test request instrumentation middleware"""
+
+    async def test_server_timing_header(self, authenticated_client: tuple[AsyncClient, dict]):
+        """Should report app and db timings in Server-Timing"""
+        client, _ = authenticated_client
+
+        response = await client.get("/items")
+
+        assert response.status_code == 200
+        server_timing = response.headers["server-timing"]
+        assert server_timing.startswith("app;dur=")
+        assert "db;dur=" in server_timing
+        assert "queries" in server_timing
+
+    async def test_metrics_group_by_route_template(self, authenticated_client: tuple[AsyncClient, dict]):
+        """Should aggregate by route template and count SQL statements"""
+        client, _ = authenticated_client
+        created = await client.post("/items", json={"title": "Metric Item", "price": 10.0})
+        await client.get(f"/items/{created.json()['id']}")
+
+        response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"} 1' in text
+        assert 'http_request_db_statements_count{method="POST",route="/items"} 1' in text
+        sql_sum = next(
+            line for line in text.splitlines()
+            if line.startswith('http_request_db_statements_sum{method="POST",route="/items"}')
+        )
+        assert float(sql_sum.split()[-1]) >= 1
+
+    async def test_unmatched_routes_share_label(self, client: AsyncClient):
+        """Should not create a label per unknown path"""
+        await client.get("/no-such-path-1")
+        await client.get("/no-such-path-2")
+
+        response = await client.get("/metrics")
+
+        assert 'http_requests_total{method="GET",route="unmatched",status="404"} 2' in response.text
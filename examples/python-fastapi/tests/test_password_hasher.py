@@ -0,0 +1,82 @@
+"""
+Password hashing executor tests for FastAPI
+"""
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+class BlockingContext:
+    """CryptContext stand-in that blocks until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def hash(self, password: str) -> str:
+        self.release.wait(timeout=5)
+        return f"hashed:{password}"
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        self.release.wait(timeout=5)
+        return hashed_password == f"hashed:{plain_password}"
+
+
+@pytest.mark.asyncio
+class TestPasswordHasher:
+    """Test PasswordHasher"""
+
+    async def test_hash_and_verify_with_bcrypt(self):
+        """Should hash and verify in worker threads"""
+        hasher = PasswordHasher(CryptContext(schemes=["bcrypt"], bcrypt__rounds=4), max_workers=2)
+        try:
+            hashed = await hasher.hash("password123")
+
+            assert hashed.startswith("$2b$")
+            assert await hasher.verify("password123", hashed) is True
+            assert await hasher.verify("wrongpassword", hashed) is False
+            assert hasher.stats()["completed"] == 3
+        finally:
+            hasher.shutdown()
+
+    async def test_event_loop_not_blocked(self):
+        """Should keep the event loop responsive while hashing"""
+        context = BlockingContext()
+        hasher = PasswordHasher(context, max_workers=1)
+        try:
+            pending = asyncio.ensure_future(hasher.hash("password123"))
+            await asyncio.sleep(0.01)  # Loop still runs while the hash is blocked
+
+            assert not pending.done()
+            assert hasher.stats()["running"] == 1
+
+            context.release.set()
+            assert await pending == "hashed:password123"
+        finally:
+            hasher.shutdown()
+
+    async def test_queue_depth_and_rejection(self):
+        """Should report queue depth and reject beyond max_queue"""
+        context = BlockingContext()
+        hasher = PasswordHasher(context, max_workers=1, max_queue=2)
+        try:
+            tasks = [asyncio.ensure_future(hasher.hash(f"pw{i}")) for i in range(2)]
+            await asyncio.sleep(0.01)
+
+            assert hasher.stats()["queue_depth"] == 1
+            assert hasher.stats()["running"] == 1
+
+            tasks.append(asyncio.ensure_future(hasher.hash("pw2")))
+            await asyncio.sleep(0.01)
+            with pytest.raises(PasswordHasherBusy):
+                await hasher.hash("pw3")
+            assert hasher.stats()["rejected"] == 1
+
+            context.release.set()
+            await asyncio.gather(*tasks)
+            assert hasher.stats()["queue_depth"] == 0
+        finally:
+            hasher.shutdown()
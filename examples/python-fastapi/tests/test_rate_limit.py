@@ -0,0 +1,119 @@
+"""
+Rate limiting tests for FastAPI
+"""
+import pytest
+from httpx import AsyncClient
+
+import main
+from rate_limit import InMemoryBackend, Rate, limiter
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRate:
+    """Unit tests for Rate.parse"""
+
+    def test_parse(self):
+        """Should turn "count/period" into capacity and refill rate"""
+        assert Rate.parse("5/minute") == Rate(capacity=5, per_second=5 / 60)
+        assert Rate.parse("2/second") == Rate(capacity=2, per_second=2.0)
+
+    @pytest.mark.parametrize("value", ["five/minute", "5/fortnight", "0/minute"])
+    def test_parse_invalid(self, value):
+        """Should reject malformed rates"""
+        with pytest.raises(ValueError):
+            Rate.parse(value)
+
+
+@pytest.mark.asyncio
+class TestInMemoryBackend:
+    """Unit tests for the in-process token bucket"""
+
+    async def test_burst_then_refill(self):
+        """Should allow a burst of capacity and then one request per refill interval"""
+        clock = FakeClock()
+        backend = InMemoryBackend(clock=clock)
+        rate = Rate.parse("3/minute")
+
+        assert [await backend.take("k", rate) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert await backend.take("k", rate) == pytest.approx(20.0)
+
+        clock.now += 20
+        assert await backend.take("k", rate) == 0.0
+        assert await backend.take("other", rate) == 0.0
+
+    async def test_idle_keys_are_evicted(self):
+        """Should drop buckets that have refilled completely"""
+        clock = FakeClock()
+        backend = InMemoryBackend(clock=clock)
+        rate = Rate.parse("2/minute")
+        await backend.take("a", rate)
+        await backend.take("b", rate)
+
+        clock.now += 31
+        await backend.take("c", rate)
+
+        assert len(backend) == 1
+
+    async def test_max_keys(self):
+        """Should keep at most max_keys buckets"""
+        backend = InMemoryBackend(max_keys=2, clock=FakeClock())
+        for key in ("a", "b", "c"):
+            await backend.take(key, Rate.parse("1/minute"))
+
+        assert len(backend) == 2
+
+
+@pytest.mark.asyncio
+class TestLoginRateLimit:
+    """Test 429 responses from /token and /users"""
+
+    async def test_login_limited_per_username(self, client: AsyncClient, test_user_data: dict, monkeypatch):
+        """Should return 429 with Retry-After before verifying the password"""
+        await client.post("/users", json=test_user_data)
+        verified = []
+
+        async def fake_verify(plain, hashed):
+            verified.append(plain)
+            return False
+
+        monkeypatch.setattr(main, "verify_password", fake_verify)
+        form = {"username": test_user_data["username"], "password": "wrong"}
+        statuses = [(await client.post("/token", data=form)).status_code for _ in range(6)]
+        limited = await client.post("/token", data=form)
+
+        assert statuses[:5] == [401] * 5
+        assert statuses[5] == 429
+        assert limited.status_code == 429
+        assert int(limited.headers["Retry-After"]) > 0
+        assert len(verified) == 5
+        assert limiter.stats()["limited"] == 2
+
+    async def test_other_username_not_limited(self, client: AsyncClient):
+        """Should keep per-username buckets independent"""
+        for _ in range(5):
+            await client.post("/token", data={"username": "victim", "password": "wrong"})
+
+        response = await client.post("/token", data={"username": "someone", "password": "wrong"})
+
+        assert response.status_code == 401
+
+    async def test_registration_limited_per_ip(self, client: AsyncClient):
+        """Should limit registrations from one address"""
+        statuses = [
+            (await client.post("/users", json={
+                "username": f"user{i}", "email": f"user{i}@example.com", "password": "password123",
+            })).status_code
+            for i in range(11)
+        ]
+
+        assert statuses[:10] == [201] * 10
+        assert statuses[10] == 429
@@ -0,0 +1,116 @@
+"""
+Response cache tests for FastAPI
+"""
+import pytest
+
+import crud
+from response_cache import InMemoryBackend, ResponseCache, cache
+
+
+class FailingBackend(InMemoryBackend):
+    """Backend that simulates an unreachable Redis"""
+
+    async def get(self, key):
+        raise ConnectionError("redis down")
+
+    async def mget(self, keys):
+        raise ConnectionError("redis down")
+
+
+@pytest.mark.asyncio
+class TestResponseCache:
+    """Unit tests for ResponseCache"""
+
+    async def test_tag_invalidation_changes_key(self):
+        """Should produce a new key after the tag is invalidated"""
+        response_cache = ResponseCache(InMemoryBackend())
+        key = await response_cache.key_for("items:list", ("items",), 0, 10)
+        await response_cache.set(key, b"[]")
+
+        assert await response_cache.get(key) == b"[]"
+
+        await response_cache.invalidate(tags=("items",))
+        new_key = await response_cache.key_for("items:list", ("items",), 0, 10)
+
+        assert new_key != key
+        assert await response_cache.get(new_key) is None
+
+    async def test_lru_eviction(self):
+        """Should evict least recently used entries beyond max_entries"""
+        backend = InMemoryBackend(max_entries=2)
+        await backend.set("a", b"1", ttl=60)
+        await backend.set("b", b"2", ttl=60)
+        await backend.get("a")
+        await backend.set("c", b"3", ttl=60)
+
+        assert await backend.get("b") is None
+        assert await backend.get("a") == b"1"
+
+    async def test_backend_failure_is_a_miss(self):
+        """Should treat backend errors as cache misses"""
+        response_cache = ResponseCache(FailingBackend())
+        key = await response_cache.key_for("items:list", ("items",), 0, 10)
+
+        assert await response_cache.get(key) is None
+        assert response_cache.stats()["errors"] == 2
+
+
+@pytest.mark.asyncio
+class TestItemResponseCache:
+    """Test caching on item read endpoints"""
+
+    async def test_list_cached_and_invalidated_on_create(self, authenticated_client):
+        """Should serve repeated list reads from cache until an item is created"""
+        client, _ = authenticated_client
+        await client.post("/items", json={"title": "First", "price": 10.0})
+
+        first = await client.get("/items")
+        second = await client.get("/items")
+        assert second.json() == first.json()
+        assert cache.stats()["hits"] == 1
+
+        await client.post("/items", json={"title": "Second", "price": 10.0})
+        third = await client.get("/items")
+
+        assert [item["title"] for item in third.json()] == ["First", "Second"]
+
+    async def test_cursor_header_cached(self, authenticated_client):
+        """Should replay X-Next-Cursor from the cached entry"""
+        client, _ = authenticated_client
+        for i in range(3):
+            await client.post("/items", json={"title": f"Item {i}", "price": 10.0})
+
+        first = await client.get("/items", params={"cursor": "", "limit": 2})
+        second = await client.get("/items", params={"cursor": "", "limit": 2})
+
+        assert first.headers["X-Next-Cursor"]
+        assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+    async def test_detail_cached(self, authenticated_client):
+        """Should serve repeated detail reads from cache"""
+        client, _ = authenticated_client
+        item_id = (await client.post("/items", json={"title": "Cached", "price": 10.0})).json()["id"]
+
+        first = await client.get(f"/items/{item_id}")
+        second = await client.get(f"/items/{item_id}")
+
+        assert second.json() == first.json()
+        assert cache.stats()["hits"] == 1
+
+    async def test_detail_stored_by_racing_reader_is_not_served(self, authenticated_client, monkeypatch):
+        """Should ignore a stale detail entry stored after the item was updated and invalidated"""
+        client, _ = authenticated_client
+        item_id = (await client.post("/items", json={"title": "Old", "price": 10.0})).json()["id"]
+        get_item_row = crud.get_item_row
+
+        async def racing_get_item_row(db, row_id):
+            # The reader has read the old row; an update commits and invalidates before it stores it
+            row = await get_item_row(db, row_id)
+            monkeypatch.setattr(crud, "get_item_row", get_item_row)
+            await crud.update_item(db, row_id, title="New")
+            return row
+
+        monkeypatch.setattr(crud, "get_item_row", racing_get_item_row)
+
+        assert (await client.get(f"/items/{item_id}")).json()["title"] == "Old"
+        assert (await client.get(f"/items/{item_id}")).json()["title"] == "New"
@@ -0,0 +1,46 @@
+"""
+JSON serialization tests for FastAPI
+"""
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy.engine import result_tuple
+
+import serialization
+
+
+def make_rows():
+    """Build Row objects without touching the database"""
+    Row = result_tuple(["id", "title", "price", "created_at"])
+    return [
+        Row((1, "Café", 9.5, datetime(2025, 1, 2, 3, 4, 5, 123456))),
+        Row((2, "Plain", 10.0, datetime(2025, 1, 2, 3, 4, 6))),
+    ]
+
+
+class TestSerialization:
+    """Unit tests for serialization helpers"""
+
+    def test_dump_rows(self):
+        """Should serialize rows as objects keyed by column name"""
+        data = json.loads(serialization.dump_rows(make_rows()))
+
+        assert data == [
+            {"id": 1, "title": "Café", "price": 9.5, "created_at": "2025-01-02T03:04:05.123456"},
+            {"id": 2, "title": "Plain", "price": 10.0, "created_at": "2025-01-02T03:04:06"},
+        ]
+
+    def test_fallback_without_orjson(self, monkeypatch):
+        """Should produce identical JSON with the standard library"""
+        expected = json.loads(serialization.dump_rows(make_rows()))
+        monkeypatch.setattr(serialization, "orjson", None)
+
+        assert json.loads(serialization.dump_rows(make_rows())) == expected
+
+    def test_unsupported_type(self, monkeypatch):
+        """Should raise TypeError for values that are not JSON serializable"""
+        monkeypatch.setattr(serialization, "orjson", None)
+
+        with pytest.raises(TypeError):
+            serialization.dumps({"value": object()})
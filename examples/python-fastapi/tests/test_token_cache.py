@@ -0,0 +1,121 @@
+"""
+Verified token cache tests for FastAPI
+"""
+import pytest
+from httpx import AsyncClient
+
+from main import token_cache
+from token_cache import CachedUser, TokenCache
+
+
+class FakeClock:
+    """Controllable clock for expiry tests"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_user(user_id: int = 1) -> CachedUser:
+    return CachedUser(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com", is_active=True)
+
+
+class TestTokenCache:
+    """Unit tests for TokenCache"""
+
+    def test_hit_and_miss_counters(self):
+        """Should count misses before set and hits after"""
+        cache = TokenCache(max_size=10, ttl_seconds=30, clock=FakeClock())
+
+        assert cache.get("token-a") is None
+        cache.set("token-a", {"sub": "user1"}, make_user())
+        entry = cache.get("token-a")
+
+        assert entry is not None
+        assert entry.user.username == "user1"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_expires_after_ttl(self):
+        """Should expire entries after the configured TTL"""
+        clock = FakeClock()
+        cache = TokenCache(max_size=10, ttl_seconds=30, clock=clock)
+        cache.set("token-a", {"sub": "user1"}, make_user())
+
+        clock.now += 31
+
+        assert cache.get("token-a") is None
+        assert cache.stats()["size"] == 0
+
+    def test_expires_at_token_exp(self):
+        """Should never outlive the token's exp claim"""
+        clock = FakeClock()
+        cache = TokenCache(max_size=10, ttl_seconds=300, clock=clock)
+        cache.set("token-a", {"sub": "user1", "exp": clock.now + 5}, make_user())
+
+        clock.now += 6
+
+        assert cache.get("token-a") is None
+
+    def test_lru_eviction(self):
+        """Should evict least recently used entry when full"""
+        cache = TokenCache(max_size=2, ttl_seconds=30, clock=FakeClock())
+        cache.set("token-a", {}, make_user(1))
+        cache.set("token-b", {}, make_user(2))
+        cache.get("token-a")
+        cache.set("token-c", {}, make_user(3))
+
+        assert cache.get("token-b") is None
+        assert cache.get("token-a") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate_user(self):
+        """Should drop every token of the invalidated user"""
+        cache = TokenCache(max_size=10, ttl_seconds=30, clock=FakeClock())
+        cache.set("token-a", {}, make_user(1))
+        cache.set("token-b", {}, make_user(1))
+        cache.set("token-c", {}, make_user(2))
+
+        assert cache.invalidate_user(1) == 2
+        assert cache.get("token-a") is None
+        assert cache.get("token-c") is not None
+
+    def test_disabled_with_zero_ttl(self):
+        """Should not store anything when TTL is 0"""
+        cache = TokenCache(max_size=10, ttl_seconds=0)
+        cache.set("token-a", {}, make_user())
+
+        assert cache.get("token-a") is None
+        assert cache.stats()["misses"] == 0
+
+
+@pytest.mark.asyncio
+class TestTokenCacheIntegration:
+    """Test token cache through protected endpoints"""
+
+    async def test_repeated_requests_hit_cache(self, authenticated_client):
+        """Should serve repeated requests with the same token from cache"""
+        client, _ = authenticated_client
+
+        first = await client.get("/users/me")
+        second = await client.get("/users/me")
+
+        assert first.status_code == 200
+        assert second.json() == first.json()
+        assert token_cache.stats()["hits"] >= 1
+
+    async def test_stats_requires_authentication(self, client: AsyncClient):
+        """Should not expose internal counters without a token"""
+        response = await client.get("/stats")
+
+        assert response.status_code == 401
+
+    async def test_stats_endpoint(self, authenticated_client):
+        """Should expose cache counters to authenticated users"""
+        client, _ = authenticated_client
+        response = await client.get("/stats")
+
+        assert response.status_code == 200
+        assert {"hits", "misses", "size"} <= set(response.json()["token_cache"])
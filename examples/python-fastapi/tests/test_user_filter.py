@@ -0,0 +1,174 @@
+"""
+Existing-user Bloom filter tests for FastAPI
+"""
+import pytest
+from httpx import AsyncClient
+
+import crud
+import main
+import models
+from user_filter import BloomFilter, UserFilter
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestBloomFilter:
+    """Unit tests for BloomFilter"""
+
+    def test_no_false_negatives(self):
+        """Should report every added value as present"""
+        bloom = BloomFilter(1000, 0.01)
+        values = [f"user{i}" for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+
+        assert all(value in bloom for value in values)
+
+    def test_false_positive_rate(self):
+        """Should stay near the configured false positive rate at capacity"""
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"user{i}")
+
+        false_positives = sum(f"other{i}" in bloom for i in range(10000))
+
+        assert false_positives < 300
+
+
+@pytest.mark.asyncio
+class TestUserFilter:
+    """Test loading and refreshing the filter from the database"""
+
+    async def test_unloaded_filter_allows_everything(self, db_session):
+        """Should defer to the database until loaded"""
+        assert await UserFilter().might_exist(db_session, "nobody") is True
+
+    async def test_load_and_refresh(self, db_session):
+        """Should pick up users created after load once the refresh interval has passed"""
+        await crud.create_user(db_session, "alice", "alice@example.com", "x")
+        clock = FakeClock()
+        user_filter = UserFilter(capacity=100, refresh_interval=1.0, clock=clock)
+        await user_filter.load(db_session)
+
+        # Created by another worker after this one loaded the filter
+        await crud.create_user(db_session, "bob", "bob@example.com", "x")
+
+        assert await user_filter.might_exist(db_session, "alice") is True
+        assert await user_filter.might_exist(db_session, "alice@example.com") is True
+        assert await user_filter.might_exist(db_session, "bob") is False
+        clock.now += 1.0
+        # A stale miss is never final: fall back to the database and refresh
+        assert await user_filter.might_exist(db_session, "nobody") is True
+        assert await user_filter.might_exist(db_session, "bob") is True
+        assert await user_filter.might_exist(db_session, "nobody") is False
+        assert user_filter.stats()["definite_misses"] == 2
+        assert user_filter.stats()["refreshes"] == 1
+
+    async def test_failed_refresh_falls_back_to_database(self, db_session, monkeypatch):
+        """Should allow the database lookup and stay stale when the refresh query fails"""
+        await crud.create_user(db_session, "alice", "alice@example.com", "x")
+        clock = FakeClock()
+        user_filter = UserFilter(capacity=100, refresh_interval=1.0, clock=clock)
+        await user_filter.load(db_session)
+
+        async def failing(*args, **kwargs):
+            raise RuntimeError("database unavailable")
+
+        monkeypatch.setattr(crud, "get_user_identities", failing)
+        clock.now += 1.0
+        assert await user_filter.might_exist(db_session, "nobody") is True
+        assert await user_filter.might_exist(db_session, "nobody") is True
+        assert user_filter.stats()["definite_misses"] == 0
+
+    async def test_out_of_order_commit(self, db_session):
+        """Should pick up a lower id that commits after a higher one has been read"""
+        alice = await crud.create_user(db_session, "alice", "alice@example.com", "x")
+        clock = FakeClock()
+        user_filter = UserFilter(capacity=100, refresh_interval=1.0, clock=clock)
+        await user_filter.load(db_session)
+        # Sequence values consumed by earlier rolled-back tests are gaps too
+        gaps = user_filter.stats()["pending_ids"]
+
+        # id + 2 commits first; id + 1 is still in flight when the refresh reads it
+        db_session.add(models.User(id=alice.id + 2, username="carol", email="carol@example.com",
+                                   hashed_password="x"))
+        await db_session.commit()
+        clock.now += 1.0
+        assert await user_filter.might_exist(db_session, "nobody") is True
+        assert user_filter.stats()["pending_ids"] == gaps + 1
+
+        db_session.add(models.User(id=alice.id + 1, username="bob", email="bob@example.com",
+                                   hashed_password="x"))
+        await db_session.commit()
+        clock.now += 1.0
+
+        assert await user_filter.might_exist(db_session, "bob") is True
+        assert user_filter.stats()["pending_ids"] == gaps
+
+    async def test_pending_ids_expire_after_being_checked(self, db_session):
+        """Should drop a gap (rolled back insert) only after re-checking it past the timeout"""
+        alice = await crud.create_user(db_session, "alice", "alice@example.com", "x")
+        clock = FakeClock()
+        user_filter = UserFilter(capacity=100, refresh_interval=1.0, pending_timeout=5.0, clock=clock)
+        await user_filter.load(db_session)
+        db_session.add(models.User(id=alice.id + 2, username="carol", email="carol@example.com",
+                                   hashed_password="x"))
+        await db_session.commit()
+        clock.now += 1.0
+        await user_filter.might_exist(db_session, "nobody")
+
+        clock.now += 10.0
+        assert user_filter.stats()["pending_ids"] > 0
+        await user_filter.might_exist(db_session, "nobody")
+        assert user_filter.stats()["pending_ids"] == 0
+
+
+@pytest.mark.asyncio
+class TestLoginShortCircuit:
+    """Test /token and /users with a loaded filter"""
+
+    async def test_unknown_username_skips_database(
+        self, client: AsyncClient, db_session, test_user_data: dict, monkeypatch
+    ):
+        """Should reject unknown users without a lookup but still spend one hash verification"""
+        await main.user_filter.load(db_session)
+        await client.post("/users", json=test_user_data)
+        misses = main.user_filter.stats()["definite_misses"]
+        verified = []
+
+        async def fake_verify(plain, hashed):
+            verified.append(hashed)
+            return False
+
+        async def fail_lookup(db, username):
+            raise AssertionError("unexpected database lookup")
+
+        monkeypatch.setattr(main, "verify_password", fake_verify)
+        monkeypatch.setattr(crud, "get_user_by_username", fail_lookup)
+        response = await client.post("/token", data={"username": "ghost", "password": "password123"})
+
+        assert response.status_code == 401
+        assert verified == [main.DUMMY_PASSWORD_HASH]
+        assert main.user_filter.stats()["definite_misses"] == misses + 1
+
+    async def test_registered_user_is_added(self, client: AsyncClient, db_session, test_user_data: dict):
+        """Should add new users immediately so they can log in and duplicates are caught"""
+        await main.user_filter.load(db_session)
+        await client.post("/users", json=test_user_data)
+
+        login = await client.post("/token", data={
+            "username": test_user_data["username"], "password": test_user_data["password"],
+        })
+        duplicate = await client.post("/users", json=test_user_data)
+
+        assert login.status_code == 200
+        assert duplicate.status_code == 400
+        assert duplicate.json()["detail"] == "Username already registered"
@@ -0,0 +1,158 @@
+"""
+検証済みトークンキャッシュ（get_current_user 用）
+
+JWTのデコード結果とユーザー情報のスナップショットをプロセス内に保持し、
+同じトークンでの連続リクエストではDB問い合わせを省略する
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """ユーザースナップショット（セッションから切り離した読み取り専用データ）"""
+    id: int
+    username: str
+    email: str
+    is_active: bool
+
+    @classmethod
+    def from_model(cls, user) -> "CachedUser":
+        """ORMのUserからスナップショットを作成"""
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_active=user.is_active,
+        )
+
+
+@dataclass
+class _Entry:
+    """キャッシュエントリ"""
+    expires_at: float
+    claims: dict[str, Any]
+    user: CachedUser
+
+
+class TokenCache:
+    """
+    トークンダイジェストをキーとするTTL付きLRUキャッシュ
+
+    - エントリはトークンの exp または ttl_seconds の早い方で失効
+    - max_size を超えると最も古く使われたエントリから追い出す
+    - ttl_seconds <= 0 でキャッシュ無効
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._keys_by_user: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        """トークン本体をメモリに残さないようSHA-256ダイジェストをキーにする"""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> _Entry | None:
+        """有効なエントリを取得（なければ None）"""
+        if not self.enabled:
+            return None
+        key = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= self._clock():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, token: str, claims: dict[str, Any], user: CachedUser) -> None:
+        """検証済みのクレームとユーザースナップショットを保存"""
+        if not self.enabled:
+            return
+        now = self._clock()
+        expires_at = now + self.ttl_seconds
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return
+
+        key = self._digest(token)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(expires_at=expires_at, claims=claims, user=user)
+            self._keys_by_user.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> int:
+        """ユーザーに紐づくエントリをすべて破棄（ユーザー更新時に呼ぶ）"""
+        with self._lock:
+            keys = list(self._keys_by_user.get(user_id, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        """全エントリとカウンタをリセット"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict[str, Any]:
+        """ヒット/ミス数などの統計情報"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, key: str) -> None:
+        """エントリ削除（ロック取得済みで呼ぶこと）"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry.user.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry.user.id]
@@ -0,0 +1,217 @@
+"""
+既存ユーザー名・メールアドレスのブルームフィルター（ログイン時の存在チェック用）
+
+リスト型攻撃（credential stuffing）の大半は存在しないユーザー名で、毎回DBに問い合わせることになる。
+起動時に全ユーザーのユーザー名・メールアドレスをビット配列に読み込み、
+「確実に存在しない」と分かる値はDBに問い合わせずに判定する。
+
+- 偽陽性（存在しないのに「あるかもしれない」）は DB で確認するだけなので害はない
+- 偽陰性（存在するのに「無い」）が起きないよう、このプロセスで作成したユーザーはすぐに追加する。
+  「無い」と判定するのは最後の読み込みから refresh_interval 秒以内だけで、それより古ければ DB で確認させ、
+  差分（前回より大きい ID）を読み込み直す。他のワーカーで登録してから最大 refresh_interval 秒は
+  そのユーザーを「無い」と判定することがある（登録APIはトークンを返すため通常は問題にならない）
+- 読み込みに失敗した場合も DB で確認させる（ログインは失敗させない）
+- シーケンスの ID はコミット順に並ばない（ID 10 のトランザクションが ID 11 より後にコミットされ得る）。
+  読み込んだ最大 ID より小さいのに見えなかった ID は「未確認の ID」として pending_timeout 秒間覚えておき、
+  差分の読み込みのたびに一緒に問い合わせる（期限を過ぎた ID はロールバックされたものとみなす）
+- ユーザーを削除してもビットは消せないが、偽陽性が増えるだけで判定は誤らない
+"""
+import hashlib
+import logging
+import math
+import time
+from typing import Any, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+
+logger = logging.getLogger(__name__)
+
+# 未確認の ID として覚えておく件数の上限（最大 ID の手前この件数の範囲だけを追う）
+PENDING_ID_WINDOW = 1000
+
+
+class BloomFilter:
+    """文字列のブルームフィルター（capacity 件まで false_positive_rate 以下の偽陽性率）"""
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        # 1回のハッシュから2つの値を取り出し、h1 + i*h2 で hash_count 個の位置を作る（double hashing）
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+
+class UserFilter:
+    """
+    ユーザー名・メールアドレスが存在し得るかを判定する
+
+    load() するまでは常に「存在し得る」を返す（DBで確認する）ため、読み込みに失敗しても動作は変わらない
+    """
+
+    def __init__(
+        self,
+        capacity: int = 100_000,  # 想定ユーザー数
+        false_positive_rate: float = 0.01,
+        refresh_interval: float = 1.0,
+        pending_timeout: float = 60.0,  # コミット待ちの ID を問い合わせ続ける秒数
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.refresh_interval = refresh_interval
+        self.pending_timeout = pending_timeout
+        self._clock = clock
+        self._filter: BloomFilter | None = None
+        self._max_id = 0
+        # 最大 ID より小さいのにまだ見えていない ID -> 最初に見えなかった時刻
+        self._pending: dict[int, float] = {}
+        # 最後に読み込みに成功した問い合わせの開始時刻（この時点までにコミットされたユーザーは含まれる）
+        self._refreshed_at = 0.0
+        self._refreshing = False
+        # 全件の読み込み中に add されたユーザー（読み込んだフィルターに入れ直す）
+        self._added: list[str] | None = None
+        self.definite_misses = 0
+        self.refreshes = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._filter is not None
+
+    def clear(self) -> None:
+        """フィルターを破棄して未読み込みの状態に戻す"""
+        self._filter = None
+        self._max_id = 0
+        self._pending = {}
+        self._refreshed_at = 0.0
+        self._refreshing = False
+        self._added = None
+        self.definite_misses = 0
+        self.refreshes = 0
+
+    async def load(self, db: AsyncSession) -> None:
+        """全ユーザーを読み込んでフィルターを作り直す"""
+        started = self._clock()
+        self._added = []
+        try:
+            rows = await crud.get_user_identities(db)
+            # 1ユーザーにつき2件（ユーザー名・メールアドレス）。登録で増えても作り直さずに済むよう、
+            # capacity と現在のユーザー数の2倍の大きい方を確保する
+            bloom = BloomFilter(2 * max(self.capacity, len(rows) * 2), self.false_positive_rate)
+            for _, username, email in rows:
+                bloom.add(username)
+                bloom.add(email)
+            for value in self._added:
+                bloom.add(value)
+        finally:
+            self._added = None
+        self._filter = bloom
+        self._max_id = 0
+        self._pending = {}
+        self._refreshed_at = started
+        # 読み込み時点でコミット前だった ID（最大 ID の手前の欠番）も未確認として扱う
+        self._track(rows, min_id=0)
+        logger.info("user filter: loaded %d users (%d bytes)", len(rows), bloom.memory_bytes)
+
+    @staticmethod
+    def _max_id_of(rows) -> int:
+        return max((row[0] for row in rows), default=0)
+
+    def _track(self, rows, min_id: int) -> None:
+        """
+        読み込んだ行から最大 ID と未確認の ID（min_id より大きい欠番）を更新
+
+        未確認の ID は、今回の問い合わせにも含めたうえで pending_timeout 秒を過ぎていれば捨てる
+        """
+        now = self._clock()
+        seen = {row[0] for row in rows}
+        for user_id in seen:
+            self._pending.pop(user_id, None)
+        max_id = max(self._max_id, self._max_id_of(rows))
+        for user_id in range(max(min_id, max_id - PENDING_ID_WINDOW) + 1, max_id):
+            if user_id not in seen:
+                self._pending.setdefault(user_id, now)
+        self._max_id = max_id
+        self._pending = {
+            user_id: since for user_id, since in self._pending.items()
+            if now - since < self.pending_timeout
+        }
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """前回の読み込み以降に（他のワーカーで）作成・コミットされたユーザーを追加"""
+        started = self._clock()
+        rows = await crud.get_user_identities(db, after_id=self._max_id, ids=list(self._pending))
+        self.refreshes += 1
+        for _, username, email in rows:
+            self.add(username, email)
+        self._track(rows, min_id=self._max_id)
+        self._refreshed_at = started
+        if self._filter is not None and self._filter.count > self._filter.capacity:
+            # 想定件数を超えると偽陽性率が上がるため、大きいフィルターで作り直す
+            await self.load(db)
+
+    def add(self, username: str, email: str) -> None:
+        """作成したユーザーを追加（未読み込みなら何もしない）"""
+        if self._filter is not None:
+            self._filter.add(username)
+            self._filter.add(email)
+        if self._added is not None:
+            self._added.extend((username, email))
+
+    async def might_exist(self, db: AsyncSession, value: str) -> bool:
+        """
+        value（ユーザー名またはメールアドレス）が存在し得るか。False なら確実に存在しない
+
+        最後の読み込みから refresh_interval 秒を過ぎていれば True（DBで確認させる）を返し、読み込み直す。
+        他のリクエストが読み込み中の場合は待たずに True を返し、読み込みに失敗しても True を返す
+        """
+        if self._filter is None or value in self._filter:
+            return True
+        if self._clock() - self._refreshed_at < self.refresh_interval:
+            self.definite_misses += 1
+            return False
+        if not self._refreshing:
+            self._refreshing = True
+            try:
+                await self.refresh(db)
+            except Exception:
+                logger.warning("user filter: refresh failed, falling back to database lookups", exc_info=True)
+                await db.rollback()
+            finally:
+                self._refreshing = False
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        """読み込み状態・DB問い合わせを省いた回数などの統計情報"""
+        if self._filter is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "entries": self._filter.count,
+            "capacity": self._filter.capacity,
+            "memory_bytes": self._filter.memory_bytes,
+            "hash_count": self._filter.hash_count,
+            "definite_misses": self.definite_misses,
+            "refreshes": self.refreshes,
+            "pending_ids": len(self._pending),
+        }
@@ -7,39 +7,225 @@ PostgreSQL + SQLAlchemyを使用したシンプルなバックエンドAPI
 - API Documentation: http://localhost:5000/
 """
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import asyncio
+import base64
+import binascii
+import csv
+import io
+import json
 import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import defaultdict
 from functools import wraps
+from itertools import chain
+from types import SimpleNamespace
 import jwt
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, Response, abort, jsonify, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 from dotenv import load_dotenv
+from sqlalchemy import (
+    DDL, Double, and_, cast, column, delete, event, func, insert, inspect, literal, literal_column, or_, select, table,
+    true, tuple_,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-# 環境変数読み込み
+# 環境変数読み込み（以下のモジュールは読み込み時に環境変数から設定を読むため、先に読み込む）
 load_dotenv()
 
+from async_db import create_async_db  # noqa: E402
+from compression import init_compression  # noqa: E402
+from database import DB_STATEMENT_TIMEOUT_MS, build_engine_options, pool_stats  # noqa: E402
+from metrics import PROMETHEUS_CONTENT_TYPE, init_metrics, metrics_registry  # noqa: E402
+from rate_limit import LOGIN_IP_RATE, LOGIN_USERNAME_RATE, REGISTER_IP_RATE, rate_limit, rate_limiter  # noqa: E402
+from user_filter import (  # noqa: E402
+    USER_FILTER_CAPACITY, USER_FILTER_ENABLED, USER_FILTER_FALSE_POSITIVE_RATE, USER_FILTER_REFRESH_SECONDS, UserFilter,
+)
+
+try:
+    import orjson
+except ImportError:  # orjson は任意の依存関係
+    orjson = None
+
+
+# ==========================================
+# JSONシリアライズ（orjson があれば使用）
+# ==========================================
+
+def _json_default(value):
+    """標準で扱えない型の変換（datetime は to_dict と同じ ISO 8601 形式）"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    orjson で jsonify / request.get_json を処理する JSON プロバイダー
+
+    orjson が無い場合やインデント指定（デバッグ時の整形出力）がある場合は標準の json を使う
+    """
+
+    default = staticmethod(_json_default)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+        return orjson.dumps(obj, default=_json_default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
 # Flaskアプリケーション初期化
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 
 # 設定
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
     'DATABASE_URL',
     'postgresql://postgres:postgres@db:5432/flask_app'
 )
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev_secret_key_change_in_production')
+# bcrypt のコスト（2^n 回）。テストでは最小値の 4 にして登録・ログインを高速化する
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv('BCRYPT_LOG_ROUNDS', '12'))
 
 # JWT設定
 JWT_SECRET_KEY = app.config['SECRET_KEY']
 JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES', '60')))
 
+# 一覧APIの total 算出方法（exact / cached / estimate / none）
+app.config['LIST_COUNT_MODE'] = os.getenv('LIST_COUNT_MODE', 'exact')
+app.config['COUNT_CACHE_TTL'] = float(os.getenv('COUNT_CACHE_TTL', '30'))
+# estimate モードでもこの件数未満の小さなテーブルは正確に数える
+app.config['COUNT_ESTIMATE_MIN_ROWS'] = int(os.getenv('COUNT_ESTIMATE_MIN_ROWS', '10000'))
+# /api/items/stats の日別集計を1日あたり何行に分けるか（当日の行への同時書き込みが行ロックで直列化されるのを避ける）
+app.config['ITEM_STATS_DAILY_SHARDS'] = int(os.getenv('ITEM_STATS_DAILY_SHARDS', '16'))
+
+# ストリーミング時にサーバーサイドカーソルから一度に取得する行数
+USER_ITEMS_STREAM_CHUNK = 500
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))
+
+# 一括作成（/api/items/bulk）の1リクエストあたり最大件数と、1回のINSERTに含める行数
+BULK_ITEMS_MAX = int(os.getenv('BULK_ITEMS_MAX', '1000'))
+BULK_INSERT_BATCH_SIZE = int(os.getenv('BULK_INSERT_BATCH_SIZE', '500'))
+
 # 拡張機能初期化
 db = SQLAlchemy(app)
 bcrypt = Bcrypt(app)
 CORS(app)
 
+# ==========================================
+# パスワードハッシュ（bcrypt）
+# ==========================================
+# bcrypt は GIL を解放するため gthread ワーカーでは他のスレッドと並行して動くが、
+# gevent ワーカーではイベントループを止めてしまうため、gevent のスレッドプールで実行する
+
+
+def _run_blocking(func, *args):
+    """CPU を長く使う処理を実行（gevent でパッチ済みならスレッドプール経由）"""
+    if 'gevent' in sys.modules:
+        from gevent import get_hub, monkey
+        if monkey.is_module_patched('socket'):
+            return get_hub().threadpool.apply(func, args)
+    return func(*args)
+
+
+def hash_password(password: str) -> str:
+    """パスワードを bcrypt でハッシュ化"""
+    return _run_blocking(bcrypt.generate_password_hash, password).decode('utf-8')
+
+
+def check_password(password_hash: str, password: str) -> bool:
+    """パスワードがハッシュと一致するか"""
+    return _run_blocking(bcrypt.check_password_hash, password_hash, password)
+
+
+# ==========================================
+# 既存ユーザーの存在フィルター（user_filter.py）
+# ==========================================
+
+def user_identities(after_id: int = 0, ids=()):
+    """ユーザーフィルター用に ID が after_id より大きい、または ids に含まれるユーザーを ID 順に取得"""
+    condition = User.id > after_id
+    if ids:
+        condition = or_(condition, User.id.in_(ids))
+    try:
+        return db.session.execute(
+            select(User.id, User.username, User.email).where(condition).order_by(User.id)
+        ).all()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+user_filter = UserFilter(
+    user_identities,
+    enabled=USER_FILTER_ENABLED,
+    capacity=USER_FILTER_CAPACITY,
+    false_positive_rate=USER_FILTER_FALSE_POSITIVE_RATE,
+    refresh_interval=USER_FILTER_REFRESH_SECONDS,
+)
+# 存在しないユーザーでもパスワード検証1回分の時間をかけるためのダミーハッシュ
+DUMMY_PASSWORD_HASH = bcrypt.generate_password_hash(secrets.token_urlsafe(16)).decode('utf-8')
+
+
+# 一意制約のある列 -> 登録済みの場合のエラーメッセージ
+USER_CONFLICT_ERRORS = {
+    'username': 'Username already exists',
+    'email': 'Email already exists',
+}
+
+
+def insert_user(username: str, email: str, password_hash: str):
+    """
+    INSERT ... ON CONFLICT DO NOTHING RETURNING の1往復でユーザーを作成（事前の重複チェックは行わない）
+
+    (作成したユーザーの USER_COLUMNS の行, None)、登録済みなら (None, エラーメッセージ) を返す。
+    重複チェックと作成が1文なので、同時に同じユーザー名で登録されても片方だけが成功する
+    """
+    dialect = sqlite if db.engine.dialect.name == 'sqlite' else postgresql
+    row = db.session.execute(
+        dialect.insert(User)
+        .values(username=username, email=email, password_hash=password_hash)
+        .on_conflict_do_nothing()
+        .returning(*USER_COLUMNS)
+    ).first()
+    db.session.commit()
+
+    if row is not None:
+        user_filter.add(row.username, row.email)
+        return row, None
+
+    # どちらの列と重複したかは失敗時にだけ調べる（直後に削除された場合はユーザー名の重複として扱う）
+    username_taken = db.session.execute(
+        select(User.username == username)
+        .where(or_(User.username == username, User.email == email))
+        .order_by((User.username == username).desc())
+        .limit(1)
+    ).scalar()
+    return None, USER_CONFLICT_ERRORS['email' if username_taken is False else 'username']
+
+
 # ==========================================
 # JWT ユーティリティ関数
 # ==========================================
@@ -65,25 +251,29 @@ def verify_token(token: str) -> dict:
         raise ValueError('Invalid token')
 
 
+def request_token_subject() -> str:
+    """Authorization: Bearer のトークンを検証して sub（ユーザー名）を返す（不正なら ValueError）"""
+    token = None
+    auth_header = request.headers.get('Authorization')
+
+    if auth_header:
+        try:
+            token = auth_header.split(' ')[1]  # Bearer TOKEN
+        except IndexError:
+            raise ValueError('Invalid authorization header format')
+
+    if not token:
+        raise ValueError('Access token required')
+
+    return verify_token(token).get('sub')
+
+
 def token_required(f):
     """JWT認証デコレータ"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        auth_header = request.headers.get('Authorization')
-
-        if auth_header:
-            try:
-                token = auth_header.split(' ')[1]  # Bearer TOKEN
-            except IndexError:
-                return jsonify({'error': 'Invalid authorization header format'}), 401
-
-        if not token:
-            return jsonify({'error': 'Access token required'}), 401
-
         try:
-            payload = verify_token(token)
-            username = payload.get('sub')
+            username = request_token_subject()
 
             # ユーザー情報を取得
             current_user = User.query.filter_by(username=username).first()
@@ -106,6 +296,160 @@ def token_required(f):
     return decorated
 
 
+# ==========================================
+# ページネーション ユーティリティ
+# ==========================================
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """(created_at, id) を不透明なカーソル文字列に変換"""
+    raw = json.dumps([created_at.isoformat(), item_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """カーソル文字列を (created_at, id) に復元（不正な場合は ValueError）"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        created_at = datetime.fromisoformat(created_at)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(item_id, int):
+        raise ValueError('Invalid cursor')
+    return created_at, item_id
+
+
+def encode_search_cursor(rank: float, item_id: int) -> str:
+    """検索結果の (rank, id) を不透明なカーソル文字列に変換"""
+    raw = json.dumps([rank, item_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_search_cursor(cursor: str) -> tuple:
+    """カーソル文字列を (rank, id) に復元（不正な場合は ValueError）"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        rank, item_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(rank, (int, float)) or isinstance(rank, bool) or not isinstance(item_id, int):
+        raise ValueError('Invalid cursor')
+    return float(rank), item_id
+
+
+# ==========================================
+# ETag / 条件付きリクエスト
+# ==========================================
+# ETag は版番号（version 列）から作る弱いETag。If-None-Match が一致すれば 304、
+# PUT の If-Match が一致しなければ 412。弱いETagを If-Match に使えるよう W/ を無視して比較する
+
+def make_etag(resource_id: int, version: int) -> str:
+    """(id, version) から弱いETagを作成"""
+    return f'W/"{resource_id}-{version}"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """If-None-Match / If-Match ヘッダー（カンマ区切り、* を含む）が etag に一致するか"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    current = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == current for tag in header.split(','))
+
+
+def conditional_json(etag: str, row, columns):
+    """If-None-Match が一致すれば本文なしの 304、それ以外は columns の値を JSON で返す"""
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = Response(status=304)
+    else:
+        response = jsonify({column.key: getattr(row, column.key) for column in columns})
+    response.headers['ETag'] = etag
+    return response
+
+
+# ==========================================
+# 件数カウント戦略
+# ==========================================
+
+COUNT_MODES = ('exact', 'cached', 'estimate', 'none')
+
+# テーブル名 -> (件数, 有効期限)
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+
+def invalidate_count_cache(table_name: str | None = None) -> None:
+    """キャッシュ済みの件数を破棄（INSERT/DELETE のコミット後に呼ばれる、None で全テーブル）"""
+    with _count_cache_lock:
+        if table_name is None:
+            _count_cache.clear()
+        else:
+            _count_cache.pop(table_name, None)
+
+
+def _exact_count(model) -> int:
+    """SELECT COUNT(*) による正確な件数"""
+    return db.session.query(func.count(model.id)).scalar()
+
+
+def _cached_count(model) -> int:
+    """TTL付きでキャッシュした正確な件数"""
+    table_name = model.__tablename__
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(table_name)
+        if cached and cached[1] > now:
+            return cached[0]
+
+    value = _exact_count(model)
+    with _count_cache_lock:
+        _count_cache[table_name] = (value, now + app.config['COUNT_CACHE_TTL'])
+    return value
+
+
+def _estimated_count(model):
+    """pg_class.reltuples による推定件数（PostgreSQL以外・未ANALYZEなら None）"""
+    if db.engine.dialect.name != 'postgresql':
+        return None
+    estimate = db.session.execute(
+        db.text('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)'),
+        {'table_name': model.__tablename__},
+    ).scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+def count_rows(model, mode: str):
+    """
+    指定モードで件数を取得
+
+    - exact: 毎回 COUNT(*)
+    - cached: COUNT(*) の結果を COUNT_CACHE_TTL 秒キャッシュ（INSERT/DELETE のコミット後に破棄）
+    - estimate: 大きなテーブルは pg_class.reltuples の推定値、小さければ cached
+    - none: 件数を返さない（None）
+    """
+    if mode == 'none':
+        return None
+    if mode == 'estimate':
+        estimate = _estimated_count(model)
+        if estimate is not None and estimate >= app.config['COUNT_ESTIMATE_MIN_ROWS']:
+            return estimate
+        return _cached_count(model)
+    if mode == 'cached':
+        return _cached_count(model)
+    return _exact_count(model)
+
+
+def get_count_mode(default: str):
+    """クエリパラメータ ?count= からカウントモードを取得（不正値は ValueError）"""
+    mode = request.args.get('count', default)
+    if mode not in COUNT_MODES:
+        raise ValueError(f"count must be one of: {', '.join(COUNT_MODES)}")
+    return mode
+
+
 # ==========================================
 # データベースモデル
 # ==========================================
@@ -120,6 +464,10 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # 更新のたびに増える版番号（ETag と楽観的排他制御に使用）
+    version = db.Column(db.Integer, default=1, nullable=False)
+
+    __mapper_args__ = {'version_id_col': version}
 
     # リレーション
     items = db.relationship('Item', backref='owner', lazy=True, cascade='all, delete-orphan')
@@ -138,6 +486,15 @@ class User(db.Model):
 class Item(db.Model):
     """アイテムモデル"""
     __tablename__ = 'items'
+    __table_args__ = (
+        # キーセットページネーション用: (created_at, id) 順に一覧列をカバー
+        db.Index(
+            'ix_items_created_at_id',
+            'created_at',
+            'id',
+            postgresql_include=['title', 'description', 'price', 'owner_id'],
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -145,6 +502,10 @@ class Item(db.Model):
     price = db.Column(db.Float, nullable=False)
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # 更新のたびに増える版番号（ETag と楽観的排他制御に使用）
+    version = db.Column(db.Integer, default=1, nullable=False)
+
+    __mapper_args__ = {'version_id_col': version}
 
     def to_dict(self):
         """辞書形式に変換"""
@@ -158,6 +519,352 @@ class Item(db.Model):
         }
 
 
+class ItemOwnerStats(db.Model):
+    """所有者ごとのアイテム件数・価格合計（アイテムの作成・更新・削除時に差分で更新する集計テーブル）"""
+    __tablename__ = 'item_owner_stats'
+
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    item_count = db.Column(db.Integer, default=0, nullable=False)
+    price_total = db.Column(db.Float, default=0.0, nullable=False)
+
+
+class ItemDailyStats(db.Model):
+    """
+    作成日（UTC）ごとのアイテム件数・価格合計（ItemOwnerStats と同じく差分で更新する）
+
+    当日の行には全ユーザーの書き込みが集中するため、1日を shard 列で複数行に分け、
+    書き込みごとにランダムな行へ加算する（参照時に day ごとに合計する）
+    """
+    __tablename__ = 'item_daily_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    shard = db.Column(db.SmallInteger, primary_key=True, default=0)
+    item_count = db.Column(db.Integer, default=0, nullable=False)
+    price_total = db.Column(db.Float, default=0.0, nullable=False)
+
+
+# 一覧・詳細・エクスポートで返す列（ORMオブジェクトを作らずに取得する場合に使用）
+# to_dict() と同じキーになるよう並べる。password_hash は含めない
+USER_COLUMNS = (User.id, User.username, User.email, User.is_active, User.created_at)
+ITEM_COLUMNS = (Item.id, Item.title, Item.description, Item.price, Item.owner_id, Item.created_at)
+
+
+# 行の追加・削除で件数キャッシュを破棄する。
+# フラッシュ時点では他の接続からまだ見えないため、変更のあったテーブルをセッションに記録しておき、
+# コミット後に破棄する（コミット前に破棄すると、その間に数えた古い件数が再びキャッシュされる）
+_COUNT_CACHE_TABLES = 'count_cache_tables'
+
+
+def _cascaded_tables(table_name: str) -> set:
+    """table_name の行の削除で ON DELETE CASCADE により行が消えるテーブル（間接的なものを含む）"""
+    tables, pending = set(), [table_name]
+    while pending:
+        parent = pending.pop()
+        for child in db.metadata.sorted_tables:
+            if child.name not in tables and any(
+                fk.ondelete == 'CASCADE' and fk.column.table.name == parent for fk in child.foreign_keys
+            ):
+                tables.add(child.name)
+                pending.append(child.name)
+    return tables
+
+
+def _mark_count_change(session, table_name: str, deleted: bool) -> None:
+    tables = session.info.setdefault(_COUNT_CACHE_TABLES, set())
+    tables.add(table_name)
+    if deleted:
+        # DB側のカスケード削除は ORM のイベントを通らない（users の削除で items の件数も変わる）
+        tables |= _cascaded_tables(table_name)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_count_changes(session, flush_context):
+    for obj in session.new:
+        _mark_count_change(session, obj.__table__.name, deleted=False)
+    for obj in session.deleted:
+        _mark_count_change(session, obj.__table__.name, deleted=True)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_statement_count_changes(orm_execute_state):
+    # session.execute(insert(Item)...) / delete(User) などフラッシュを通らない文
+    if (orm_execute_state.is_insert or orm_execute_state.is_delete) and orm_execute_state.bind_mapper:
+        _mark_count_change(
+            orm_execute_state.session,
+            orm_execute_state.bind_mapper.local_table.name,
+            deleted=orm_execute_state.is_delete,
+        )
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_count_cache_after_commit(session):
+    for table_name in session.info.pop(_COUNT_CACHE_TABLES, ()):
+        invalidate_count_cache(table_name)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_count_changes(session):
+    session.info.pop(_COUNT_CACHE_TABLES, None)
+
+
+# ==========================================
+# 全文検索（title / description）
+# ==========================================
+# PostgreSQL: 生成列 search_vector（tsvector, GIN）で前方一致、lower(title) の pg_trgm（GIN）であいまい一致
+# SQLite（テスト用）: FTS5 の外部コンテンツテーブル items_fts をトリガーで同期
+# いずれも db.create_all() 時に作成される
+
+SEARCH_MAX_TERMS = 8
+_SEARCH_TERM_RE = re.compile(r'\w+')
+
+for _statement in (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE items ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED",
+    "CREATE INDEX ix_items_search_vector ON items USING gin (search_vector)",
+    "CREATE INDEX ix_items_title_trgm ON items USING gin (lower(title) gin_trgm_ops)",
+):
+    event.listen(Item.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+
+for _statement in (
+    "CREATE VIRTUAL TABLE items_fts USING fts5(title, description, content='items', content_rowid='id')",
+    "CREATE TRIGGER items_fts_ai AFTER INSERT ON items BEGIN "
+    "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER items_fts_ad AFTER DELETE ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER items_fts_au AFTER UPDATE ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+):
+    event.listen(Item.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Item.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS items_fts').execute_if(dialect='sqlite'))
+
+
+def search_terms(q: str) -> list:
+    """検索文字列を語に分割（記号は区切りとして扱い、クエリ構文として解釈させない）"""
+    return [term.lower() for term in _SEARCH_TERM_RE.findall(q)][:SEARCH_MAX_TERMS]
+
+
+def build_search_query(terms: list, limit: int, after=None):
+    """
+    すべての語に前方一致するアイテムを rank の降順・id の昇順で取得するクエリ
+
+    PostgreSQL では title のトライグラム類似度でも一致させ、類似度を rank に加える
+    """
+    if db.engine.dialect.name == 'sqlite':
+        fts = table('items_fts', column('rowid'))
+        rank = (-func.bm25(literal_column('items_fts'))).label('rank')
+        query = (
+            select(*ITEM_COLUMNS, rank)
+            .select_from(Item.__table__.join(fts, fts.c.rowid == Item.id))
+            .where(literal_column('items_fts').op('MATCH')(' AND '.join(f'"{term}"*' for term in terms)))
+        )
+    else:
+        tsquery = func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+        vector = literal_column('items.search_vector')
+        title = func.lower(Item.title)
+        phrase = ' '.join(terms)
+        # ts_rank / similarity は real を返す。psycopg2 は real を短い10進表記で受け取るため、
+        # そのままではカーソルの rank が元の値と一致しない。double precision にして正確に往復させる
+        rank = cast(func.ts_rank(vector, tsquery) + func.similarity(title, phrase), Double).label('rank')
+        query = select(*ITEM_COLUMNS, rank).where(or_(vector.op('@@')(tsquery), title.op('%')(phrase)))
+
+    if after is not None:
+        after_rank, after_id = after
+        query = query.where(or_(rank < after_rank, and_(rank == after_rank, Item.id > after_id)))
+    return query.order_by(rank.desc(), Item.id).limit(limit)
+
+
+# ==========================================
+# アイテム集計（/api/items/stats）
+# ==========================================
+
+# 集計は item_owner_stats / item_daily_stats に差分で反映しておき（FastAPI 版と同じ構成）、
+# 参照時は items を走査せず集計テーブルだけを読む。
+# ORM を通る変更はマッパーイベントで、一括作成（Core の INSERT）は呼び出し元で反映する
+
+def _daily_shard() -> int:
+    """日別集計で加算する行（shard）をランダムに選ぶ"""
+    return random.randrange(app.config['ITEM_STATS_DAILY_SHARDS'])
+
+
+def apply_item_stats(connection, changes) -> None:
+    """
+    (owner_id, 作成日時, 件数の増減, 価格合計の増減) を集計テーブルに加算
+
+    アイテムの変更と同じトランザクション内で実行するため、同時にコミットされる。
+    加算は ON CONFLICT DO UPDATE で行うので、同時に更新されても値が失われない。
+    更新した行はコミットまでロックされるが、日別の行は _daily_shard で分散させるため
+    別々の所有者の書き込み同士は待ち合わせにならない（同じ所有者の書き込みは所有者の行で直列化される）
+    """
+    dialect = sqlite if connection.dialect.name == 'sqlite' else postgresql
+    shard = _daily_shard()
+    by_owner = defaultdict(lambda: [0, 0.0])
+    by_day = defaultdict(lambda: [0, 0.0])
+    for owner_id, created_at, count, price_total in changes:
+        for bucket in (by_owner[(owner_id,)], by_day[(created_at.date(), shard)]):
+            bucket[0] += count
+            bucket[1] += price_total
+
+    for table_, keys, totals in (
+        (ItemOwnerStats.__table__, ('owner_id',), by_owner),
+        (ItemDailyStats.__table__, ('day', 'shard'), by_day),
+    ):
+        for values, (count, price_total) in sorted(totals.items()):
+            stmt = dialect.insert(table_).values(
+                {**dict(zip(keys, values)), 'item_count': count, 'price_total': price_total}
+            )
+            connection.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=list(keys),
+                    set_={
+                        'item_count': table_.c.item_count + stmt.excluded.item_count,
+                        'price_total': table_.c.price_total + stmt.excluded.price_total,
+                    },
+                )
+            )
+
+
+@event.listens_for(Item, 'after_insert')
+def _add_item_stats(mapper, connection, target):
+    apply_item_stats(connection, [(target.owner_id, target.created_at, 1, target.price)])
+
+
+@event.listens_for(Item, 'after_update')
+def _update_item_stats(mapper, connection, target):
+    history = inspect(target).attrs.price.history
+    if history.added and history.deleted and history.added[0] != history.deleted[0]:
+        apply_item_stats(
+            connection, [(target.owner_id, target.created_at, 0, history.added[0] - history.deleted[0])]
+        )
+
+
+@event.listens_for(Item, 'after_delete')
+def _remove_item_stats(mapper, connection, target):
+    apply_item_stats(connection, [(target.owner_id, target.created_at, -1, -target.price)])
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _remove_statement_deleted_item_stats(orm_execute_state):
+    """
+    delete(Item) / delete(User) の文で消えるアイテムを、削除の前に集計テーブルから差し引く
+
+    文による削除はマッパーのイベントを通らず、users の削除で消える items は DB の ON DELETE CASCADE による
+    （所有者別の行もカスケードで消えるが、日別の行には残るため）
+    """
+    if not orm_execute_state.is_delete or orm_execute_state.bind_mapper not in (Item.__mapper__, User.__mapper__):
+        return
+    statement = orm_execute_state.statement
+    condition = statement.whereclause if statement.whereclause is not None else true()
+    if orm_execute_state.bind_mapper is User.__mapper__:
+        condition = Item.owner_id.in_(select(User.id).where(condition))
+
+    session = orm_execute_state.session
+    rows = session.execute(
+        select(Item.owner_id, Item.created_at, func.count(), func.sum(Item.price))
+        .where(condition)
+        .group_by(Item.owner_id, Item.created_at)
+    ).all()
+    if rows:
+        apply_item_stats(
+            session.connection(),
+            [(owner_id, created_at, -count, -price_total) for owner_id, created_at, count, price_total in rows],
+        )
+
+
+def rebuild_item_stats() -> None:
+    """
+    集計テーブルを items から作り直す（init_db.py での一括投入後や、不整合の修復用）
+
+    PostgreSQL では date_trunc で日単位にまとめ、GROUP BY で一度に集計する
+    """
+    if db.engine.dialect.name == 'sqlite':
+        day = func.date(Item.created_at)
+    else:
+        day = cast(func.date_trunc('day', Item.created_at), db.Date)
+
+    db.session.execute(delete(ItemOwnerStats))
+    db.session.execute(delete(ItemDailyStats))
+    db.session.execute(
+        insert(ItemOwnerStats).from_select(
+            ['owner_id', 'item_count', 'price_total'],
+            select(Item.owner_id, func.count(), func.sum(Item.price)).group_by(Item.owner_id),
+        )
+    )
+    db.session.execute(
+        insert(ItemDailyStats).from_select(
+            ['day', 'shard', 'item_count', 'price_total'],
+            select(day, literal(0), func.count(), func.sum(Item.price)).group_by(day),
+        )
+    )
+    db.session.commit()
+
+
+def _stats_summary(count: int, price_total) -> dict:
+    """件数・価格合計・平均価格（件数 0 のとき avg_price は None）"""
+    price_total = float(price_total or 0)
+    return {
+        'item_count': count,
+        'price_total': round(price_total, 2),
+        'avg_price': round(price_total / count, 2) if count else None,
+    }
+
+
+def get_item_stats(days: int, owners_limit: int) -> dict:
+    """
+    集計テーブルからアイテムの統計を取得
+
+    - 全体の件数・価格合計・平均価格
+    - 件数の多い順に owners_limit 人分の所有者別の統計
+    - 今日（UTC）を含む直近 days 日分の日別統計（作成のない日は含まない）
+    """
+    total_count, total_price = db.session.execute(
+        select(func.coalesce(func.sum(ItemOwnerStats.item_count), 0), func.sum(ItemOwnerStats.price_total))
+    ).one()
+    owners = db.session.execute(
+        select(ItemOwnerStats.owner_id, ItemOwnerStats.item_count, ItemOwnerStats.price_total)
+        .where(ItemOwnerStats.item_count > 0)
+        .order_by(ItemOwnerStats.item_count.desc(), ItemOwnerStats.owner_id)
+        .limit(owners_limit)
+    ).all()
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    item_count = func.sum(ItemDailyStats.item_count)
+    daily = db.session.execute(
+        select(
+            ItemDailyStats.day,
+            item_count.label('item_count'),
+            func.sum(ItemDailyStats.price_total).label('price_total'),
+        )
+        .where(ItemDailyStats.day >= since)
+        .group_by(ItemDailyStats.day)
+        .having(item_count > 0)
+        .order_by(ItemDailyStats.day)
+    ).all()
+
+    return {
+        **_stats_summary(total_count, total_price),
+        'owners': [{'owner_id': row.owner_id, **_stats_summary(row.item_count, row.price_total)} for row in owners],
+        'daily': [{'day': row.day.isoformat(), **_stats_summary(row.item_count, row.price_total)} for row in daily],
+    }
+
+
+# ==========================================
+# リクエスト計測（metrics.py → /metrics, Server-Timing）
+# ==========================================
+
+init_metrics(app)
+
+
+# ==========================================
+# レスポンス圧縮（compression.py）
+# ==========================================
+# after_request は登録の逆順に実行されるため、計測（上）より後に登録して圧縮後のサイズを記録させる
+
+init_compression(app)
+
+
 # ==========================================
 # エンドポイント
 # ==========================================
@@ -194,11 +901,30 @@ def health():
     })
 
 
+@app.route('/stats')
+@token_required
+def stats():
+    """内部統計（コネクションプール・レート制限・存在フィルターの状態。認証必須）"""
+    return jsonify({
+        'db_pool': pool_stats(db.engine),
+        'async_db_pool': async_db.stats() if async_db is not None else None,
+        'rate_limiter': rate_limiter.stats(),
+        'user_filter': user_filter.stats(),
+    })
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 形式のリクエストメトリクス"""
+    return Response(metrics_registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 # ==========================================
 # 認証エンドポイント
 # ==========================================
 
 @app.route('/auth/register', methods=['POST'])
+@rate_limit('register', REGISTER_IP_RATE)
 def register():
     """ユーザー登録＋トークン発行"""
     try:
@@ -212,25 +938,13 @@ def register():
         if len(data['password']) < 8:
             return jsonify({'error': 'Password must be at least 8 characters long'}), 400
 
-        # 重複チェック
-        if User.query.filter_by(username=data['username']).first():
-            return jsonify({'error': 'Username already exists'}), 400
-
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({'error': 'Email already exists'}), 400
-
         # パスワードハッシュ化
-        password_hash = bcrypt.generate_password_hash(data['password']).decode('utf-8')
-
-        # ユーザー作成
-        new_user = User(
-            username=data['username'],
-            email=data['email'],
-            password_hash=password_hash
-        )
+        password_hash = hash_password(data['password'])
 
-        db.session.add(new_user)
-        db.session.commit()
+        # ユーザー作成（登録済みなら 400）
+        new_user, error = insert_user(data['username'], data['email'], password_hash)
+        if error:
+            return jsonify({'error': error}), 400
 
         # トークン生成
         access_token = create_access_token(new_user.username)
@@ -238,7 +952,7 @@ def register():
         return jsonify({
             'access_token': access_token,
             'token_type': 'bearer',
-            'user': new_user.to_dict()
+            'user': new_user._asdict()
         }), 201
 
     except Exception as e:
@@ -247,6 +961,7 @@ def register():
 
 
 @app.route('/auth/token', methods=['POST'])
+@rate_limit('token', LOGIN_IP_RATE, username_rate=LOGIN_USERNAME_RATE)
 def login():
     """ログイン（トークン発行）"""
     try:
@@ -256,13 +971,16 @@ def login():
         if not data or not data.get('username') or not data.get('password'):
             return jsonify({'error': 'Username and password are required'}), 400
 
-        # ユーザー検証
-        user = User.query.filter_by(username=data['username']).first()
+        # ユーザー検証（存在しない場合もダミーのハッシュで検証し、応答時間からユーザーの有無を推測させない）
+        user = None
+        if user_filter.might_exist(data['username']):
+            user = User.query.filter_by(username=data['username']).first()
         if not user:
+            check_password(DUMMY_PASSWORD_HASH, data['password'])
             return jsonify({'error': 'Incorrect username or password'}), 401
 
         # パスワード検証
-        if not bcrypt.check_password_hash(user.password_hash, data['password']):
+        if not check_password(user.password_hash, data['password']):
             return jsonify({'error': 'Incorrect username or password'}), 401
 
         # アクティブユーザーチェック
@@ -319,18 +1037,31 @@ def db_test():
 
 @app.route('/api/users', methods=['GET', 'POST'])
 @token_required
+@rate_limit('users', REGISTER_IP_RATE)
 def users():
     """ユーザーエンドポイント（認証必須）"""
     if request.method == 'GET':
         # ユーザー一覧取得
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        try:
+            count_mode = get_count_mode(app.config['LIST_COUNT_MODE'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        users_query = User.query.paginate(page=page, per_page=per_page, error_out=False)
+        # paginate(error_out=False) と同じく不正な値は既定値に丸める
+        limit = per_page if per_page > 0 else 20
+        rows = db.session.execute(
+            select(*USER_COLUMNS)
+            .order_by(User.id)
+            .offset((max(page, 1) - 1) * limit)
+            .limit(limit)
+        ).all()
 
         return jsonify({
-            'users': [user.to_dict() for user in users_query.items],
-            'total': users_query.total,
+            'users': [row._asdict() for row in rows],
+            'total': count_rows(User, count_mode),
+            'count_mode': count_mode,
             'page': page,
             'per_page': per_page
         })
@@ -343,29 +1074,17 @@ def users():
         if not data or not data.get('username') or not data.get('email') or not data.get('password'):
             return jsonify({'error': 'Username, email, and password are required'}), 400
 
-        # 重複チェック
-        if User.query.filter_by(username=data['username']).first():
-            return jsonify({'error': 'Username already exists'}), 400
-
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({'error': 'Email already exists'}), 400
-
         # パスワードハッシュ化
-        password_hash = bcrypt.generate_password_hash(data['password']).decode('utf-8')
+        password_hash = hash_password(data['password'])
 
-        # ユーザー作成
-        new_user = User(
-            username=data['username'],
-            email=data['email'],
-            password_hash=password_hash
-        )
-
-        db.session.add(new_user)
-        db.session.commit()
+        # ユーザー作成（登録済みなら 400）
+        new_user, error = insert_user(data['username'], data['email'], password_hash)
+        if error:
+            return jsonify({'error': error}), 400
 
         return jsonify({
             'message': 'User created successfully',
-            'user': new_user.to_dict()
+            'user': new_user._asdict()
         }), 201
 
 
@@ -373,8 +1092,24 @@ def users():
 @token_required
 def get_user(user_id):
     """ユーザー詳細取得（認証必須）"""
-    user = User.query.get_or_404(user_id)
-    return jsonify(user.to_dict())
+    row = db.session.execute(select(*USER_COLUMNS, User.version).where(User.id == user_id)).first()
+    if row is None:
+        abort(404)
+    return conditional_json(make_etag(row.id, row.version), row, USER_COLUMNS)
+
+
+# items.owner_id の外部キー制約（PostgreSQL の既定の制約名）
+ITEM_OWNER_FOREIGN_KEY = 'items_owner_id_fkey'
+FOREIGN_KEY_VIOLATION = '23503'
+
+
+def _is_missing_owner(error: IntegrityError) -> bool:
+    """IntegrityError が所有者（owner_id）の外部キー違反か（それ以外の制約違反は False）"""
+    orig = error.orig
+    if getattr(orig, 'pgcode', None) is not None:
+        return orig.pgcode == FOREIGN_KEY_VIOLATION and orig.diag.constraint_name == ITEM_OWNER_FOREIGN_KEY
+    # SQLite は制約名を返さない（items の外部キーは owner_id だけ）
+    return 'FOREIGN KEY constraint failed' in str(orig)
 
 
 @app.route('/api/items', methods=['GET', 'POST'])
@@ -382,15 +1117,58 @@ def get_user(user_id):
 def items():
     """アイテムエンドポイント（認証必須）"""
     if request.method == 'GET':
-        # アイテム一覧取得
-        page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
+        cursor = request.args.get('cursor')
+        try:
+            # カーソル方式は件数不要な用途が多いため既定で数えない
+            count_mode = get_count_mode('none' if cursor is not None else app.config['LIST_COUNT_MODE'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        items_query = Item.query.paginate(page=page, per_page=per_page, error_out=False)
+        # キーセットページネーション（?cursor= で1ページ目、以降は next_cursor を指定）
+        if cursor is not None:
+            try:
+                after = decode_cursor(cursor) if cursor else None
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+            # OFFSET方式と同じく不正な値は既定値に丸める
+            limit = per_page if per_page > 0 else 20
+            # ORMオブジェクトを作らず、必要な列だけを Row として取得
+            query = select(*ITEM_COLUMNS).order_by(Item.created_at, Item.id)
+            if after is not None:
+                query = query.where(tuple_(Item.created_at, Item.id) > after)
+            rows = db.session.execute(query.limit(limit + 1)).all()
+            page_items = rows[:limit]
+
+            next_cursor = None
+            if len(rows) > limit and page_items:
+                next_cursor = encode_cursor(page_items[-1].created_at, page_items[-1].id)
+
+            return jsonify({
+                'items': [row._asdict() for row in page_items],
+                'next_cursor': next_cursor,
+                'total': count_rows(Item, count_mode),
+                'count_mode': count_mode,
+                'per_page': per_page
+            })
+
+        # アイテム一覧取得（page/per_page による従来のOFFSET方式）
+        page = request.args.get('page', 1, type=int)
+
+        # paginate(error_out=False) と同じく不正な値は既定値に丸める
+        limit = per_page if per_page > 0 else 20
+        rows = db.session.execute(
+            select(*ITEM_COLUMNS)
+            .order_by(Item.created_at, Item.id)
+            .offset((max(page, 1) - 1) * limit)
+            .limit(limit)
+        ).all()
 
         return jsonify({
-            'items': [item.to_dict() for item in items_query.items],
-            'total': items_query.total,
+            'items': [row._asdict() for row in rows],
+            'total': count_rows(Item, count_mode),
+            'count_mode': count_mode,
             'page': page,
             'per_page': per_page
         })
@@ -400,15 +1178,13 @@ def items():
         data = request.get_json()
 
         # バリデーション
-        if not data or not data.get('title') or not data.get('price') or not data.get('owner_id'):
+        if not isinstance(data, dict) or not data.get('title') or not data.get('price') or not data.get('owner_id'):
             return jsonify({'error': 'Title, price, and owner_id are required'}), 400
+        errors = _validate_item(data)
+        if errors:
+            return jsonify({'error': 'Invalid item', 'errors': errors}), 400
 
-        # ユーザー存在確認
-        user = User.query.get(data['owner_id'])
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-
-        # アイテム作成
+        # アイテム作成（ユーザーの存在は外部キー制約で確認し、事前のSELECTを省く）
         new_item = Item(
             title=data['title'],
             description=data.get('description'),
@@ -417,7 +1193,13 @@ def items():
         )
 
         db.session.add(new_item)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if not _is_missing_owner(e):
+                raise
+            return jsonify({'error': 'User not found'}), 404
 
         return jsonify({
             'message': 'Item created successfully',
@@ -425,19 +1207,235 @@ def items():
         }), 201
 
 
+def _validate_item(data, partial: bool = False) -> list:
+    """
+    アイテムの入力（作成・一括作成の1行・更新）を検証し、エラーメッセージのリストを返す
+
+    partial=True（更新）では含まれている項目だけを検証し、owner_id は見ない
+    """
+    if not isinstance(data, dict):
+        return ['Item must be an object']
+
+    errors = []
+    title, price, owner_id = data.get('title'), data.get('price'), data.get('owner_id')
+    if (not partial or 'title' in data) and (not isinstance(title, str) or not title):
+        errors.append('Title is required')
+    if (not partial or 'price' in data) and (
+        isinstance(price, bool) or not isinstance(price, (int, float)) or price <= 0
+    ):
+        errors.append('Price must be a positive number')
+    if not partial and (isinstance(owner_id, bool) or not isinstance(owner_id, int)):
+        errors.append('owner_id is required')
+    if data.get('description') is not None and not isinstance(data['description'], str):
+        errors.append('Description must be a string')
+    return errors
+
+
+@app.route('/api/items/bulk', methods=['POST'])
+@token_required
+def create_items_bulk():
+    """
+    アイテム一括作成（認証必須）
+
+    {"items": [...], "mode": "atomic" | "partial"}
+    - atomic: 1件でも不正な行があれば何も作成しない（既定）
+    - partial: 正しい行のみ作成し、不正な行は errors に行番号付きで返す
+    所有者の存在確認はバッチ全体で1回、INSERT は BULK_INSERT_BATCH_SIZE 行ごとに1回
+    """
+    data = request.get_json(silent=True) or {}
+    payload = data.get('items')
+    mode = data.get('mode', 'atomic')
+
+    if not isinstance(payload, list) or not payload:
+        return jsonify({'error': 'items must be a non-empty list'}), 400
+    if len(payload) > BULK_ITEMS_MAX:
+        return jsonify({'error': f'At most {BULK_ITEMS_MAX} items can be created at once'}), 400
+    if mode not in ('atomic', 'partial'):
+        return jsonify({'error': 'mode must be atomic or partial'}), 400
+
+    errors = []
+    candidates = []
+    for index, raw_item in enumerate(payload):
+        row_errors = _validate_item(raw_item)
+        if row_errors:
+            errors.append({'index': index, 'errors': row_errors})
+        else:
+            candidates.append((index, raw_item))
+
+    # 所有者の存在確認（1クエリでまとめて確認）
+    owner_ids = {item['owner_id'] for _, item in candidates}
+    existing_owner_ids = set(
+        db.session.execute(select(User.id).where(User.id.in_(owner_ids))).scalars()
+    ) if owner_ids else set()
+
+    now = datetime.utcnow()
+    rows = []
+    for index, item in candidates:
+        if item['owner_id'] not in existing_owner_ids:
+            errors.append({'index': index, 'errors': ['User not found']})
+            continue
+        rows.append({
+            'title': item['title'],
+            'description': item.get('description'),
+            'price': item['price'],
+            'owner_id': item['owner_id'],
+            'created_at': now,
+        })
+    errors.sort(key=lambda error: error['index'])
+
+    if not rows or (errors and mode == 'atomic'):
+        return jsonify({'error': 'Invalid items', 'errors': errors}), 422
+
+    created = []
+    try:
+        for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+            result = db.session.execute(
+                insert(Item).values(rows[start:start + BULK_INSERT_BATCH_SIZE]).returning(*ITEM_COLUMNS)
+            )
+            created.extend(result.all())
+        # Core の INSERT はマッパーイベントを通らないため、集計テーブルへの反映もここで行う
+        apply_item_stats(db.session.connection(), [(row.owner_id, row.created_at, 1, row.price) for row in created])
+        db.session.commit()
+    except IntegrityError as e:
+        # 確認後に所有者が削除された場合
+        db.session.rollback()
+        if not _is_missing_owner(e):
+            raise
+        return jsonify({'error': 'User not found'}), 404
+
+    return jsonify({
+        'message': f'{len(created)} items created successfully',
+        'items': [row._asdict() for row in created],
+        'errors': errors
+    }), 201
+
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _export_chunk(rows, export_format: str) -> str:
+    """行のまとまりを NDJSON / CSV 文字列に変換"""
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            (row.id, row.title, row.description, row.price, row.owner_id, row.created_at.isoformat())
+            for row in rows
+        )
+        return buffer.getvalue()
+    return ''.join(app.json.dumps(row._asdict()) + '\n' for row in rows)
+
+
+@app.route('/api/items/export', methods=['GET'])
+@token_required
+def export_items():
+    """
+    アイテム全件エクスポート（認証必須）
+
+    ?format=ndjson または csv。サーバーサイドカーソルから EXPORT_CHUNK_SIZE 行ずつ
+    逐次ストリーミングするため、件数が増えてもメモリ使用量は一定
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    @stream_with_context
+    def generate():
+        if export_format == 'csv':
+            yield ','.join(column.key for column in ITEM_COLUMNS) + '\r\n'
+        result = db.session.execute(
+            select(*ITEM_COLUMNS)
+            .order_by(Item.created_at, Item.id)
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        try:
+            for rows in result.partitions():
+                yield _export_chunk(rows, export_format)
+        finally:
+            result.close()
+
+    return Response(
+        generate(),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="items.{export_format}"'},
+    )
+
+
+@app.route('/api/items/stats', methods=['GET'])
+@token_required
+def item_stats():
+    """
+    アイテム統計（認証必須）
+
+    全体・所有者別（件数の多い順に owners_limit 人）・日別（直近 days 日）の件数、価格合計、平均価格を
+    集計テーブルから返す（items は走査しない）
+    """
+    days = request.args.get('days', 30, type=int)
+    owners_limit = request.args.get('owners_limit', 100, type=int)
+    if not 1 <= days <= 366 or not 1 <= owners_limit <= 1000:
+        return jsonify({'error': 'days must be 1-366 and owners_limit 1-1000'}), 400
+
+    return jsonify(get_item_stats(days, owners_limit))
+
+
+@app.route('/api/items/search', methods=['GET'])
+@token_required
+def search_items():
+    """
+    アイテム検索（認証必須）
+
+    ?q= の各語に title / description が前方一致するアイテムを一致度（rank）の高い順に返す。
+    次ページは next_cursor を ?cursor= に指定して取得する
+    """
+    terms = search_terms(request.args.get('q', ''))
+    if not terms:
+        return jsonify({'error': 'q must contain at least one word'}), 400
+
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    try:
+        after = decode_search_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = db.session.execute(build_search_query(terms, per_page + 1, after)).all()
+    page_items = rows[:per_page]
+
+    next_cursor = None
+    if len(rows) > per_page:
+        next_cursor = encode_search_cursor(page_items[-1].rank, page_items[-1].id)
+
+    return jsonify({
+        'items': [row._asdict() for row in page_items],
+        'next_cursor': next_cursor,
+        'per_page': per_page
+    })
+
+
 @app.route('/api/items/<int:item_id>', methods=['GET', 'PUT', 'DELETE'])
 @token_required
 def item_detail(item_id):
     """アイテム詳細エンドポイント（認証必須）"""
+    if request.method == 'GET':
+        # アイテム詳細取得（読み取りのみのため必要な列だけを取得）
+        row = db.session.execute(select(*ITEM_COLUMNS, Item.version).where(Item.id == item_id)).first()
+        if row is None:
+            abort(404)
+        return conditional_json(make_etag(row.id, row.version), row, ITEM_COLUMNS)
+
     item = Item.query.get_or_404(item_id)
 
-    if request.method == 'GET':
-        # アイテム詳細取得
-        return jsonify(item.to_dict())
+    if request.method == 'PUT':
+        # アイテム更新（If-Match が現在の ETag と一致しなければ 412）
+        if_match = request.headers.get('If-Match')
+        if if_match is not None and not etag_matches(if_match, make_etag(item.id, item.version)):
+            return jsonify({'error': 'Item has been modified'}), 412
 
-    elif request.method == 'PUT':
-        # アイテム更新
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        errors = _validate_item(data, partial=True)
+        if errors:
+            return jsonify({'error': 'Invalid item', 'errors': errors}), 400
 
         if 'title' in data:
             item.title = data['title']
@@ -446,12 +1444,19 @@ def item_detail(item_id):
         if 'price' in data:
             item.price = data['price']
 
-        db.session.commit()
+        try:
+            # UPDATE ... WHERE version = <読み込んだ版> のため、確認後に他から更新されていれば失敗する
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+            return jsonify({'error': 'Item has been modified'}), 412
 
-        return jsonify({
+        response = jsonify({
             'message': 'Item updated successfully',
             'item': item.to_dict()
         })
+        response.headers['ETag'] = make_etag(item.id, item.version)
+        return response
 
     elif request.method == 'DELETE':
         # アイテム削除
@@ -463,18 +1468,289 @@ def item_detail(item_id):
         })
 
 
+def _user_items_query(user_id: int, after=None):
+    """
+    ユーザーとそのアイテムを LEFT OUTER JOIN で1度に取得するクエリ
+
+    各行は USER_COLUMNS + ITEM_COLUMNS の列を並べたタプル（_split_user_item_row で分割）
+    """
+    join_condition = Item.owner_id == User.id
+    if after is not None:
+        join_condition = and_(join_condition, tuple_(Item.created_at, Item.id) > after)
+    return (
+        select(*USER_COLUMNS, *ITEM_COLUMNS)
+        .outerjoin(Item, join_condition)
+        .where(User.id == user_id)
+        .order_by(Item.created_at, Item.id)
+    )
+
+
+_USER_KEYS = tuple(column.key for column in USER_COLUMNS)
+_ITEM_KEYS = tuple(column.key for column in ITEM_COLUMNS)
+
+
+def _split_user_item_row(row) -> tuple:
+    """結合行を (ユーザーの dict, アイテムの dict または None) に分割"""
+    split = len(_USER_KEYS)
+    user = dict(zip(_USER_KEYS, row[:split]))
+    if row[split] is None:  # アイテムを持たないユーザー（LEFT JOIN の NULL 行）
+        return user, None
+    return user, dict(zip(_ITEM_KEYS, row[split:]))
+
+
+def _stream_user_items(user_id: int):
+    """ユーザーのアイテム全件を通常レスポンスと同じJSON形式で逐次出力"""
+    rows = db.session.execute(
+        _user_items_query(user_id).execution_options(yield_per=USER_ITEMS_STREAM_CHUNK)
+    )
+    first = next(rows, None)
+    if first is None:
+        rows.close()
+        abort(404)
+
+    @stream_with_context
+    def generate():
+        try:
+            yield '{"user":' + app.json.dumps(_split_user_item_row(first)[0]) + ',"items":['
+            buffer = []
+            for index, row in enumerate(chain([first], rows)):
+                item = _split_user_item_row(row)[1]
+                if item is None:
+                    continue
+                buffer.append((',' if index else '') + app.json.dumps(item))
+                if len(buffer) >= USER_ITEMS_STREAM_CHUNK:
+                    yield ''.join(buffer)
+                    buffer.clear()
+            yield ''.join(buffer) + ']}'
+        finally:
+            rows.close()
+
+    return Response(generate(), mimetype='application/json')
+
+
 @app.route('/api/users/<int:user_id>/items', methods=['GET'])
 @token_required
 def user_items(user_id):
-    """ユーザーのアイテム一覧取得（認証必須）"""
-    user = User.query.get_or_404(user_id)
+    """
+    ユーザーのアイテム一覧取得（認証必須）
+
+    ユーザーとアイテムを1クエリで取得し、(created_at, id) のキーセットでページ分割する。
+    ?stream=true で全アイテムをサーバーサイドカーソルから逐次ストリーミングする
+    """
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return _stream_user_items(user_id)
+
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 100)
+    try:
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = db.session.execute(_user_items_query(user_id, after).limit(per_page + 1)).all()
+    if not rows:
+        abort(404)
+
+    user = _split_user_item_row(rows[0])[0]
+    page_items = [item for _, item in map(_split_user_item_row, rows) if item is not None]
+    has_more = len(page_items) > per_page
+    page_items = page_items[:per_page]
+
+    next_cursor = None
+    if has_more and page_items:
+        next_cursor = encode_cursor(page_items[-1]['created_at'], page_items[-1]['id'])
+
+    return jsonify({
+        'user': user,
+        'items': page_items,
+        'next_cursor': next_cursor,
+        'per_page': per_page
+    })
+
+
+# ==========================================
+# 非同期DBアクセス（async ビュー + asyncpg、任意）
+# ==========================================
+# 読み取り系の一覧・詳細を /async/api/* に async def で用意する（書き込みは ORM のイベントで
+# 件数キャッシュ・集計テーブル・版番号を扱うため、従来の同期エンドポイントのみ）。
+# asyncpg と asgiref（pip install "flask[async]"）があり、接続先が PostgreSQL の場合だけ登録する（async_db.py）
+
+ITEM_COLUMN_NAMES = ', '.join(column.key for column in ITEM_COLUMNS)
+USER_COLUMN_NAMES = ', '.join(column.key for column in USER_COLUMNS)
+
+
+async_db = create_async_db(app.config['SQLALCHEMY_DATABASE_URI'], DB_STATEMENT_TIMEOUT_MS)
+async_api = Blueprint('async_api', __name__, url_prefix='/async/api')
+
+
+async def async_count_rows(model, mode: str):
+    """count_rows の非同期版（件数キャッシュは同期版と共有）"""
+    if mode == 'none':
+        return None
+    table_name = model.__tablename__
+    if mode == 'estimate':
+        estimate = await async_db.fetchval(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass($1)', table_name
+        )
+        if estimate is not None and estimate >= app.config['COUNT_ESTIMATE_MIN_ROWS']:
+            return estimate
+        mode = 'cached'
+
+    now = time.monotonic()
+    if mode == 'cached':
+        with _count_cache_lock:
+            cached = _count_cache.get(table_name)
+            if cached and cached[1] > now:
+                return cached[0]
+
+    value = await async_db.fetchval(f'SELECT count(*) FROM {table_name}')
+    if mode == 'cached':
+        with _count_cache_lock:
+            _count_cache[table_name] = (value, now + app.config['COUNT_CACHE_TTL'])
+    return value
+
+
+def async_token_required(f):
+    """token_required の async ビュー版（ユーザーの確認も非同期プールで行う）"""
+    @wraps(f)
+    async def decorated(*args, **kwargs):
+        try:
+            username = request_token_subject()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 401
+        except jwt.InvalidTokenError:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+
+        # DB・プールの障害は認証エラー（401）にせず、そのまま 5xx にする
+        current_user = await async_db.fetchrow(
+            'SELECT id, username, is_active FROM users WHERE username = $1', username
+        )
+        if not current_user:
+            return jsonify({'error': 'User not found'}), 401
+
+        if not current_user['is_active']:
+            return jsonify({'error': 'Inactive user'}), 401
+
+        request.current_user = current_user
+        return await f(*args, **kwargs)
+
+    return decorated
+
+
+@async_api.route('/items')
+@async_token_required
+async def async_items():
+    """アイテム一覧（/api/items の GET と同じ応答。ページと件数は同時に取得する）"""
+    per_page = request.args.get('per_page', 10, type=int)
+    cursor = request.args.get('cursor')
+    try:
+        count_mode = get_count_mode('none' if cursor is not None else app.config['LIST_COUNT_MODE'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        limit = per_page if per_page > 0 else 20
+        if after is None:
+            page_query = async_db.fetch(
+                f'SELECT {ITEM_COLUMN_NAMES} FROM items ORDER BY created_at, id LIMIT $1', limit + 1
+            )
+        else:
+            page_query = async_db.fetch(
+                f'SELECT {ITEM_COLUMN_NAMES} FROM items WHERE (created_at, id) > ($1, $2) '
+                'ORDER BY created_at, id LIMIT $3',
+                *after, limit + 1,
+            )
+        rows, total = await asyncio.gather(page_query, async_count_rows(Item, count_mode))
+        page_items = rows[:limit]
+
+        next_cursor = None
+        if len(rows) > limit and page_items:
+            next_cursor = encode_cursor(page_items[-1]['created_at'], page_items[-1]['id'])
+
+        return jsonify({
+            'items': [dict(row) for row in page_items],
+            'next_cursor': next_cursor,
+            'total': total,
+            'count_mode': count_mode,
+            'per_page': per_page
+        })
+
+    page = request.args.get('page', 1, type=int)
+    limit = per_page if per_page > 0 else 20
+    rows, total = await asyncio.gather(
+        async_db.fetch(
+            f'SELECT {ITEM_COLUMN_NAMES} FROM items ORDER BY created_at, id OFFSET $1 LIMIT $2',
+            (max(page, 1) - 1) * limit, limit,
+        ),
+        async_count_rows(Item, count_mode),
+    )
 
     return jsonify({
-        'user': user.to_dict(),
-        'items': [item.to_dict() for item in user.items]
+        'items': [dict(row) for row in rows],
+        'total': total,
+        'count_mode': count_mode,
+        'page': page,
+        'per_page': per_page
     })
 
 
+@async_api.route('/items/<int:item_id>')
+@async_token_required
+async def async_item_detail(item_id):
+    """アイテム詳細（/api/items/<id> の GET と同じく ETag / If-None-Match に対応）"""
+    row = await async_db.fetchrow(f'SELECT {ITEM_COLUMN_NAMES}, version FROM items WHERE id = $1', item_id)
+    if row is None:
+        abort(404)
+    return conditional_json(make_etag(row['id'], row['version']), SimpleNamespace(**row), ITEM_COLUMNS)
+
+
+@async_api.route('/users')
+@async_token_required
+async def async_users():
+    """ユーザー一覧（/api/users の GET と同じ応答）"""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 10, type=int)
+    try:
+        count_mode = get_count_mode(app.config['LIST_COUNT_MODE'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    limit = per_page if per_page > 0 else 20
+    rows, total = await asyncio.gather(
+        async_db.fetch(
+            f'SELECT {USER_COLUMN_NAMES} FROM users ORDER BY id OFFSET $1 LIMIT $2',
+            (max(page, 1) - 1) * limit, limit,
+        ),
+        async_count_rows(User, count_mode),
+    )
+
+    return jsonify({
+        'users': [dict(row) for row in rows],
+        'total': total,
+        'count_mode': count_mode,
+        'page': page,
+        'per_page': per_page
+    })
+
+
+@async_api.route('/users/<int:user_id>')
+@async_token_required
+async def async_user_detail(user_id):
+    """ユーザー詳細（/api/users/<id> の GET と同じく ETag / If-None-Match に対応）"""
+    row = await async_db.fetchrow(f'SELECT {USER_COLUMN_NAMES}, version FROM users WHERE id = $1', user_id)
+    if row is None:
+        abort(404)
+    return conditional_json(make_etag(row['id'], row['version']), SimpleNamespace(**row), USER_COLUMNS)
+
+
+if async_db is not None:
+    app.register_blueprint(async_api)
+
+
 # ==========================================
 # エラーハンドラー
 # ==========================================
@@ -0,0 +1,125 @@
+"""
+非同期DBアクセス（asyncpg の接続プール、/async/api/* 用）
+
+- asyncpg の接続は作成したイベントループでしか使えないため、プールは専用ループ（デーモンスレッド）に固定し、
+  async ビューのループからは run_coroutine_threadsafe でクエリを渡して結果を待つ
+- asyncpg と asgiref（pip install "flask[async]"）があり、接続先が PostgreSQL の場合だけ使う
+- gevent ワーカー（monkey パッチ済み）では専用ループを動かせないため使わない
+"""
+import asyncio
+import importlib.util
+import os
+import sys
+import threading
+
+from sqlalchemy.engine import make_url
+
+try:
+    import asyncpg
+except ImportError:  # asyncpg は任意の依存関係（無い場合は /async/api/* を登録しない）
+    asyncpg = None
+
+ASYNC_DB_ENABLED = os.getenv('ASYNC_DB_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', '10'))
+
+
+class AsyncDatabase:
+    """
+    asyncpg の接続プールを専用のイベントループ（デーモンスレッド）に置き、async ビューから使う
+
+    Flask は async ビューをリクエストごとに新しいイベントループで実行するが、asyncpg の接続は
+    作成したループでしか使えない。そのためプールは1つのループに固定し、各リクエストのループからは
+    run_coroutine_threadsafe でクエリを渡して結果を待つ。gthread ワーカーの各スレッドのDB待ちは
+    このループ上で重なり、1リクエスト内でも asyncio.gather で複数のクエリを同時に実行できる。
+    ループとプールは最初のクエリで作る（gunicorn の fork 前にスレッドを作らないため）
+    """
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10, server_settings: dict | None = None):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.server_settings = server_settings
+        self._loop = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._pool is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='async-db', daemon=True).start()
+                try:
+                    self._pool = asyncio.run_coroutine_threadsafe(self._create_pool(), loop).result()
+                except BaseException:
+                    loop.call_soon_threadsafe(loop.stop)
+                    raise
+                self._loop = loop
+        return self._loop
+
+    async def _create_pool(self):
+        return await asyncpg.create_pool(
+            self.dsn, min_size=self.min_size, max_size=self.max_size, server_settings=self.server_settings
+        )
+
+    async def _run(self, method: str, query: str, args):
+        async with self._pool.acquire() as connection:
+            return await getattr(connection, method)(query, *args)
+
+    async def _submit(self, method: str, query: str, args):
+        loop = self._loop or self._start()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._run(method, query, args), loop))
+
+    async def fetch(self, query: str, *args) -> list:
+        return await self._submit('fetch', query, args)
+
+    async def fetchrow(self, query: str, *args):
+        return await self._submit('fetchrow', query, args)
+
+    async def fetchval(self, query: str, *args):
+        return await self._submit('fetchval', query, args)
+
+    def close(self) -> None:
+        """プールを閉じてループを止める"""
+        with self._lock:
+            if self._pool is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._pool.close(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._pool = None
+            self._loop = None
+
+    def stats(self) -> dict:
+        """プールの状態（未使用なら started: False）"""
+        pool = self._pool
+        if pool is None:
+            return {'started': False, 'max_size': self.max_size}
+        return {
+            'started': True,
+            'size': pool.get_size(),
+            'idle': pool.get_idle_size(),
+            'max_size': self.max_size,
+        }
+
+
+def _gevent_patched() -> bool:
+    """gevent の monkey パッチ済みか（スレッドがグリーンレットになり、専用ループを動かせない）"""
+    if 'gevent' not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched('threading')
+
+
+def create_async_db(database_url: str, statement_timeout_ms: int = 0):
+    """非同期DBアクセスが使えれば AsyncDatabase、使えなければ None（gevent ワーカーでは使わない）"""
+    url = make_url(database_url)
+    if (not ASYNC_DB_ENABLED or asyncpg is None or importlib.util.find_spec('asgiref') is None
+            or url.get_backend_name() != 'postgresql' or _gevent_patched()):
+        return None
+    server_settings = None
+    if statement_timeout_ms > 0:
+        server_settings = {'statement_timeout': str(statement_timeout_ms)}
+    return AsyncDatabase(
+        url.set(drivername='postgresql').render_as_string(hide_password=False),
+        max_size=ASYNC_DB_POOL_SIZE,
+        server_settings=server_settings,
+    )
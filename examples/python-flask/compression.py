@@ -0,0 +1,142 @@
+"""
+レスポンス圧縮（gzip / brotli）
+
+- Accept-Encoding に応じて br（brotli パッケージがある場合）、gzip の順で選ぶ
+- 本文が COMPRESSION_MIN_SIZE バイト未満のもの、許可リストにない Content-Type、
+  すでに Content-Encoding が付いたもの、ステータス 204/304 はそのまま返す
+- ストリーミングレスポンス（エクスポート等）はチャンクごとに圧縮してフラッシュするため、
+  全体をメモリに溜めずに逐次送信できる
+- 圧縮前後のバイト数と圧縮に使ったCPU時間を metrics_registry に記録する（/metrics で確認）
+"""
+import os
+import time
+import zlib
+
+from flask import current_app, request
+
+from metrics import metrics_registry
+
+try:
+    import brotli
+except ImportError:  # brotli は任意の依存関係（無い場合は gzip のみで圧縮）
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))  # 11 は動的圧縮には重すぎる
+COMPRESSION_CONTENT_TYPES = tuple(
+    content_type.strip()
+    for content_type in os.getenv(
+        'COMPRESSION_CONTENT_TYPES', 'application/json,application/x-ndjson,text/csv,text/plain,text/html'
+    ).split(',')
+    if content_type.strip()
+)
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31 で gzip ヘッダー付きの deflate
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        """data を圧縮し、ここまでの出力をフラッシュして返す（ストリーミング用）"""
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+def _make_compressor(encoding: str):
+    if encoding == 'br':
+        return BrotliCompressor(current_app.config['COMPRESSION_BROTLI_QUALITY'])
+    return GzipCompressor(current_app.config['COMPRESSION_GZIP_LEVEL'])
+
+
+def _timed(step, data: bytes) -> tuple:
+    """圧縮処理を実行し (出力, CPU秒) を返す"""
+    started = time.thread_time()
+    output = step(data)
+    return output, time.thread_time() - started
+
+
+def _compress_stream(chunks, encoding: str, compressor):
+    """
+    ストリーミング本文をチャンクごとに圧縮し、送信し終えたらメトリクスに記録
+
+    本文はリクエストの処理後に送信されるため、compressor は app.config を参照できるうちに作って渡す
+    """
+    original_size = compressed_size = 0
+    cpu_seconds = 0.0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            output, seconds = _timed(compressor.compress, chunk)
+            original_size += len(chunk)
+            compressed_size += len(output)
+            cpu_seconds += seconds
+            if output:
+                yield output
+        output, seconds = _timed(compressor.finish, b'')
+        compressed_size += len(output)
+        cpu_seconds += seconds
+        yield output
+        metrics_registry.observe_compression(encoding, original_size, compressed_size, cpu_seconds)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def _compress_response(response):
+    """Accept-Encoding に応じてレスポンス本文を br / gzip で圧縮"""
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 304)
+        or response.direct_passthrough
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in current_app.config['COMPRESSION_CONTENT_TYPES']
+    ):
+        return response
+    if not response.is_streamed and response.calculate_content_length() < current_app.config['COMPRESSION_MIN_SIZE']:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(('br', 'gzip') if brotli is not None else ('gzip',))
+    if encoding is None:
+        return response
+
+    response.headers['Content-Encoding'] = encoding
+    if response.is_streamed:
+        response.headers.pop('Content-Length', None)
+        response.response = _compress_stream(response.response, encoding, _make_compressor(encoding))
+        return response
+
+    data = response.get_data()
+    compressed, cpu_seconds = _timed(_make_compressor(encoding).finish, data)
+    response.set_data(compressed)
+    metrics_registry.observe_compression(encoding, len(data), len(compressed), cpu_seconds)
+    return response
+
+
+def init_compression(app) -> None:
+    """
+    レスポンス圧縮を app に登録（設定は app.config の COMPRESSION_* で上書きできる）
+
+    after_request は登録の逆順に実行されるため、init_metrics より後に呼んで圧縮後のサイズを記録させる
+    """
+    app.config.setdefault('COMPRESSION_MIN_SIZE', COMPRESSION_MIN_SIZE)
+    app.config.setdefault('COMPRESSION_GZIP_LEVEL', COMPRESSION_GZIP_LEVEL)
+    app.config.setdefault('COMPRESSION_BROTLI_QUALITY', COMPRESSION_BROTLI_QUALITY)
+    app.config.setdefault('COMPRESSION_CONTENT_TYPES', COMPRESSION_CONTENT_TYPES)
+    app.after_request(_compress_response)
@@ -0,0 +1,93 @@
+"""
+データベース接続プール（FastAPI版 database.py と同じ環境変数で調整）
+
+- build_engine_options: DB_POOL_* / DB_ECHO / DB_STATEMENT_TIMEOUT_MS からエンジン設定を組み立てる
+- InstrumentedQueuePool: 接続取得の待ち時間を計測するプール
+- pool_stats: 貸出中・オーバーフロー・待ち時間（/stats 用）
+"""
+import os
+import threading
+import time
+
+from sqlalchemy.pool import QueuePool
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """環境変数を真偽値として取得"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+DB_ECHO = _env_bool('DB_ECHO', False)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = _env_bool('DB_POOL_PRE_PING', True)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '0'))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """接続取得の待ち時間を計測するコネクションプール"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            with self._wait_lock:
+                self.wait_count += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+def build_engine_options(url: str) -> dict:
+    """接続先に応じたエンジン設定を環境変数から組み立てる"""
+    options = {'echo': DB_ECHO, 'pool_pre_ping': DB_POOL_PRE_PING}
+    if url.startswith('sqlite'):
+        # SQLiteはドライバ既定のプールを使う
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if DB_STATEMENT_TIMEOUT_MS > 0 and url.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'}
+    return options
+
+
+def pool_stats(engine) -> dict:
+    """コネクションプールの現在の状態（貸出中・オーバーフロー・待ち時間）"""
+    pool = engine.engine.pool  # Connection を渡された場合（テストで差し替えたバインド）も元のエンジンのプール
+    stats = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=DB_MAX_OVERFLOW,
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._wait_lock:
+            count = pool.wait_count
+            stats.update(
+                checkouts=count,
+                avg_wait_ms=round(pool.wait_seconds_total / count * 1000, 3) if count else 0.0,
+                max_wait_ms=round(pool.wait_seconds_max * 1000, 3),
+            )
+    return stats
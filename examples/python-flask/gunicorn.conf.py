@@ -0,0 +1,96 @@
+"""
+Gunicorn 本番設定（gunicorn app:app で自動的に読み込まれる）
+
+ワーカーの種類は GUNICORN_WORKER_CLASS で切り替える。
+- gthread（既定）: 1ワーカー = 1プロセス + GUNICORN_THREADS スレッド。
+  DB待ちや bcrypt（GILを解放する）の間に他のスレッドが処理を進められる
+- gevent: 1ワーカーで GUNICORN_WORKER_CONNECTIONS 個のリクエストをグリーンレットで並行処理。
+  psycopg2 は psycogreen で協調的にし、bcrypt は app.py でスレッドプールに逃がす
+- sync: 1ワーカー = 1リクエスト（比較用）
+
+DBの接続プールはワーカー（プロセス）ごとに作られる。DB_POOL_SIZE / DB_MAX_OVERFLOW を指定しなければ、
+1ワーカーの同時処理数に合わせて（DB_POOL_MAX_PER_WORKER を上限に）決め、オーバーフローは使わない。
+プールより多いリクエストは DB_POOL_TIMEOUT 秒まで接続の返却を待つため、
+PostgreSQL への接続数は workers × DB_POOL_SIZE を超えない。
+"""
+import os
+
+WORKER_CLASSES = ("gthread", "gevent", "sync")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _cpu_count() -> int:
+    """このプロセスが使えるCPU数（コンテナのCPU制限を反映）"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS など
+        return os.cpu_count() or 1
+
+
+cpus = _cpu_count()
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class not in WORKER_CLASSES:
+    raise ValueError(f"GUNICORN_WORKER_CLASS must be one of: {', '.join(WORKER_CLASSES)}")
+
+if worker_class == "gevent":
+    # アプリの読み込み（preload_app）より前にパッチを当て、プールのロックやソケットを協調的にする
+    from gevent import monkey
+
+    monkey.patch_all()
+    from psycogreen.gevent import patch_psycopg
+
+    patch_psycopg()
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+# sync は1リクエストずつしか処理しないためプロセスを多めに、
+# gthread / gevent はプロセス内で並行処理するためCPU数に合わせる
+workers = _env_int("GUNICORN_WORKERS", cpus * 2 + 1 if worker_class == "sync" else max(cpus, 2))
+threads = _env_int("GUNICORN_THREADS", 4) if worker_class == "gthread" else 1
+worker_connections = _env_int("GUNICORN_WORKER_CONNECTIONS", 100)
+
+# 1ワーカーが同時に処理するリクエスト数
+concurrency = {"sync": 1, "gthread": threads, "gevent": worker_connections}[worker_class]
+os.environ.setdefault(
+    "DB_POOL_SIZE", str(min(concurrency, _env_int("DB_POOL_MAX_PER_WORKER", 20)))
+)
+os.environ.setdefault("DB_MAX_OVERFLOW", "0")
+
+# マスターでアプリを読み込んでからフォークし、起動時間とメモリ（コピーオンライト）を節約する
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").strip().lower() in ("1", "true", "yes", "on")
+
+timeout = _env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _env_int("GUNICORN_KEEPALIVE", 5)
+# メモリリーク対策として一定数のリクエストごとにワーカーを入れ替える（同時に入れ替わらないよう揺らす）
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 100)
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+
+
+def when_ready(server):
+    """起動時にワーカー構成とPostgreSQLへの最大接続数を出力"""
+    pool_size = int(os.environ["DB_POOL_SIZE"])
+    max_overflow = int(os.environ["DB_MAX_OVERFLOW"])
+    server.log.info(
+        "worker_class=%s workers=%d concurrency/worker=%d db_pool/worker=%d+%d max_db_connections=%d",
+        worker_class, workers, concurrency, pool_size, max_overflow,
+        workers * (pool_size + max_overflow),
+    )
+
+
+def post_fork(server, worker):
+    """マスターから引き継いだ接続をワーカーで使わないよう、プールを作り直す"""
+    if preload_app:
+        from app import app, db
+
+        with app.app_context():
+            # close=False: 親プロセスが持つ接続を閉じずに（共有ソケットを壊さずに）手放す
+            db.engine.dispose(close=False)
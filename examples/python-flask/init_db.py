@@ -4,11 +4,272 @@
 
 使い方:
     python init_db.py
+
+    # データを残したまま、既存のデータベースに後から追加した列・インデックスを反映
+    python init_db.py --upgrade
+
+    # 負荷試験用の大量データ（ユーザー100万人・アイテム500万件）を投入
+    python init_db.py --users 1000000 --items 5000000 --workers 8
+
+大量データの投入:
+- パスワードハッシュは1回だけ計算し、全ユーザーで使い回す（パスワードは全員 password123）
+- チャンクごとにワーカープロセスで生成し、PostgreSQL では各プロセスが自分の接続で
+  COPY（psycopg2 の copy_expert、CSV）する。SQLite では1プロセスで executemany する
+- PostgreSQL では主キー・一意制約以外のインデックス（全文検索の GIN を含む）を投入前に削除し、
+  投入後にまとめて作り直す
+- 分布: アイテム数は一部のユーザーに偏らせ（OWNER_SKEW）、価格は対数正規分布、
+  作成日時は直近 --days 日に（アイテムは新しいものほど多く）散らす
+- 同じ --seed なら同じデータになる（チャンクごとに乱数の種を決めるため、ワーカー数に依存しない）
 """
-from app import app, db, User, bcrypt
+import argparse
+import csv
+import io
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+
+from app import app, db, User, Item, bcrypt, rebuild_item_stats
+
+USER_COLUMNS = ('id', 'username', 'email', 'password_hash', 'is_active', 'created_at', 'version')
+ITEM_COLUMNS = ('id', 'title', 'description', 'price', 'owner_id', 'created_at', 'version')
+
+# アイテムの所有者の偏り（1 で一様、大きいほど ID の小さいユーザーに集中する）
+OWNER_SKEW = 3.0
+# 価格の分布（中央値 PRICE_MEDIAN、対数の標準偏差 PRICE_SIGMA の対数正規分布）
+PRICE_MEDIAN = 30.0
+PRICE_SIGMA = 1.0
+INACTIVE_RATIO = 0.01
+NO_DESCRIPTION_RATIO = 0.2
+
+ADJECTIVES = (
+    'Classic', 'Compact', 'Deluxe', 'Eco', 'Handmade', 'Portable', 'Premium', 'Rustic',
+    'Smart', 'Vintage', 'Wireless', 'Wooden',
+)
+NOUNS = (
+    'Backpack', 'Camera', 'Chair', 'Desk', 'Headphones', 'Kettle', 'Keyboard', 'Lamp',
+    'Monitor', 'Mug', 'Notebook', 'Speaker', 'Table', 'Watch',
+)
+FEATURES = (
+    'durable', 'lightweight', 'waterproof', 'rechargeable', 'adjustable', 'foldable',
+    'energy efficient', 'easy to clean',
+)
+
+# 制約（主キー・一意制約）に使われていない users / items のインデックス
+SECONDARY_INDEXES = text(
+    "SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+    "WHERE i.indrelid IN ('users'::regclass, 'items'::regclass) "
+    "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)"
+)
+
+# --upgrade: create_all 時にだけ作られる列・インデックスなどを既存のテーブルに追加する（何度実行してもよい）
+UPGRADE_STATEMENTS = {
+    'postgresql': (
+        # ETag / 楽観的ロック用の版番号（既存の行は 1 から始める）
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 1",
+        "ALTER TABLE items ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 1",
+        # 全文検索（/api/items/search）
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "ALTER TABLE items ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_items_search_vector ON items USING gin (search_vector)",
+        "CREATE INDEX IF NOT EXISTS ix_items_title_trgm ON items USING gin (lower(title) gin_trgm_ops)",
+        # キーセットページネーション
+        "CREATE INDEX IF NOT EXISTS ix_items_created_at_id ON items (created_at, id) "
+        "INCLUDE (title, description, price, owner_id)",
+    ),
+    'sqlite': (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5("
+        "title, description, content='items', content_rowid='id')",
+        "CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN "
+        "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN "
+        "INSERT INTO items_fts(items_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE ON items BEGIN "
+        "INSERT INTO items_fts(items_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+        # 外部コンテンツテーブルの索引を items から作り直す
+        "INSERT INTO items_fts(items_fts) VALUES ('rebuild')",
+        "CREATE INDEX IF NOT EXISTS ix_items_created_at_id ON items (created_at, id)",
+    ),
+}
+
+# SQLite は ADD COLUMN IF NOT EXISTS に対応しないため、列が無いテーブルにだけ追加する
+SQLITE_ADDED_COLUMNS = (
+    ('users', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('items', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+)
+
+
+def upgrade_database():
+    """データを残したまま既存のデータベースを現在のモデルに合わせる（無いテーブルは作成）"""
+    with app.app_context():
+        db.create_all()
+        dialect = db.engine.dialect.name
+        with db.engine.begin() as conn:
+            if dialect == 'sqlite':
+                for table, column, definition in SQLITE_ADDED_COLUMNS:
+                    existing = {row[1] for row in conn.execute(text(f'PRAGMA table_info({table})'))}
+                    if column not in existing:
+                        conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {definition}'))
+            for statement in UPGRADE_STATEMENTS.get(dialect, ()):
+                conn.execute(text(statement))
+        # 集計テーブル（/api/items/stats）は items から作り直す
+        rebuild_item_stats()
+        print(f"✅ スキーマを更新しました（{dialect}）")
+
+
+def generate_users(start_id, count, seed, password_hash, now, days):
+    """ID が start_id から count 人分のユーザー行（USER_COLUMNS の順）を生成"""
+    rng = random.Random(f'users-{seed}-{start_id}')
+    span = days * 86400
+    rows = []
+    for user_id in range(start_id, start_id + count):
+        rows.append((
+            user_id,
+            f'user{user_id}',
+            f'user{user_id}@example.com',
+            password_hash,
+            rng.random() >= INACTIVE_RATIO,
+            now - timedelta(seconds=span * rng.random()),
+            1,
+        ))
+    return rows
+
+
+def generate_items(start_id, count, seed, first_owner_id, owners, now, days):
+    """ID が start_id から count 件分のアイテム行（ITEM_COLUMNS の順）を生成"""
+    rng = random.Random(f'items-{seed}-{start_id}')
+    span = days * 86400
+    price_mu = math.log(PRICE_MEDIAN)
+    rows = []
+    for item_id in range(start_id, start_id + count):
+        owner_id = first_owner_id + min(int(owners * rng.random() ** OWNER_SKEW), owners - 1)
+        price = max(round(rng.lognormvariate(price_mu, PRICE_SIGMA), 2), 0.01)
+        created_at = now - timedelta(seconds=span * rng.random() ** 2)
+        noun = rng.choice(NOUNS)
+        description = None
+        if rng.random() >= NO_DESCRIPTION_RATIO:
+            description = f'A {rng.choice(FEATURES)} {noun.lower()} that is {rng.choice(FEATURES)}.'
+        rows.append((
+            item_id,
+            f'{rng.choice(ADJECTIVES)} {noun} {item_id}',
+            description,
+            price,
+            owner_id,
+            created_at,
+            1,
+        ))
+    return rows
+
+
+def chunks(first_id, total, chunk_size):
+    """[first_id, first_id + total) を (開始ID, 件数) のチャンクに分割"""
+    end = first_id + total
+    return [(start, min(chunk_size, end - start)) for start in range(first_id, end, chunk_size)]
 
 
-def init_database():
+def copy_chunk(table, columns, generator, args):
+    """ワーカープロセスで1チャンクを生成し、COPY で投入する"""
+    buffer = io.StringIO()
+    # None は空欄（CSV形式の COPY では NULL）になる
+    csv.writer(buffer).writerows(generator(*args))
+    buffer.seek(0)
+
+    with app.app_context():
+        connection = db.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+                )
+            connection.commit()
+        finally:
+            connection.close()
+    return args[1]
+
+
+def load_postgresql(executor, table, columns, generator, jobs):
+    futures = [executor.submit(copy_chunk, table, columns, generator, args) for args in jobs]
+    for future in futures:
+        future.result()
+
+
+def load_sqlite(table, columns, generator, jobs):
+    with db.engine.begin() as conn:
+        for args in jobs:
+            conn.execute(insert(table), [dict(zip(columns, row)) for row in generator(*args)])
+
+
+def seed_database(users, items, password_hash, first_owner_id, workers, chunk_size, seed, days):
+    """ユーザー users 人とアイテム items 件を一括投入する（ID は既存の行の後ろから振る）"""
+    now = datetime.utcnow()
+    first_user_id = db.session.execute(text('SELECT coalesce(max(id), 0) + 1 FROM users')).scalar()
+    first_item_id = db.session.execute(text('SELECT coalesce(max(id), 0) + 1 FROM items')).scalar()
+    db.session.rollback()
+
+    # 所有者は投入したユーザーから選ぶ（ユーザーを投入しない場合は既存のユーザー）
+    if users:
+        first_owner_id, owners = first_user_id, users
+    else:
+        owners = first_user_id - first_owner_id
+
+    user_jobs = [
+        (start, count, seed, password_hash, now, days)
+        for start, count in chunks(first_user_id, users, chunk_size)
+    ]
+    item_jobs = [
+        (start, count, seed, first_owner_id, owners, now, days)
+        for start, count in chunks(first_item_id, items, chunk_size)
+    ]
+
+    started = time.perf_counter()
+    if db.engine.dialect.name == 'postgresql':
+        # 1行ずつインデックスを更新するより、投入後に一括で作る方が速い
+        with db.engine.begin() as conn:
+            indexes = conn.execute(SECONDARY_INDEXES).all()
+            for name, _ in indexes:
+                conn.execute(text(f'DROP INDEX {name}'))
+
+        # spawn: 親プロセスの接続プールを子プロセスに引き継がない
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            load_postgresql(executor, 'users', USER_COLUMNS, generate_users, user_jobs)
+            print(f'✅ ユーザー {users:,} 人を投入 ({time.perf_counter() - started:.1f}s)')
+            load_postgresql(executor, 'items', ITEM_COLUMNS, generate_items, item_jobs)
+            print(f'✅ アイテム {items:,} 件を投入 ({time.perf_counter() - started:.1f}s)')
+
+        with db.engine.begin() as conn:
+            conn.execute(text("SET LOCAL maintenance_work_mem = '256MB'"))
+            for _, definition in indexes:
+                conn.execute(text(definition))
+            print(f'✅ インデックスを作成 ({time.perf_counter() - started:.1f}s)')
+            # COPY で ID を明示したため、シーケンスを最大IDまで進める
+            for table in ('users', 'items'):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT coalesce(max(id), 1) FROM {table}))"
+                ))
+            conn.execute(text('ANALYZE users'))
+            conn.execute(text('ANALYZE items'))
+    else:
+        load_sqlite(User.__table__, USER_COLUMNS, generate_users, user_jobs)
+        print(f'✅ ユーザー {users:,} 人を投入 ({time.perf_counter() - started:.1f}s)')
+        load_sqlite(Item.__table__, ITEM_COLUMNS, generate_items, item_jobs)
+        print(f'✅ アイテム {items:,} 件を投入 ({time.perf_counter() - started:.1f}s)')
+
+    # COPY / executemany はマッパーイベントを通らないため、集計テーブル（/api/items/stats）は投入後に作り直す
+    rebuild_item_stats()
+    print(f'✅ 集計テーブルを作成 ({time.perf_counter() - started:.1f}s)')
+
+
+def init_database(options=None):
     """データベースとテーブルを初期化"""
     with app.app_context():
         print("=" * 60)
@@ -24,9 +285,9 @@ def init_database():
         print("\n初期データを投入中...")
 
         # テストユーザーの作成
+        password_hash = bcrypt.generate_password_hash('password123').decode('utf-8')
         existing_user = User.query.filter_by(username='testuser').first()
         if not existing_user:
-            password_hash = bcrypt.generate_password_hash('password123').decode('utf-8')
             test_user = User(
                 username='testuser',
                 email='test@example.com',
@@ -35,21 +296,56 @@ def init_database():
             )
             db.session.add(test_user)
             db.session.commit()
+            test_user_id = test_user.id
             print(f"✅ テストユーザー作成: {test_user.username} (ID: {test_user.id})")
         else:
+            test_user_id = existing_user.id
             print(f"ℹ️  テストユーザー既存: {existing_user.username}")
 
+        if options is not None and (options.users or options.items):
+            print("\n大量データを投入中...")
+            seed_database(
+                users=options.users,
+                items=options.items,
+                password_hash=password_hash,
+                first_owner_id=test_user_id,
+                workers=options.workers,
+                chunk_size=options.chunk_size,
+                seed=options.seed,
+                days=options.days,
+            )
+
         print("\n" + "=" * 60)
         print("データベース初期化完了！")
         print("=" * 60)
         print("\nデフォルトユーザー:")
         print("  username: testuser")
         print("  password: password123")
+        if options is not None and options.users:
+            print("  （投入したユーザー user<ID> のパスワードも password123）")
         print("\nAPIテスト:")
         print("  curl http://localhost:5000/health")
         print("  curl http://localhost:5000/api/users")
         print("=" * 60)
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Initialize the database and optionally seed bulk data')
+    parser.add_argument('--upgrade', action='store_true',
+                        help='テーブルを作り直さず、既存のデータベースに新しい列・インデックスを追加する')
+    parser.add_argument('--users', type=int, default=0, help='投入するユーザー数（default: 0）')
+    parser.add_argument('--items', type=int, default=0, help='投入するアイテム数（default: 0）')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='生成・COPY を行うプロセス数（PostgreSQL のみ、default: CPU数）')
+    parser.add_argument('--chunk-size', type=int, default=50_000, help='1回の COPY / executemany の行数')
+    parser.add_argument('--seed', type=int, default=42, help='乱数の種')
+    parser.add_argument('--days', type=int, default=365, help='作成日時を散らす期間（日）')
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
-    init_database()
+    args = parse_args()
+    if args.upgrade:
+        upgrade_database()
+    else:
+        init_database(args)
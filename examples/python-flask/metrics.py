@@ -0,0 +1,186 @@
+"""
+リクエスト単位の計測（レイテンシ・SQL実行回数/時間・レスポンスサイズ → /metrics, Server-Timing）
+
+- SQLAlchemy の before/after_cursor_execute で、実行中リクエストのSQL回数と時間を g に積算
+- init_metrics: リクエストの前後処理を登録し、ルート（URLルール）ごとのヒストグラムと Server-Timing ヘッダーを記録
+- MetricsRegistry.observe_compression: レスポンス圧縮の圧縮率・CPU時間（compression.py から記録）
+- MetricsRegistry.render: Prometheus テキスト形式で出力（/metrics 用）
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+RESPONSE_SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+COMPRESSION_RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9, 1.0)
+COMPRESSION_CPU_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    """Prometheus のラベル表記（値のバックスラッシュ・ダブルクォート・改行をエスケープ）"""
+    return ','.join(
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in zip(names, values)
+    )
+
+
+class Histogram:
+    """ラベルごとの累積バケットを持つヒストグラム"""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        # [バケットごとの件数..., 合計, 件数]
+        series = self.series.setdefault(labels, [0] * len(self.buckets) + [0.0, 0])
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self, label_names: tuple) -> list:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self.series.items()):
+            base = _format_labels(label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-1]}')
+            lines.append(f'{self.name}_sum{{{base}}} {float(series[-2])}')
+            lines.append(f'{self.name}_count{{{base}}} {series[-1]}')
+        return lines
+
+
+class MetricsRegistry:
+    """HTTPリクエストのメトリクスを集計（ルートはURLルール単位）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.histograms = (
+            Histogram('http_request_duration_seconds', 'Request latency in seconds.', LATENCY_BUCKETS),
+            Histogram('http_request_db_statements', 'SQL statements executed per request.', SQL_STATEMENT_BUCKETS),
+            Histogram('http_request_db_duration_seconds', 'Time spent executing SQL per request.', LATENCY_BUCKETS),
+            Histogram('http_response_size_bytes', 'Response body size in bytes.', RESPONSE_SIZE_BUCKETS),
+        )
+        # 圧縮は Content-Encoding ごとに集計（encoding -> [圧縮前バイト数, 圧縮後バイト数]）
+        self.compression_bytes = {}
+        self.compression_histograms = (
+            Histogram('http_response_compression_ratio',
+                      'Compressed size divided by original size per response.', COMPRESSION_RATIO_BUCKETS),
+            Histogram('http_response_compression_cpu_seconds',
+                      'CPU time spent compressing a response.', COMPRESSION_CPU_BUCKETS),
+        )
+
+    def observe(self, method: str, route: str, status: int, seconds: float,
+                sql_count: int, sql_seconds: float, size: int | None) -> None:
+        """1リクエスト分の計測値を記録（ストリーミングでサイズ不明の場合は size=None）"""
+        labels = (method, route)
+        latency, db_statements, db_time, response_size = self.histograms
+        with self._lock:
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            latency.observe(labels, seconds)
+            db_statements.observe(labels, sql_count)
+            db_time.observe(labels, sql_seconds)
+            if size is not None:
+                response_size.observe(labels, size)
+
+    def observe_compression(self, encoding: str, original_size: int, compressed_size: int,
+                            cpu_seconds: float) -> None:
+        """圧縮した1レスポンス分のバイト数とCPU時間を記録"""
+        labels = (encoding,)
+        ratio, cpu = self.compression_histograms
+        with self._lock:
+            totals = self.compression_bytes.setdefault(labels, [0, 0])
+            totals[0] += original_size
+            totals[1] += compressed_size
+            if original_size:
+                ratio.observe(labels, compressed_size / original_size)
+            cpu.observe(labels, cpu_seconds)
+
+    def reset(self) -> None:
+        """全メトリクスを破棄（テスト用）"""
+        with self._lock:
+            self.requests.clear()
+            self.compression_bytes.clear()
+            for histogram in self.histograms + self.compression_histograms:
+                histogram.series.clear()
+
+    def render(self) -> str:
+        """Prometheus テキスト形式で出力"""
+        with self._lock:
+            lines = ['# HELP http_requests_total Total HTTP requests.', '# TYPE http_requests_total counter']
+            for labels, count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{{_format_labels(("method", "route", "status"), labels)}}} {count}')
+            for histogram in self.histograms:
+                lines.extend(histogram.render(('method', 'route')))
+            for name, index, help_text in (
+                ('http_response_compression_input_bytes_total', 0, 'Response bytes before compression.'),
+                ('http_response_compression_output_bytes_total', 1, 'Response bytes after compression.'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for labels, totals in sorted(self.compression_bytes.items()):
+                    lines.append(f'{name}{{{_format_labels(("encoding",), labels)}}} {totals[index]}')
+            for histogram in self.compression_histograms:
+                lines.extend(histogram.render(('encoding',)))
+        return '\n'.join(lines) + '\n'
+
+
+metrics_registry = MetricsRegistry()
+
+
+# リクエスト処理中に実行されたSQLの回数と時間を g に積算
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started_at'].pop()
+    if has_request_context() and 'request_started_at' in g:
+        g.sql_count += 1
+        g.sql_seconds += time.perf_counter() - started
+
+
+def _start_request_metrics():
+    g.request_started_at = time.perf_counter()
+    g.sql_count = 0
+    g.sql_seconds = 0.0
+
+
+def _record_request_metrics(response):
+    """Server-Timing ヘッダーを付与し、メトリクスを記録"""
+    if 'request_started_at' not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_started_at
+    response.headers['Server-Timing'] = (
+        f'app;dur={elapsed * 1000:.1f}, '
+        f'db;dur={g.sql_seconds * 1000:.1f};desc="{g.sql_count} queries"'
+    )
+    # 未定義のパスはラベルを増やさないよう "unmatched" にまとめる
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    size = None if response.is_streamed else response.calculate_content_length()
+    metrics_registry.observe(
+        request.method, route, response.status_code, elapsed, g.sql_count, g.sql_seconds, size
+    )
+    return response
+
+
+def init_metrics(app) -> None:
+    """リクエストの計測を app に登録（圧縮後のサイズを記録するため init_compression より先に呼ぶ）"""
+    app.before_request(_start_request_metrics)
+    app.after_request(_record_request_metrics)
@@ -0,0 +1,223 @@
+"""
+トークンバケットによるレート制限（ログイン・登録の総当たり / CPU枯渇対策）
+
+ログイン・登録は bcrypt でCPUを使うため、ハッシュ計算より前に IP・ユーザー名ごとの回数を制限する。
+キーごとに (残りトークン数, 最終更新時刻) だけを持ち、容量までのバーストを許して一定速度で補充する。
+REDIS_URL があれば Redis（Luaスクリプトで原子的に更新）で全ワーカーの制限を共有し、なければプロセス内で数える。
+バックエンドの障害時は制限せずに通す（FastAPI版 rate_limit.py と同じ仕様）
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import jsonify, request
+
+try:
+    import redis
+except ImportError:  # redis は任意の依存関係（無い場合はプロセス内のレート制限のみ）
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+_RATE_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+# キーに含めるユーザー名の最大長（長い入力でキーが肥大化しないように）
+_RATE_LIMIT_USERNAME_LENGTH = 64
+
+
+def parse_rate(value: str) -> tuple[int, float]:
+    """文字列（例: "5/minute" = 1分あたり5回、5回まで連続可）を (容量, 1秒あたりの補充数) に変換"""
+    count, _, period = value.strip().partition('/')
+    try:
+        seconds = _RATE_PERIODS[period.strip().lower() or 'second']
+        capacity = int(count)
+    except (KeyError, ValueError):
+        raise ValueError(f"invalid rate: {value!r} (expected e.g. '5/minute')") from None
+    if capacity <= 0:
+        raise ValueError(f'invalid rate: {value!r} (count must be positive)')
+    return capacity, capacity / seconds
+
+
+LOGIN_IP_RATE = parse_rate(os.getenv('RATE_LIMIT_LOGIN_IP', '20/minute'))
+LOGIN_USERNAME_RATE = parse_rate(os.getenv('RATE_LIMIT_LOGIN_USERNAME', '5/minute'))
+REGISTER_IP_RATE = parse_rate(os.getenv('RATE_LIMIT_REGISTER_IP', '10/minute'))
+
+
+class InMemoryRateLimitBackend:
+    """
+    プロセス内のトークンバケット（1ワーカー用・テスト用）
+
+    満杯まで補充済みのバケットは存在しないのと同じなので、アイドル状態のキーは追い出す。
+    キー数が max_keys を超えた場合は最も古く使われたキーから追い出す
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_keys: int = 100_000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> (残りトークン数, 最終更新時刻, 満杯に戻る時刻)。最終更新の古い順
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, key: str, capacity: int, per_second: float) -> float:
+        """トークンを1つ消費する。消費できれば 0、できなければ次に消費できるまでの秒数"""
+        with self._lock:
+            now = self._clock()
+            # 先頭（最終更新が古い順）から満杯に戻ったバケットを捨てる
+            while self._buckets and next(iter(self._buckets.values()))[2] <= now:
+                self._buckets.popitem(last=False)
+
+            tokens, updated_at, _ = self._buckets.pop(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated_at) * per_second)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / per_second
+
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / per_second)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+
+# KEYS[1]: バケットのキー / ARGV: 容量, 1秒あたりの補充数（時刻は Redis サーバーの TIME を使う）
+_RATE_LIMIT_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    """Redisのトークンバケット（複数ワーカー・複数ホストで制限を共有）"""
+
+    name = 'redis'
+
+    def __init__(self, client):
+        self.client = client
+        self._take = client.register_script(_RATE_LIMIT_SCRIPT)
+
+    def take(self, key: str, capacity: int, per_second: float) -> float:
+        return float(self._take(keys=[key], args=[capacity, per_second]))
+
+
+class RateLimiter:
+    """複数のバケット（IP 単位・ユーザー名単位など）をまとめて判定する"""
+
+    def __init__(self, backend, enabled: bool = True, prefix: str = 'rl:'):
+        self.backend = backend
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    def use_backend(self, backend) -> None:
+        """バックエンドを差し替え（テストで空のバケットから始める場合など）"""
+        with self._lock:
+            self.backend = backend
+            self.allowed = 0
+            self.limited = 0
+            self.errors = 0
+
+    def hit(self, *buckets) -> float:
+        """各バケット (key, (容量, 補充数)) からトークンを1つずつ消費し、最も長い待ち秒数を返す（0 なら許可）"""
+        if not self.enabled:
+            return 0.0
+        retry_after = 0.0
+        try:
+            for key, (capacity, per_second) in buckets:
+                retry_after = max(retry_after, self.backend.take(self.prefix + key, capacity, per_second))
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            logger.warning('rate limiter: backend failed, allowing request', exc_info=True)
+            return 0.0
+        with self._lock:
+            if retry_after > 0:
+                self.limited += 1
+            else:
+                self.allowed += 1
+        return retry_after
+
+    def stats(self) -> dict:
+        """許可・制限した回数などの統計情報"""
+        with self._lock:
+            stats = {
+                'backend': getattr(self.backend, 'name', type(self.backend).__name__),
+                'enabled': self.enabled,
+                'allowed': self.allowed,
+                'limited': self.limited,
+                'errors': self.errors,
+            }
+        if isinstance(self.backend, InMemoryRateLimitBackend):
+            stats['keys'] = len(self.backend)
+        return stats
+
+
+def create_rate_limit_backend():
+    """REDIS_URL があり redis パッケージがあれば Redis、なければプロセス内のバックエンドを作成"""
+    redis_url = os.getenv('REDIS_URL')
+    if redis_url and redis is not None:
+        return RedisRateLimitBackend(redis.Redis.from_url(redis_url))
+    return InMemoryRateLimitBackend(max_keys=RATE_LIMIT_MAX_KEYS)
+
+
+rate_limiter = RateLimiter(create_rate_limit_backend(), enabled=RATE_LIMIT_ENABLED)
+
+
+def rate_limit(route: str, ip_rate, username_rate=None, methods=('POST',)):
+    """
+    ルート単位のレート制限デコレータ（超過時は 429 と Retry-After を返す）
+
+    ip_rate は接続元IPごと、username_rate は JSON ボディの username ごとに制限する
+    （プロキシ配下では ProxyFix などで remote_addr を実際の接続元にしておく）
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if request.method in methods:
+                buckets = [(f'{route}:ip:{request.remote_addr or "unknown"}', ip_rate)]
+                if username_rate is not None:
+                    data = request.get_json(silent=True)
+                    username = data.get('username') if isinstance(data, dict) else None
+                    username = str(username or '').strip().lower()[:_RATE_LIMIT_USERNAME_LENGTH]
+                    if username:
+                        buckets.append((f'{route}:user:{username}', username_rate))
+
+                retry_after = rate_limiter.hit(*buckets)
+                if retry_after > 0:
+                    response = jsonify({'error': 'Too many requests'})
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(math.ceil(retry_after))
+                    return response
+            return f(*args, **kwargs)
+
+        return decorated
+
+    return decorator
@@ -0,0 +1,81 @@
+"""
+Async view (/async/api/*) tests for Flask
+"""
+import asyncio
+
+import pytest
+
+from app import async_db, create_access_token
+
+pytestmark = pytest.mark.skipif(async_db is None, reason="requires asyncpg, asgiref and PostgreSQL")
+
+
+@pytest.fixture(scope="function")
+def committed_user(app):
+    """A user with items committed through the async pool (the test transaction cannot see its own pool)"""
+    user_id = asyncio.run(async_db.fetchval(
+        "INSERT INTO users (username, email, password_hash, is_active, created_at, version) "
+        "VALUES ('async_user', 'async_user@example.com', 'x', true, now(), 1) RETURNING id"
+    ))
+    asyncio.run(async_db.fetch(
+        "INSERT INTO items (title, price, owner_id, created_at, version) "
+        "SELECT 'Item ' || n, n, $1, now() - n * interval '1 minute', 1 FROM generate_series(1, 5) n",
+        user_id,
+    ))
+    try:
+        yield {"id": user_id, "headers": {"Authorization": f"Bearer {create_access_token('async_user')}"}}
+    finally:
+        # items are removed by ON DELETE CASCADE
+        asyncio.run(async_db.fetch("DELETE FROM users WHERE id = $1", user_id))
+
+
+def test_item_list_matches_sync_endpoint(client, committed_user):
+    """Should return the same pages and cursors as /api/items"""
+    headers = committed_user["headers"]
+    cursor = ""
+    pages = 0
+    while cursor is not None:
+        sync_page = client.get(f"/api/items?cursor={cursor}&per_page=2", headers=headers).get_json()
+        async_page = client.get(f"/async/api/items?cursor={cursor}&per_page=2", headers=headers).get_json()
+        assert async_page == sync_page
+        cursor = async_page["next_cursor"]
+        pages += 1
+
+    assert pages == 3
+    offset = client.get("/async/api/items?page=2&per_page=2", headers=headers).get_json()
+    assert offset == client.get("/api/items?page=2&per_page=2", headers=headers).get_json()
+    assert offset["total"] == 5
+    clamped = client.get("/async/api/items?cursor=&per_page=-1", headers=headers).get_json()
+    assert clamped == client.get("/api/items?cursor=&per_page=-1", headers=headers).get_json()
+    assert len(clamped["items"]) == 5
+
+
+def test_detail_etag_and_not_found(client, committed_user):
+    """Should honour If-None-Match and return 404 for missing rows"""
+    headers = committed_user["headers"]
+    user = client.get(f"/async/api/users/{committed_user['id']}", headers=headers)
+
+    assert user.get_json() == client.get(f"/api/users/{committed_user['id']}", headers=headers).get_json()
+    not_modified = client.get(
+        f"/async/api/users/{committed_user['id']}", headers={**headers, "If-None-Match": user.headers["ETag"]}
+    )
+    assert not_modified.status_code == 304
+    assert client.get("/async/api/items/0", headers=headers).status_code == 404
+
+
+def test_requires_token(client):
+    """Should reject requests without a valid token like token_required"""
+    assert client.get("/async/api/items").get_json() == {"error": "Access token required"}
+    assert client.get("/async/api/users", headers={"Authorization": "Bearer bad"}).status_code == 401
+
+
+def test_database_errors_are_not_reported_as_401(client, monkeypatch):
+    """Should let a failing user lookup surface as a server error instead of an invalid token"""
+    async def failing(*args):
+        raise ConnectionError("pool unavailable")
+
+    monkeypatch.setattr(async_db, "fetchrow", failing)
+    headers = {"Authorization": f"Bearer {create_access_token('async_user')}"}
+
+    with pytest.raises(ConnectionError):
+        client.get("/async/api/items", headers=headers)
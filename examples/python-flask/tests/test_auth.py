@@ -50,7 +50,7 @@ def test_register_duplicate_email(client, test_user_data):
     response = client.post("/auth/register", json=duplicate_data)
 
     assert response.status_code == 400
-    assert "already exists" in response.get_json()["error"].lower()
+    assert response.get_json()["error"] == "Email already exists"
 
 
 def test_register_short_password(client):
@@ -0,0 +1,68 @@
+"""
+Response compression tests for Flask
+"""
+import gzip
+
+
+def _create_items(client, count=40):
+    owner_id = client.user_data["user"]["id"]
+    items = [
+        {"title": f"Compressible item {i}", "description": "x" * 50, "price": 1.0, "owner_id": owner_id}
+        for i in range(count)
+    ]
+    assert client.post("/api/items/bulk", json={"items": items}).status_code == 201
+
+
+def test_large_json_is_gzipped(authenticated_client):
+    """Should gzip list responses above the size threshold"""
+    _create_items(authenticated_client)
+
+    response = authenticated_client.get(
+        "/api/items?per_page=100", headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) == len(response.data)
+    assert len(gzip.decompress(response.data)) > len(response.data)
+
+
+def test_small_and_unaccepted_responses_are_not_compressed(authenticated_client):
+    """Should leave small bodies and clients without gzip support alone"""
+    _create_items(authenticated_client)
+
+    small = authenticated_client.get("/health", headers={"Accept-Encoding": "gzip"})
+    identity = authenticated_client.get(
+        "/api/items?per_page=100", headers={"Accept-Encoding": "identity"}
+    )
+
+    assert "Content-Encoding" not in small.headers
+    assert "Content-Encoding" not in identity.headers
+    assert identity.get_json()["items"]
+
+
+def test_streamed_response_is_compressed_in_chunks(authenticated_client):
+    """Should compress streamed exports without a Content-Length"""
+    _create_items(authenticated_client)
+
+    response = authenticated_client.get(
+        "/api/items/export?format=ndjson", headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert len(gzip.decompress(response.data).splitlines()) == 40
+
+
+def test_compression_metrics(authenticated_client):
+    """Should record bytes and CPU time per encoding"""
+    _create_items(authenticated_client)
+    authenticated_client.get("/api/items?per_page=100", headers={"Accept-Encoding": "gzip"})
+
+    text = authenticated_client.get("/metrics").get_data(as_text=True)
+
+    assert 'http_response_compression_input_bytes_total{encoding="gzip"}' in text
+    assert 'http_response_compression_ratio_count{encoding="gzip"} 1' in text
+    assert 'http_response_compression_cpu_seconds_count{encoding="gzip"} 1' in text
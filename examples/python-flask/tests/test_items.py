@@ -1,6 +1,10 @@
 """
 Items API endpoint tests for Flask
 """
+import csv
+import io
+import json
+
 import pytest
 
 
@@ -44,6 +48,58 @@ def test_create_item_missing_fields(authenticated_client):
     assert response.status_code == 400
 
 
+def test_create_item_invalid_price(authenticated_client):
+    """Should reject a non-numeric price with 400 instead of failing in the stats update"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+
+    response = authenticated_client.post(
+        "/api/items", json={"title": "Item", "price": "12.5", "owner_id": owner_id}
+    )
+
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == ["Price must be a positive number"]
+
+
+def test_update_item_invalid_price(authenticated_client):
+    """Should reject an invalid price on update and keep the item unchanged"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    created = authenticated_client.post(
+        "/api/items", json={"title": "Item", "price": 10.0, "owner_id": owner_id}
+    ).get_json()["item"]
+
+    for price in ("12.5", -1, True):
+        response = authenticated_client.put(f"/api/items/{created['id']}", json={"price": price})
+        assert response.status_code == 400
+    assert authenticated_client.put(f"/api/items/{created['id']}", data="null",
+                                    content_type="application/json").status_code == 400
+
+    assert authenticated_client.get(f"/api/items/{created['id']}").get_json()["price"] == 10.0
+
+
+def test_create_item_unknown_owner(authenticated_client):
+    """Should map only the owner_id foreign key violation to 404"""
+    from sqlalchemy import insert
+    from sqlalchemy.exc import IntegrityError
+
+    import app as app_module
+
+    response = authenticated_client.post(
+        "/api/items", json={"title": "Orphan", "price": 1.0, "owner_id": 999999}
+    )
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "User not found"}
+
+    owner_id = authenticated_client.user_data["user"]["id"]
+    item_id = authenticated_client.post(
+        "/api/items", json={"title": "Item", "price": 1.0, "owner_id": owner_id}
+    ).get_json()["item"]["id"]
+    session = app_module.db.session
+    with pytest.raises(IntegrityError) as duplicate:
+        with session.begin_nested():
+            session.execute(insert(app_module.Item).values(id=item_id, title="Dup", price=1.0, owner_id=owner_id))
+    assert app_module._is_missing_owner(duplicate.value) is False
+
+
 def test_get_items_list(authenticated_client):
     """Should return items list with authentication"""
     # Create test items
@@ -66,6 +122,91 @@ def test_get_items_list(authenticated_client):
     assert len(data["items"]) >= 3
 
 
+def test_get_items_cursor_pagination(authenticated_client):
+    """Should walk all items with keyset cursors"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    for i in range(5):
+        authenticated_client.post(
+            "/api/items",
+            json={"title": f"Item {i}", "price": 10.0, "owner_id": owner_id},
+        )
+
+    seen = []
+    response = authenticated_client.get("/api/items?cursor=&per_page=2")
+    while True:
+        assert response.status_code == 200
+        data = response.get_json()
+        seen.extend(item["id"] for item in data["items"])
+        if not data["next_cursor"]:
+            break
+        response = authenticated_client.get(
+            f"/api/items?cursor={data['next_cursor']}&per_page=2"
+        )
+
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+
+def test_get_items_cursor_invalid_per_page(authenticated_client):
+    """Should fall back to the default page size like the offset path instead of passing it to LIMIT"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    for i in range(3):
+        authenticated_client.post(
+            "/api/items",
+            json={"title": f"Item {i}", "price": 10.0, "owner_id": owner_id},
+        )
+
+    for per_page in (-1, 0):
+        response = authenticated_client.get(f"/api/items?cursor=&per_page={per_page}")
+        assert response.status_code == 200
+        data = response.get_json()
+        assert len(data["items"]) == 3
+        assert data["next_cursor"] is None
+
+
+def test_get_items_invalid_cursor(authenticated_client):
+    """Should reject malformed cursors"""
+    response = authenticated_client.get("/api/items?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_get_items_count_modes(authenticated_client):
+    """Should compute total according to the requested count mode"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    for i in range(3):
+        authenticated_client.post(
+            "/api/items",
+            json={"title": f"Item {i}", "price": 10.0, "owner_id": owner_id},
+        )
+
+    for mode in ("exact", "cached", "estimate"):
+        data = authenticated_client.get(f"/api/items?count={mode}").get_json()
+        assert data["total"] == 3
+        assert data["count_mode"] == mode
+
+    data = authenticated_client.get("/api/items?count=none").get_json()
+    assert data["total"] is None
+    assert len(data["items"]) == 3
+
+
+def test_get_items_cached_count_invalidated_on_insert(authenticated_client):
+    """Should drop the cached total when an item is created"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    assert authenticated_client.get("/api/items?count=cached").get_json()["total"] == 0
+
+    authenticated_client.post(
+        "/api/items", json={"title": "New Item", "price": 10.0, "owner_id": owner_id}
+    )
+
+    assert authenticated_client.get("/api/items?count=cached").get_json()["total"] == 1
+
+
+def test_get_items_invalid_count_mode(authenticated_client):
+    """Should reject unknown count modes"""
+    response = authenticated_client.get("/api/items?count=bogus")
+    assert response.status_code == 400
+
+
 def test_get_items_without_auth(client):
     """Should fail without authentication"""
     response = client.get("/api/items")
@@ -141,6 +282,35 @@ def test_delete_item_success(authenticated_client):
     assert get_response.status_code == 404
 
 
+def test_count_cache_invalidated_after_commit(app):
+    """Should keep cached counts until commit and drop item counts when users are deleted by cascade"""
+    from sqlalchemy import delete
+
+    import app as app_module
+    from app import Item, User, db
+
+    owner = User(username="counted", email="counted@example.com", password_hash="x")
+    db.session.add(owner)
+    db.session.commit()
+    db.session.add(Item(title="Item", price=1.0, owner_id=owner.id))
+    db.session.commit()
+    assert app_module._cached_count(Item) == 1
+
+    db.session.add(Item(title="Item", price=2.0, owner_id=owner.id))
+    db.session.flush()
+    assert "items" in app_module._count_cache
+    db.session.commit()
+    assert "items" not in app_module._count_cache
+
+    assert app_module._cached_count(Item) == 2
+    app_module._cached_count(User)
+    db.session.execute(delete(User).where(User.id == owner.id))
+    db.session.commit()
+
+    assert "users" not in app_module._count_cache
+    assert app_module._cached_count(Item) == 0
+
+
 def test_cascade_delete(app, authenticated_client):
     """Should cascade delete items when user is deleted"""
     user_id = authenticated_client.user_data["user"]["id"]
@@ -164,3 +334,359 @@ def test_cascade_delete(app, authenticated_client):
         # Verify item is deleted
         item = Item.query.get(item_id)
         assert item is None
+
+
+def test_user_items_paginated(authenticated_client):
+    """Should return the user and a keyset-paginated page of their items"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    for i in range(3):
+        authenticated_client.post(
+            "/api/items",
+            json={"title": f"Item {i}", "price": 10.0, "owner_id": owner_id},
+        )
+
+    response = authenticated_client.get(f"/api/users/{owner_id}/items?per_page=2")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["user"]["id"] == owner_id
+    assert [item["title"] for item in data["items"]] == ["Item 0", "Item 1"]
+    assert data["next_cursor"]
+
+    response = authenticated_client.get(
+        f"/api/users/{owner_id}/items?per_page=2&cursor={data['next_cursor']}"
+    )
+    data = response.get_json()
+    assert [item["title"] for item in data["items"]] == ["Item 2"]
+    assert data["next_cursor"] is None
+
+
+def test_user_items_clamps_per_page(authenticated_client):
+    """Should clamp per_page to 1..100 instead of passing it to LIMIT"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    for i in range(2):
+        authenticated_client.post(
+            "/api/items",
+            json={"title": f"Item {i}", "price": 10.0, "owner_id": owner_id},
+        )
+
+    response = authenticated_client.get(f"/api/users/{owner_id}/items?per_page=-1")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["per_page"] == 1
+    assert [item["title"] for item in data["items"]] == ["Item 0"]
+    assert data["next_cursor"]
+
+    data = authenticated_client.get(f"/api/users/{owner_id}/items?per_page=1000").get_json()
+    assert data["per_page"] == 100
+    assert len(data["items"]) == 2
+
+
+def test_user_items_without_items(authenticated_client):
+    """Should return the user with an empty list when they own no items"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+
+    data = authenticated_client.get(f"/api/users/{owner_id}/items").get_json()
+
+    assert data["user"]["id"] == owner_id
+    assert data["items"] == []
+
+
+def test_user_items_stream(authenticated_client):
+    """Should stream every item in the same JSON shape"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    for i in range(3):
+        authenticated_client.post(
+            "/api/items",
+            json={"title": f"Item {i}", "price": 10.0, "owner_id": owner_id},
+        )
+
+    response = authenticated_client.get(f"/api/users/{owner_id}/items?stream=true")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["user"]["id"] == owner_id
+    assert len(data["items"]) == 3
+
+
+def test_user_items_unknown_user(authenticated_client):
+    """Should return 404 for a non-existent user"""
+    assert authenticated_client.get("/api/users/999999/items").status_code == 404
+    assert authenticated_client.get("/api/users/999999/items?stream=true").status_code == 404
+
+
+def test_user_detail_uses_public_columns(authenticated_client):
+    """Should return the same fields as to_dict() without the password hash"""
+    user = authenticated_client.user_data["user"]
+
+    response = authenticated_client.get(f"/api/users/{user['id']}")
+
+    assert response.status_code == 200
+    assert response.get_json() == user
+    assert authenticated_client.get("/api/users/999999").status_code == 404
+
+
+def test_item_detail_matches_to_dict(authenticated_client):
+    """Should return the column-projected item in the same shape as to_dict()"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    created = authenticated_client.post(
+        "/api/items",
+        json={"title": "Projected", "price": 5.0, "owner_id": owner_id},
+    ).get_json()["item"]
+
+    data = authenticated_client.get(f"/api/items/{created['id']}").get_json()
+
+    assert data == created
+
+
+def test_search_items_prefix(authenticated_client):
+    """Should match every word as a prefix of title or description words"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    for title, description in (("Blue widget", None), ("Gadget", "Widget accessory"), ("Unrelated", None)):
+        authenticated_client.post(
+            "/api/items",
+            json={"title": title, "description": description, "price": 10.0, "owner_id": owner_id},
+        )
+
+    response = authenticated_client.get("/api/items/search?q=widg")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert {item["title"] for item in data["items"]} == {"Blue widget", "Gadget"}
+    ranks = [item["rank"] for item in data["items"]]
+    assert ranks == sorted(ranks, reverse=True)
+
+
+def test_search_items_cursor_pagination(authenticated_client):
+    """Should walk all matches with (rank, id) cursors without duplicates"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    for i in range(5):
+        authenticated_client.post(
+            "/api/items",
+            json={"title": f"Lamp {i}", "price": 10.0, "owner_id": owner_id},
+        )
+
+    seen = []
+    url = "/api/items/search?q=lamp&per_page=2"
+    data = authenticated_client.get(url).get_json()
+    while True:
+        seen.extend(item["id"] for item in data["items"])
+        if not data["next_cursor"]:
+            break
+        data = authenticated_client.get(f"{url}&cursor={data['next_cursor']}").get_json()
+
+    assert len(seen) == len(set(seen)) == 5
+
+
+def test_search_items_invalid_input(authenticated_client):
+    """Should reject empty queries and malformed cursors"""
+    assert authenticated_client.get("/api/items/search?q=!!!").status_code == 400
+    assert authenticated_client.get("/api/items/search?q=lamp&cursor=bad").status_code == 400
+
+
+def test_item_stats(authenticated_client):
+    """Should aggregate counts and prices per owner and day, refreshing after writes"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    for price in (5.0, 15.0):
+        authenticated_client.post(
+            "/api/items",
+            json={"title": "Item", "price": price, "owner_id": owner_id},
+        )
+
+    data = authenticated_client.get("/api/items/stats").get_json()
+    assert (data["item_count"], data["price_total"], data["avg_price"]) == (2, 20.0, 10.0)
+    assert data["owners"][0]["owner_id"] == owner_id
+    assert [day["item_count"] for day in data["daily"]] == [2]
+
+    authenticated_client.post(
+        "/api/items/bulk", json={"items": [{"title": "Bulk", "price": 4.0, "owner_id": owner_id}]}
+    )
+
+    assert authenticated_client.get("/api/items/stats").get_json()["item_count"] == 3
+    assert authenticated_client.get("/api/items/stats?days=0").status_code == 400
+
+
+def test_item_stats_follow_updates_and_deletes(authenticated_client, monkeypatch):
+    """Should apply price changes and deletes incrementally, summing daily shards, like a rebuild"""
+    import app as app_module
+
+    owner_id = authenticated_client.user_data["user"]["id"]
+    ids = []
+    for shard, price in enumerate((5.0, 15.0, 30.0)):
+        monkeypatch.setattr(app_module, "_daily_shard", lambda shard=shard: shard)
+        response = authenticated_client.post(
+            "/api/items", json={"title": "Item", "price": price, "owner_id": owner_id}
+        )
+        ids.append(response.get_json()["item"]["id"])
+
+    authenticated_client.put(f"/api/items/{ids[0]}", json={"price": 7.0})
+    authenticated_client.delete(f"/api/items/{ids[2]}")
+
+    data = authenticated_client.get("/api/items/stats").get_json()
+    assert (data["item_count"], data["price_total"]) == (2, 22.0)
+    assert [(day["item_count"], day["price_total"]) for day in data["daily"]] == [(2, 22.0)]
+
+    app_module.rebuild_item_stats()
+
+    assert authenticated_client.get("/api/items/stats").get_json() == data
+
+
+def test_item_stats_follow_statement_deletes(app, authenticated_client):
+    """Should subtract items removed by delete(User) cascades and delete(Item) statements"""
+    from sqlalchemy import delete
+
+    from app import Item, User, db
+
+    owner_id = authenticated_client.user_data["user"]["id"]
+    authenticated_client.post("/api/items", json={"title": "Kept", "price": 5.0, "owner_id": owner_id})
+    other = User(username="leaving", email="leaving@example.com", password_hash="x")
+    db.session.add(other)
+    db.session.flush()
+    db.session.add_all([Item(title="Gone", price=price, owner_id=other.id) for price in (10.0, 20.0)])
+    db.session.add(Item(title="Dropped", price=1.0, owner_id=owner_id))
+    db.session.commit()
+    assert authenticated_client.get("/api/items/stats").get_json()["item_count"] == 4
+
+    db.session.execute(delete(User).where(User.id == other.id))
+    db.session.execute(delete(Item).where(Item.title == "Dropped"))
+    db.session.commit()
+
+    data = authenticated_client.get("/api/items/stats").get_json()
+    assert (data["item_count"], data["price_total"]) == (1, 5.0)
+    assert [(day["item_count"], day["price_total"]) for day in data["daily"]] == [(1, 5.0)]
+
+
+def test_export_items_ndjson(authenticated_client):
+    """Should stream every item as one JSON object per line"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    for i in range(3):
+        authenticated_client.post(
+            "/api/items",
+            json={"title": f"Item {i}", "price": 10.0, "owner_id": owner_id},
+        )
+
+    response = authenticated_client.get("/api/items/export")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["title"] for line in lines] == ["Item 0", "Item 1", "Item 2"]
+
+
+def test_export_items_csv(authenticated_client):
+    """Should stream every item as CSV with a header row"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    for i in range(2):
+        authenticated_client.post(
+            "/api/items",
+            json={"title": f"Item {i}", "price": 10.0, "owner_id": owner_id},
+        )
+
+    response = authenticated_client.get("/api/items/export?format=csv")
+
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row["title"] for row in rows] == ["Item 0", "Item 1"]
+
+
+def test_export_items_invalid_format(authenticated_client):
+    """Should reject unknown formats"""
+    response = authenticated_client.get("/api/items/export?format=xml")
+    assert response.status_code == 400
+
+
+def test_bulk_create_items_success(authenticated_client):
+    """Should create every item in one request"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    items = [{"title": f"Bulk {i}", "price": 1.0 + i, "owner_id": owner_id} for i in range(5)]
+
+    response = authenticated_client.post("/api/items/bulk", json={"items": items})
+
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data["errors"] == []
+    assert sorted(item["title"] for item in data["items"]) == [f"Bulk {i}" for i in range(5)]
+    assert authenticated_client.get("/api/items?count=exact").get_json()["total"] == 5
+
+
+def test_bulk_create_items_atomic_rejects_all(authenticated_client):
+    """Should create nothing when any row is invalid in atomic mode"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    items = [
+        {"title": "Good", "price": 1.0, "owner_id": owner_id},
+        {"title": "Unknown owner", "price": 1.0, "owner_id": 999999},
+    ]
+
+    response = authenticated_client.post("/api/items/bulk", json={"items": items})
+
+    assert response.status_code == 422
+    assert response.get_json()["errors"] == [{"index": 1, "errors": ["User not found"]}]
+    assert authenticated_client.get("/api/items").get_json()["items"] == []
+
+
+def test_bulk_create_items_partial(authenticated_client):
+    """Should create valid rows and report invalid ones in partial mode"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    items = [
+        {"title": "Good", "price": 1.0, "owner_id": owner_id},
+        {"title": "", "price": 1.0, "owner_id": owner_id},
+        "not an object",
+    ]
+
+    response = authenticated_client.post(
+        "/api/items/bulk", json={"items": items, "mode": "partial"}
+    )
+
+    assert response.status_code == 201
+    data = response.get_json()
+    assert [item["title"] for item in data["items"]] == ["Good"]
+    assert [error["index"] for error in data["errors"]] == [1, 2]
+
+
+def _create_item(client, title="Tagged"):
+    owner_id = client.user_data["user"]["id"]
+    response = client.post("/api/items", json={"title": title, "price": 10.0, "owner_id": owner_id})
+    return response.get_json()["item"]["id"]
+
+
+def test_item_if_none_match_returns_304(authenticated_client):
+    """Should answer 304 with an empty body while the item's ETag still matches"""
+    item_id = _create_item(authenticated_client)
+
+    first = authenticated_client.get(f"/api/items/{item_id}")
+    etag = first.headers["ETag"]
+    second = authenticated_client.get(f"/api/items/{item_id}", headers={"If-None-Match": etag})
+
+    assert etag.startswith('W/"')
+    assert second.status_code == 304
+    assert second.data == b""
+    assert second.headers["ETag"] == etag
+
+
+def test_item_update_with_if_match(authenticated_client):
+    """Should update with a current If-Match and return the new ETag"""
+    item_id = _create_item(authenticated_client)
+    etag = authenticated_client.get(f"/api/items/{item_id}").headers["ETag"]
+
+    updated = authenticated_client.put(
+        f"/api/items/{item_id}", json={"price": 12.5}, headers={"If-Match": etag}
+    )
+    response = authenticated_client.get(f"/api/items/{item_id}", headers={"If-None-Match": etag})
+
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] != etag
+    assert response.status_code == 200
+    assert response.get_json()["price"] == 12.5
+
+
+def test_item_stale_if_match_returns_412(authenticated_client):
+    """Should reject an update made against an outdated ETag"""
+    item_id = _create_item(authenticated_client)
+    etag = authenticated_client.get(f"/api/items/{item_id}").headers["ETag"]
+    authenticated_client.put(f"/api/items/{item_id}", json={"title": "First"}, headers={"If-Match": etag})
+
+    response = authenticated_client.put(
+        f"/api/items/{item_id}", json={"title": "Second"}, headers={"If-Match": etag}
+    )
+
+    assert response.status_code == 412
+    assert authenticated_client.get(f"/api/items/{item_id}").get_json()["title"] == "First"
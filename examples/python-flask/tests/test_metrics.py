@@ -0,0 +1,55 @@
+"""
+Request instrumentation tests for Flask
+"""
+
+
+def test_server_timing_header(authenticated_client):
+    """Should report app and db timings in Server-Timing"""
+    response = authenticated_client.get("/api/items")
+
+    assert response.status_code == 200
+    server_timing = response.headers["Server-Timing"]
+    assert server_timing.startswith("app;dur=")
+    assert "db;dur=" in server_timing
+    assert "queries" in server_timing
+
+
+def test_metrics_group_by_url_rule(authenticated_client):
+    """Should aggregate by URL rule and count SQL statements"""
+    owner_id = authenticated_client.user_data["user"]["id"]
+    created = authenticated_client.post(
+        "/api/items", json={"title": "Metric Item", "price": 10.0, "owner_id": owner_id}
+    )
+    authenticated_client.get(f"/api/items/{created.get_json()['item']['id']}")
+
+    response = authenticated_client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    text = response.get_data(as_text=True)
+    assert 'http_requests_total{method="GET",route="/api/items/<int:item_id>",status="200"} 1' in text
+    sql_sum = next(
+        line for line in text.splitlines()
+        if line.startswith('http_request_db_statements_sum{method="POST",route="/api/items"}')
+    )
+    assert float(sql_sum.split()[-1]) >= 1
+
+
+def test_unmatched_routes_share_label(client):
+    """Should not create a label per unknown path"""
+    client.get("/no-such-path-1")
+    client.get("/no-such-path-2")
+
+    response = client.get("/metrics")
+
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 2' in response.get_data(as_text=True)
+
+
+def test_stats_requires_authentication(client, authenticated_client):
+    """Should expose internal counters to authenticated users only"""
+    assert client.get("/stats").status_code == 401
+
+    response = authenticated_client.get("/stats")
+
+    assert response.status_code == 200
+    assert {"db_pool", "rate_limiter", "user_filter"} <= set(response.get_json())
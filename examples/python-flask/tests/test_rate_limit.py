@@ -0,0 +1,69 @@
+"""
+Rate limiting tests for Flask
+"""
+import pytest
+
+import app as app_module
+from rate_limit import InMemoryRateLimitBackend, parse_rate, rate_limiter
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_rate():
+    """Should turn "count/period" into capacity and refill rate"""
+    assert parse_rate("5/minute") == (5, 5 / 60)
+    with pytest.raises(ValueError):
+        parse_rate("5/fortnight")
+
+
+def test_token_bucket_burst_refill_and_eviction():
+    """Should allow a burst, refill over time and drop idle buckets"""
+    clock = FakeClock()
+    backend = InMemoryRateLimitBackend(clock=clock)
+
+    assert [backend.take("k", 3, 3 / 60) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert backend.take("k", 3, 3 / 60) == pytest.approx(20.0)
+
+    clock.now += 60
+    backend.take("other", 3, 3 / 60)
+    assert len(backend) == 1
+
+
+def test_login_limited_before_password_check(client, test_user_data, monkeypatch):
+    """Should return 429 with Retry-After without checking the password"""
+    client.post("/auth/register", json=test_user_data)
+    checked = []
+    monkeypatch.setattr(app_module, "check_password", lambda password_hash, password: checked.append(password))
+    body = {"username": test_user_data["username"], "password": "wrong"}
+
+    statuses = [client.post("/auth/token", json=body).status_code for _ in range(5)]
+    limited = client.post("/auth/token", json=body)
+
+    assert statuses == [401] * 5
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) > 0
+    assert len(checked) == 5
+    other = client.post("/auth/token", json={"username": "someone", "password": "wrong"})
+    assert other.status_code == 401
+    assert rate_limiter.stats()["limited"] == 1
+
+
+def test_register_limited_per_ip(client):
+    """Should limit registrations from one address"""
+    statuses = [
+        client.post("/auth/register", json={
+            "username": f"user{i}", "email": f"user{i}@example.com", "password": "password123",
+        }).status_code
+        for i in range(11)
+    ]
+
+    assert statuses[:10] == [201] * 10
+    assert statuses[10] == 429
@@ -0,0 +1,119 @@
+"""
+Existing-user Bloom filter tests for Flask
+"""
+import app as app_module
+from app import user_filter, user_identities
+from user_filter import BloomFilter, UserFilter
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bloom_filter_no_false_negatives():
+    """Should report every added value as present and few others"""
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f"user{i}")
+
+    assert all(f"user{i}" in bloom for i in range(1000))
+    assert sum(f"other{i}" in bloom for i in range(10000)) < 300
+
+
+def test_filter_refreshes_after_interval(app, test_user_data):
+    """Should trust a miss only while fresh and look up the database while stale"""
+    clock = FakeClock()
+    users = UserFilter(user_identities, capacity=100, refresh_interval=1.0, clock=clock)
+
+    # Not loaded yet: load, but let this lookup go to the database
+    assert users.might_exist("nobody") is True
+    assert users.might_exist("nobody") is False
+    app_module.db.session.add(app_module.User(
+        username=test_user_data["username"], email=test_user_data["email"], password_hash="x",
+    ))
+    app_module.db.session.commit()
+
+    clock.now += 1.0
+    assert users.might_exist(test_user_data["username"]) is True
+    assert users.might_exist(test_user_data["email"]) is True
+    assert users.might_exist("nobody") is False
+    assert users.stats()["refreshes"] == 1
+
+
+def test_failed_refresh_falls_back_to_database(app):
+    """Should answer "might exist" when the query fails and query without holding the lock"""
+    clock = FakeClock()
+    calls = []
+
+    def identities(after_id=0, ids=()):
+        calls.append(users._lock.locked())
+        if len(calls) > 1:
+            raise RuntimeError("database down")
+        return user_identities(after_id, ids)
+
+    users = UserFilter(identities, capacity=100, refresh_interval=1.0, clock=clock)
+    users.might_exist("nobody")
+    clock.now += 1.0
+
+    assert users.might_exist("nobody") is True
+    assert calls == [False, False]
+    # The failed refresh did not make the filter fresh again
+    assert users.might_exist("nobody") is True
+    assert len(calls) == 3
+
+
+def test_unknown_username_skips_lookup(client, test_user_data, monkeypatch):
+    """Should reject unknown users with one dummy hash check and register new users immediately"""
+    client.post("/auth/register", json=test_user_data)
+    checked = []
+    monkeypatch.setattr(app_module, "check_password", lambda hashed, password: checked.append(hashed))
+    # The first lookup loads the filter
+    user_filter.might_exist("ghost")
+
+    response = client.post("/auth/token", json={"username": "ghost", "password": "password123"})
+
+    assert response.status_code == 401
+    assert checked == [app_module.DUMMY_PASSWORD_HASH]
+    assert user_filter.stats()["definite_misses"] >= 1
+    duplicate = client.post("/auth/register", json=test_user_data)
+    assert duplicate.status_code == 400
+    assert duplicate.get_json()["error"] == "Username already exists"
+
+
+def test_filter_picks_up_out_of_order_commits(app):
+    """Should re-check ids below the highest one read until they commit or time out"""
+    clock = FakeClock()
+    users = UserFilter(user_identities, capacity=100, refresh_interval=1.0, pending_timeout=5.0, clock=clock)
+    session = app_module.db.session
+    first = app_module.User(username="alice", email="alice@example.com", password_hash="x")
+    session.add(first)
+    session.commit()
+    users.might_exist("nobody")
+    # Sequence values consumed by earlier rolled-back tests are gaps too
+    gaps = users.stats()["pending_ids"]
+
+    # first.id + 2 commits first; first.id + 1 is still in flight when the refresh reads it
+    session.add(app_module.User(id=first.id + 2, username="carol", email="carol@example.com", password_hash="x"))
+    session.commit()
+    clock.now += 1.0
+    users.might_exist("nobody")
+    assert users.might_exist("bob") is False
+    assert users.stats()["pending_ids"] == gaps + 1
+
+    session.add(app_module.User(id=first.id + 1, username="bob", email="bob@example.com", password_hash="x"))
+    session.commit()
+    clock.now += 1.0
+    users.might_exist("nobody")
+    assert users.might_exist("bob") is True
+    assert users.stats()["pending_ids"] == gaps
+
+    # Gaps that never commit are dropped once re-checked after the timeout
+    clock.now += 10.0
+    users.might_exist("nobody")
+    assert users.stats()["pending_ids"] == 0
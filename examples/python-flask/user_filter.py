@@ -0,0 +1,211 @@
+"""
+既存ユーザー名・メールアドレスのブルームフィルター（ログイン時の存在チェック用）
+
+リスト型攻撃の大半は存在しないユーザー名のため、全ユーザーのユーザー名・メールアドレスを
+ビット配列に読み込み、「確実に存在しない」値はDBに問い合わせずに判定する（FastAPI版 user_filter.py と同じ仕様）。
+
+- 最初に使われたときに読み込み、このプロセスで作成したユーザーはすぐに追加する
+- 「無い」と判定するのは最後の読み込みから USER_FILTER_REFRESH_SECONDS 秒以内だけ。それより古ければ DB で確認し、
+  差分（前回より大きい ID）を読み込み直す（その秒数の間に他のワーカーで登録されたユーザーは「無い」と判定し得る）
+- DB への問い合わせはロックの外で行い、読み込んだ結果だけをロック内で差し替える
+- ID はコミット順に並ばないため、最大 ID より小さいのに見えなかった ID は未確認として覚えておき、
+  差分の読み込みのたびに一緒に問い合わせる（pending_timeout 秒を過ぎたらロールバックされたものとみなす）
+- 偽陽性は DB で確認するだけなので害はない。削除されたユーザーのビットは残るが判定は誤らない
+"""
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+USER_FILTER_ENABLED = os.getenv('USER_FILTER_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes', 'on')
+USER_FILTER_CAPACITY = int(os.getenv('USER_FILTER_CAPACITY', '100000'))  # 想定ユーザー数
+USER_FILTER_FALSE_POSITIVE_RATE = float(os.getenv('USER_FILTER_FALSE_POSITIVE_RATE', '0.01'))
+USER_FILTER_REFRESH_SECONDS = float(os.getenv('USER_FILTER_REFRESH_SECONDS', '1'))
+# 未確認の ID として覚えておく件数の上限（最大 ID の手前この件数の範囲だけを追う）
+PENDING_ID_WINDOW = 1000
+
+
+class BloomFilter:
+    """文字列のブルームフィルター（capacity 件まで false_positive_rate 以下の偽陽性率）"""
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        # 1回のハッシュから2つの値を取り出し、h1 + i*h2 で hash_count 個の位置を作る（double hashing）
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+
+class UserFilter:
+    """
+    ユーザー名・メールアドレスが存在し得るかを判定する（読み込めない間は常に「存在し得る」）
+
+    identities(after_id, ids) は ID が after_id より大きい、または ids に含まれるユーザーの
+    (id, username, email) を ID 順に返す関数（app.py の user_identities）
+    """
+
+    def __init__(self, identities, enabled: bool = True, capacity: int = 100_000, false_positive_rate: float = 0.01,
+                 refresh_interval: float = 1.0, pending_timeout: float = 60.0, clock=time.monotonic):
+        self._identities = identities
+        self.enabled = enabled
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.refresh_interval = refresh_interval
+        self.pending_timeout = pending_timeout  # コミット待ちの ID を問い合わせ続ける秒数
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        """フィルターを破棄して未読み込みの状態に戻す"""
+        self._filter = None
+        self._max_id = 0
+        # 最大 ID より小さいのにまだ見えていない ID -> 最初に見えなかった時刻
+        self._pending = {}
+        # 最後に読み込みに成功した問い合わせの開始時刻（この時点までにコミットされたユーザーは含まれる）
+        self._refreshed_at = None
+        self._refreshing = False
+        # 読み込み中に add されたユーザー（作り直したフィルターに入れ直す）
+        self._added = []
+        self.definite_misses = 0
+        self.refreshes = 0
+
+    def _track(self, rows) -> None:
+        """
+        読み込んだ行から最大 ID と未確認の ID（前回の最大 ID より大きい欠番）を更新（ロック内で呼ぶ）
+
+        未確認の ID は、今回の問い合わせにも含めたうえで pending_timeout 秒を過ぎていれば捨てる
+        """
+        now = self._clock()
+        seen = {row[0] for row in rows}
+        for user_id in seen:
+            self._pending.pop(user_id, None)
+        max_id = max(self._max_id, max(seen, default=0))
+        for user_id in range(max(self._max_id, max_id - PENDING_ID_WINDOW) + 1, max_id):
+            if user_id not in seen:
+                self._pending.setdefault(user_id, now)
+        self._max_id = max_id
+        self._pending = {
+            user_id: since for user_id, since in self._pending.items() if now - since < self.pending_timeout
+        }
+
+    def _load(self, started: float) -> None:
+        """全件を読み込んだ新しいビット配列に差し替える（問い合わせはロックの外で行う）"""
+        rows = self._identities()
+        # 1ユーザーにつき2件（ユーザー名・メールアドレス）。登録で増えても作り直さずに済むよう、
+        # capacity と現在のユーザー数の2倍の大きい方を確保する
+        bloom = BloomFilter(2 * max(self.capacity, len(rows) * 2), self.false_positive_rate)
+        for _, username, email in rows:
+            bloom.add(username)
+            bloom.add(email)
+        with self._lock:
+            for value in self._added:
+                bloom.add(value)
+            self._filter = bloom
+            self._max_id = 0
+            self._pending = {}
+            # 読み込み時点でコミット前だった ID（最大 ID の手前の欠番）も未確認として扱う
+            self._track(rows)
+            self._refreshed_at = started
+
+    def _refresh(self, started: float) -> None:
+        """前回の読み込み以降に（他のワーカーで）コミットされたユーザーを追加（問い合わせはロックの外で行う）"""
+        with self._lock:
+            after_id, pending = self._max_id, list(self._pending)
+        rows = self._identities(after_id, pending)
+        with self._lock:
+            self.refreshes += 1
+            for _, username, email in rows:
+                self._filter.add(username)
+                self._filter.add(email)
+            self._track(rows)
+            self._refreshed_at = started
+            full = self._filter.count > self._filter.capacity
+        if full:
+            # 想定件数を超えると偽陽性率が上がるため、大きいフィルターで作り直す
+            self._load(started)
+
+    def add(self, username: str, email: str) -> None:
+        """作成したユーザーを追加（未読み込みなら何もしない）"""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(username)
+                self._filter.add(email)
+            if self._refreshing:
+                self._added.extend((username, email))
+
+    def might_exist(self, value: str) -> bool:
+        """
+        value（ユーザー名またはメールアドレス）が存在し得るか。False なら確実に存在しない
+
+        「無い」と判定するのは、最後の読み込みから refresh_interval 秒以内の場合だけ。
+        それより古い（または未読み込みの）場合は DB で確認させるため True を返し、このスレッドで読み込み直す。
+        読み込み中の他のスレッドは待たずに DB で確認し、読み込みに失敗しても True を返す
+        """
+        if not self.enabled:
+            return True
+        with self._lock:
+            if self._filter is not None:
+                if value in self._filter:
+                    return True
+                if self._clock() - self._refreshed_at < self.refresh_interval:
+                    self.definite_misses += 1
+                    return False
+            if self._refreshing:
+                return True
+            self._refreshing = True
+            self._added = []
+
+        started = self._clock()
+        try:
+            if self._filter is None:
+                self._load(started)
+            else:
+                self._refresh(started)
+        except Exception:
+            logger.warning('user filter: failed to refresh, falling back to database lookups', exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._added = []
+        return True
+
+    def stats(self) -> dict:
+        """読み込み状態・DB問い合わせを省いた回数などの統計情報"""
+        with self._lock:
+            if self._filter is None:
+                return {'enabled': self.enabled, 'loaded': False}
+            return {
+                'enabled': self.enabled,
+                'loaded': True,
+                'entries': self._filter.count,
+                'capacity': self._filter.capacity,
+                'memory_bytes': self._filter.memory_bytes,
+                'hash_count': self._filter.hash_count,
+                'definite_misses': self.definite_misses,
+                'refreshes': self.refreshes,
+                'pending_ids': len(self._pending),
+            }